@@ -16,6 +16,7 @@ const express = require('express');
 const cors = require('cors');
 const { Octokit } = require('@octokit/rest');
 const fs = require('fs').promises;
+const os = require('os');
 const path = require('path');
 const multer = require('multer');
 const sharp = require('sharp');
@@ -41,6 +42,63 @@ const octokit = new Octokit({
   auth: GITHUB_TOKEN
 });
 
+// Lock shared with the Python Gallery Manager (gallery_core.FileLock): whoever
+// creates this file exclusively may write to the checkout until deleting it
+const LOCK_PATH = path.join(__dirname, '..', '.index.html.lock');
+const LOCK_TIMEOUT_MS = 10 * 1000;
+const LOCK_STALE_MS = 120 * 1000;
+
+/**
+ * Run fn while holding the checkout lock
+ */
+async function withGalleryLock(fn) {
+  const owner = JSON.stringify({
+    pid: process.pid,
+    host: os.hostname(),
+    tool: 'gallery-api',
+    time: Date.now() / 1000
+  });
+  const deadline = Date.now() + LOCK_TIMEOUT_MS;
+
+  for (;;) {
+    try {
+      const handle = await fs.open(LOCK_PATH, 'wx');
+      await handle.writeFile(owner);
+      await handle.close();
+      break;
+    } catch (error) {
+      if (error.code !== 'EEXIST') {
+        throw error;
+      }
+    }
+
+    // A lock left behind by a crashed program is removed
+    try {
+      const stat = await fs.stat(LOCK_PATH);
+      if (Date.now() - stat.mtimeMs > LOCK_STALE_MS) {
+        await fs.unlink(LOCK_PATH).catch(() => {});
+        continue;
+      }
+    } catch {
+      continue;
+    }
+
+    if (Date.now() > deadline) {
+      throw new Error('The website checkout is locked by another program');
+    }
+    await new Promise(resolve => setTimeout(resolve, 50));
+  }
+
+  try {
+    return await fn();
+  } finally {
+    const content = await fs.readFile(LOCK_PATH, 'utf8').catch(() => null);
+    if (content === owner) {
+      await fs.unlink(LOCK_PATH).catch(() => {});
+    }
+  }
+}
+
 // Configure multer for image uploads
 const upload = multer({
   storage: multer.memoryStorage(),
@@ -220,25 +278,8 @@ app.post('/api/gallery/upload-image', authenticate, upload.single('image'), asyn
       return res.status(400).json({ error: 'Invalid computer type' });
     }
 
-    // Find next available number
-    const galleryDir = path.join(__dirname, '..', 'assets', 'gallery');
-    await fs.mkdir(galleryDir, { recursive: true });
-
-    const files = await fs.readdir(galleryDir);
-    const existingNumbers = files
-      .filter(f => f.startsWith(type))
-      .map(f => {
-        const match = f.match(new RegExp(`${type}-(\\d+)\\.jpg`));
-        return match ? parseInt(match[1]) : 0;
-      })
-      .filter(n => !isNaN(n));
-
-    const nextNumber = existingNumbers.length > 0 ? Math.max(...existingNumbers) + 1 : 1;
-    const filename = `${type}-${nextNumber}.jpg`;
-    const filepath = path.join(galleryDir, filename);
-
     // Optimize and resize image
-    await sharp(req.file.buffer)
+    const imageData = await sharp(req.file.buffer)
       .resize(1200, 900, {
         fit: 'cover',
         position: 'center'
@@ -247,7 +288,33 @@ app.post('/api/gallery/upload-image', authenticate, upload.single('image'), asyn
         quality: 85,
         progressive: true
       })
-      .toFile(filepath);
+      .toBuffer();
+
+    const galleryDir = path.join(__dirname, '..', 'assets', 'gallery');
+    await fs.mkdir(galleryDir, { recursive: true });
+
+    // Pick the next number and write the file under the lock, so two uploads
+    // (or the desktop Gallery Manager) never claim the same name
+    const { filename, filepath } = await withGalleryLock(async () => {
+      const files = await fs.readdir(galleryDir);
+      const existingNumbers = files
+        .filter(f => f.startsWith(type))
+        .map(f => {
+          const match = f.match(new RegExp(`${type}-(\\d+)\\.jpg`));
+          return match ? parseInt(match[1]) : 0;
+        })
+        .filter(n => !isNaN(n));
+
+      const nextNumber = existingNumbers.length > 0 ? Math.max(...existingNumbers) + 1 : 1;
+      const name = `${type}-${nextNumber}.jpg`;
+      const target = path.join(galleryDir, name);
+
+      // Write to a temporary name and rename, so a half-written image is never served
+      const tmpPath = path.join(galleryDir, `.${name}.${process.pid}.tmp`);
+      await fs.writeFile(tmpPath, imageData);
+      await fs.rename(tmpPath, target);
+      return { filename: name, filepath: target };
+    });
 
     // Commit image to GitHub
     if (GITHUB_TOKEN) {
@@ -297,16 +364,20 @@ app.delete('/api/gallery/image/:filename', authenticate, async (req, res) => {
 
     const filepath = path.join(__dirname, '..', 'assets', 'gallery', filename);
 
-    // Check if file exists
-    try {
-      await fs.access(filepath);
-    } catch {
+    // Check for and delete the local file under the lock
+    const found = await withGalleryLock(async () => {
+      try {
+        await fs.access(filepath);
+      } catch {
+        return false;
+      }
+      await fs.unlink(filepath);
+      return true;
+    });
+    if (!found) {
       return res.status(404).json({ error: 'Image not found' });
     }
 
-    // Delete local file
-    await fs.unlink(filepath);
-
     // Delete from GitHub
     if (GITHUB_TOKEN) {
       try {
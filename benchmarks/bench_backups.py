@@ -0,0 +1,69 @@
+"""
+Benchmark: disk used by backups of index.html.
+
+Makes a series of one-card price edits to a copy of the page and backs it
+up before each one, both ways:
+
+    full copies - what create_backup used to do (shutil.copy2 per change)
+    store       - BackupStore snapshots (chunked, deduplicated, zlib)
+
+Usage:
+    python benchmarks/bench_backups.py [--edits N] [--html PATH]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--edits', type=int, default=20)
+    parser.add_argument('--html', default=str(ROOT / "index.html"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        html_file = tmp / "index.html"
+        shutil.copyfile(args.html, html_file)
+        copies_dir = tmp / "copies"
+        copies_dir.mkdir()
+        store = gm.BackupStore(tmp / "backups")
+
+        card_index = gm.CardIndex(html_file)
+        card_index.load()
+        computers = card_index.computers()
+
+        copy_time = store_time = 0.0
+        print(f"{'edit':>4}{'full copies':>14}{'store':>12}{'store ms':>10}")
+        for i in range(args.edits):
+            start = time.perf_counter()
+            shutil.copy2(html_file, copies_dir / f"index_backup_{i}.html")
+            copy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.snapshot(html_file)
+            elapsed = time.perf_counter() - start
+            store_time += elapsed
+
+            copies = sum(p.stat().st_size for p in copies_dir.iterdir())
+            print(f"{i + 1:>4}{copies:>14,}{store.disk_usage():>12,}{elapsed * 1000:>10.1f}")
+
+            computer = dict(computers[i % len(computers)])
+            computer['price'] = f"${100 + i}"
+            card_index.update(computer)
+
+        print(f"page {html_file.stat().st_size:,} bytes; "
+              f"copy {copy_time * 1000 / args.edits:.1f} ms, "
+              f"snapshot {store_time * 1000 / args.edits:.1f} ms per backup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: full re-parse per edit vs. the persistent CardIndex.
+
+Runs add / update / delete against a temporary copy of index.html, each
+followed by the reload the GUI performs, and reports how many full-page
+BeautifulSoup parses and how much wall time each operation costs.
+
+Usage:
+    python benchmarks/bench_card_index.py [path/to/index.html] [--repeat N]
+        [--write-mode splice|prettify]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import gallery_core as gm  # noqa: E402
+
+
+class LegacyGallery:
+    """The pre-index code path: read, parse and prettify the page every time."""
+
+    def __init__(self, html_file):
+        self.html_file = html_file
+        self.parse_count = 0
+
+    def _parse(self):
+        with open(self.html_file, 'r', encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        self.parse_count += 1
+        return soup
+
+    def _write(self, soup):
+        with open(self.html_file, 'w', encoding='utf-8') as f:
+            f.write(str(soup.prettify()))
+
+    def load(self):
+        soup = self._parse()
+        grid = soup.find('div', {'id': 'gallery-grid'})
+        return [gm.parse_card(c) for c in grid.find_all('div', {'class': 'gallery-card'})]
+
+    def add(self, data):
+        soup = self._parse()
+        soup.find('div', {'id': 'gallery-grid'}).append(gm.create_card_element(soup, data))
+        self._write(soup)
+
+    def update(self, data):
+        soup = self._parse()
+        card = soup.find('div', {'data-computer-id': data['id']})
+        card.replace_with(gm.create_card_element(soup, data))
+        self._write(soup)
+
+    def delete(self, computer_id):
+        soup = self._parse()
+        soup.find('div', {'data-computer-id': computer_id}).decompose()
+        self._write(soup)
+
+
+class IndexedGallery:
+    """The CardIndex code path used by GalleryManager."""
+
+    write_mode = 'splice'
+
+    def __init__(self, html_file):
+        self.index = gm.CardIndex(html_file, write_mode=self.write_mode)
+
+    @property
+    def parse_count(self):
+        return self.index.parse_count
+
+    def load(self):
+        if self.index.is_stale():
+            self.index.load()
+        return self.index.computers()
+
+    def add(self, data):
+        self.index.add(data)
+
+    def update(self, data):
+        self.index.update(data)
+
+    def delete(self, computer_id):
+        self.index.delete(computer_id)
+
+
+def sample_card(computer_id, price="$999"):
+    return {
+        'id': computer_id,
+        'type': 'desktop',
+        'category': 'refurbished',
+        'title': f'Benchmark PC {computer_id}',
+        'price': price,
+        'image': './assets/gallery/desktop-1.jpg',
+        'badge_text': 'Refurbished',
+        'specs': [
+            {'label': 'CPU', 'value': 'Intel Core i5'},
+            {'label': 'Memory', 'value': '16 GB'},
+            {'label': 'Storage', 'value': '512 GB SSD'},
+            {'label': '', 'value': ''},
+        ],
+    }
+
+
+def run(gallery_cls, source, repeat):
+    """Time each operation (plus the reload that follows it) for one code path."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        html_file = Path(tmp) / 'index.html'
+        shutil.copy2(source, html_file)
+        gallery = gallery_cls(html_file)
+
+        def measure(name, op):
+            before = gallery.parse_count
+            start = time.perf_counter()
+            op()
+            gallery.load()
+            elapsed = time.perf_counter() - start
+            total = results.setdefault(name, [0, 0.0, 0])
+            total[0] += gallery.parse_count - before
+            total[1] += elapsed
+            total[2] += 1
+
+        measure('initial load', lambda: None)
+        for i in range(repeat):
+            computer_id = str(9000 + i)
+            measure('add', lambda: gallery.add(sample_card(computer_id)))
+            measure('update', lambda: gallery.update(sample_card(computer_id, "$899")))
+            measure('delete', lambda: gallery.delete(computer_id))
+
+    return {name: (parses / n, seconds / n) for name, (parses, seconds, n) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('html_file', nargs='?',
+                        default=Path(__file__).resolve().parent.parent / 'index.html')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--write-mode', choices=gm.CardIndex.WRITE_MODES, default='splice')
+    args = parser.parse_args()
+    IndexedGallery.write_mode = args.write_mode
+
+    size_kb = Path(args.html_file).stat().st_size / 1024
+    print(f"index.html: {size_kb:.0f} KB, {args.repeat} rounds, "
+          f"{args.write_mode} writer\n")
+
+    before = run(LegacyGallery, args.html_file, args.repeat)
+    after = run(IndexedGallery, args.html_file, args.repeat)
+
+    print(f"{'operation':<14}{'parses before':>14}{'parses after':>14}"
+          f"{'ms before':>12}{'ms after':>12}")
+    for name in before:
+        b_parses, b_time = before[name]
+        a_parses, a_time = after[name]
+        print(f"{name:<14}{b_parses:>14.1f}{a_parses:>14.1f}"
+              f"{b_time * 1000:>12.1f}{a_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: polling git status and reading objects, per process vs. GitService.
+
+Sets up a throwaway site repository (a copy of the page plus --images
+gallery files) with a bare "remote", then times:
+
+    status    - `git status --short` in a new process per poll (what the
+                Git Status button used to run) vs. GitService.status(),
+                which reruns git only when the index, refs or gallery change
+    lookup    - `git rev-parse HEAD:index.html` per lookup vs. the long-lived
+                `git cat-file --batch-check` behind GitService.object_info()
+    publish   - a one-card edit published through GitPublisher with the
+                service, then the same publish again with nothing to do
+
+Usage:
+    python benchmarks/bench_git_service.py [--polls N] [--images N] [--html PATH]
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+
+def git(*args, cwd):
+    subprocess.run(['git'] + list(args), cwd=cwd, check=True, capture_output=True)
+
+
+def make_site(tmp, html, images):
+    """Create a committed site repository pushed to a bare remote."""
+    site = tmp / "site"
+    (site / "assets" / "gallery").mkdir(parents=True)
+    shutil.copyfile(html, site / "index.html")
+    for i in range(images):
+        (site / "assets" / "gallery" / f"image-{i}.jpg").write_bytes(b"\xff\xd8" + bytes(i % 256))
+    remote = tmp / "remote.git"
+    git('init', '-q', '--bare', '-b', 'main', str(remote), cwd=tmp)
+    git('init', '-q', '-b', 'main', cwd=site)
+    git('config', 'user.name', 'Bench', cwd=site)
+    git('config', 'user.email', 'bench@example.com', cwd=site)
+    git('add', '-A', cwd=site)
+    git('commit', '-q', '-m', 'Initial', cwd=site)
+    git('remote', 'add', 'origin', str(remote), cwd=site)
+    git('push', '-q', '-u', 'origin', 'main', cwd=site)
+    return site, remote
+
+
+def timed(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--polls', type=int, default=200)
+    parser.add_argument('--images', type=int, default=500)
+    parser.add_argument('--html', default=str(ROOT / "index.html"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        site, remote = make_site(Path(tmp), args.html, args.images)
+        service = gm.GitService(site)
+        try:
+            processes = args.polls // 10
+
+            def status_process():
+                subprocess.run(['git', 'status', '--short'], cwd=site, capture_output=True)
+
+            def lookup_process():
+                subprocess.run(['git', 'rev-parse', 'HEAD:index.html'], cwd=site,
+                               capture_output=True)
+
+            rows = [("status, process per poll", timed(status_process, processes), processes)]
+            before = service.process_count
+            rows.append(("status, GitService", timed(service.status, args.polls),
+                         service.process_count - before))
+            rows.append(("lookup, process per lookup", timed(lookup_process, processes),
+                         processes))
+            before = service.process_count
+            rows.append(("lookup, cat-file --batch-check",
+                         timed(lambda: service.object_info('HEAD:index.html'), args.polls),
+                         service.process_count - before))
+
+            print(f"{args.images} gallery files, {args.polls} polls")
+            print(f"{'operation':<32}{'processes':>10}{'us each':>10}")
+            for name, seconds, count in rows:
+                print(f"{name:<32}{count:>10}{seconds * 1e6:>10.0f}")
+
+            # An edit is seen by the next poll, without an explicit refresh
+            card_index = gm.CardIndex(site / "index.html")
+            card_index.load()
+            computer = dict(card_index.computers()[0])
+            computer['price'] = "$123"
+            card_index.update(computer)
+            changes = service.pending(gm.GIT_GALLERY_PATHS)
+            print(f"\nafter an edit: {changes}")
+
+            for attempt in ("publish", "publish again"):
+                before = service.process_count
+                start = time.perf_counter()
+                gm.publish_changes(site, "Bench publish", log=lambda line: None, git=service)
+                elapsed = time.perf_counter() - start
+                print(f"{attempt:<14}{elapsed * 1000:>8.0f} ms, "
+                      f"{service.process_count - before} status run(s)")
+        finally:
+            service.close()
+
+        local = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=site,
+                               capture_output=True, text=True).stdout.strip()
+        pushed = subprocess.run(['git', '--git-dir', str(remote), 'rev-parse', 'main'],
+                                capture_output=True, text=True).stdout.strip()
+        print(f"remote at local HEAD: {local == pushed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: turning uploaded photos into gallery JPEGs.
+
+Processes a batch of synthetic camera photos three ways:
+
+    serial-full  - the old dialog code: full decode, resize, encode, one by one
+    serial-draft - process_image() one by one (draft decode, EXIF rotate, srcset copies)
+    pool         - process_image() spread over ImageIngestPool worker processes
+
+The pool only pays off with more than one core; its row shows os.cpu_count().
+
+Usage:
+    python benchmarks/bench_ingest.py [--count N] [--size WxH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+
+def process_full(source, dest):
+    """The image handling ComputerEditDialog.save used to run on the UI thread."""
+    img = Image.open(source)
+    if img.mode in ('RGBA', 'P'):
+        img = img.convert('RGB')
+    if max(img.size) > gm.MAX_IMAGE_SIZE:
+        ratio = gm.MAX_IMAGE_SIZE / max(img.size)
+        img = img.resize(tuple(int(dim * ratio) for dim in img.size), Image.Resampling.LANCZOS)
+    img.save(dest, 'JPEG', quality=85, optimize=True)
+
+
+def make_photos(directory, count, size):
+    """Write `count` noisy JPEGs so the encoder has real detail to work on."""
+    base = Image.effect_noise(size, 64).convert('RGB')
+    photos = []
+    for i in range(count):
+        path = directory / f"photo-{i}.jpg"
+        base.rotate(i).save(path, 'JPEG', quality=92)
+        photos.append(path)
+    return photos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=8)
+    parser.add_argument('--size', default='4000x3000')
+    args = parser.parse_args()
+    size = tuple(int(n) for n in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        photos = make_photos(tmp, args.count, size)
+        # Each mode gets its own store; a shared one would skip the repeats
+        out = {name: tmp / name for name in ("full", "draft", "pool")}
+        for directory in out.values():
+            directory.mkdir()
+
+        results = []
+
+        start = time.perf_counter()
+        for photo in photos:
+            process_full(photo, out["full"] / photo.name)
+        results.append(("serial-full", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        for photo in photos:
+            gm.process_image(photo, out["draft"])
+        results.append(("serial-draft", time.perf_counter() - start))
+
+        pool = gm.ImageIngestPool()
+        try:
+            start = time.perf_counter()
+            _, failed = pool.run([(photo, out["pool"]) for photo in photos])
+            results.append((f"pool x{pool.max_workers}", time.perf_counter() - start))
+        finally:
+            pool.shutdown()
+        if failed:
+            print(f"{len(failed)} images failed: {failed}")
+
+    print(f"{args.count} photos of {size[0]}x{size[1]}, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<14}{'total ms':>10}{'ms/photo':>10}")
+    for name, seconds in results:
+        print(f"{name:<14}{seconds * 1000:>10.0f}{seconds * 1000 / args.count:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: loading the cards by scraping index.html vs. from inventory.jsonl.
+
+Grows a copy of the page to --cards cards (copies of its own cards with new
+IDs), then times CardIndex.load() both ways:
+
+    scrape    - no store: BeautifulSoup parse of the page, parse_card per card
+    inventory - records read from inventory.jsonl, grid only byte-scanned
+    sqlite    - records read from inventory.db, grid only byte-scanned
+
+then fills inventory.db with --history past listings and times the queries
+that run in SQLite against them.
+
+Usage:
+    python benchmarks/bench_inventory.py [--cards N] [--history N] [--repeat N]
+        [--html PATH]
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+
+def grow_page(html_file, cards):
+    """Add copies of the page's cards until it holds `cards` of them."""
+    card_index = gm.CardIndex(html_file)
+    card_index.load()
+    originals = card_index.computers()
+    with card_index.batch():
+        for i in range(len(originals), cards):
+            computer = dict(originals[i % len(originals)])
+            computer['id'] = str(i + 1)
+            card_index.add(computer)
+
+
+def time_load(html_file, inventory, repeat):
+    best = None
+    for _ in range(repeat):
+        card_index = gm.CardIndex(html_file, inventory=inventory)
+        start = time.perf_counter()
+        card_index.load()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, card_index.parse_count, len(card_index.cards)
+
+
+def fill_history(database, count):
+    """Add `count` past listings, written in pages as cards that later left the page."""
+    rng = random.Random(1)
+    start = datetime.now() - timedelta(days=3 * 365)
+    template = database.records()[0]
+    active = database.records()
+    for first in range(0, count, 1000):
+        batch = []
+        for n in range(first, min(first + 1000, count)):
+            record = {k: v for k, v in template.items() if k != 'markup'}
+            record.update(id=str(100000 + n), image="./assets/gallery/listing.jpg",
+                          srcset='', sources=[],type=rng.choice(gm.COMPUTER_TYPES),
+                          category=rng.choice(gm.CATEGORIES),
+                          title=f"Listing {n}", price=f"${rng.randint(100, 3000)}.99")
+            batch.append(record)
+        when = start + timedelta(hours=first // 10)
+        database.write(active + batch, b'', now=when)
+        database.write(active, b'', now=when + timedelta(days=7))
+
+
+def time_query(name, func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    count = len(result) if isinstance(result, list) else result
+    print(f"{name:<34}{'' if count is None else count:>8}{best * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cards', type=int, default=200)
+    parser.add_argument('--history', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--html', default=str(ROOT / "index.html"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        html_file = tmp / "index.html"
+        shutil.copyfile(args.html, html_file)
+        grow_page(html_file, args.cards)
+
+        store = gm.InventoryStore(tmp / gm.INVENTORY_FILE)
+        gm.CardIndex(html_file, inventory=store).load()  # migrate
+
+        database = gm.InventoryDatabase(tmp / gm.INVENTORY_DB_FILE)
+        gm.CardIndex(html_file, inventory=database).load()  # migrate
+
+        results = [("scrape",) + time_load(html_file, None, args.repeat),
+                   ("inventory",) + time_load(html_file, store, args.repeat),
+                   ("sqlite",) + time_load(html_file, database, args.repeat)]
+
+        print(f"page {html_file.stat().st_size:,} bytes, "
+              f"store {store.path.stat().st_size:,} bytes")
+        print(f"{'load':<10}{'cards':>7}{'parses':>8}{'ms':>10}")
+        for name, seconds, parses, count in results:
+            print(f"{name:<10}{count:>7}{parses:>8}{seconds * 1000:>10.1f}")
+
+        fill_history(database, args.history)
+        print(f"\n{database.count(removed=True):,} past listings, "
+              f"{database.path.stat().st_size:,} bytes")
+        print(f"{'query':<34}{'rows':>8}{'ms':>10}")
+        time_query("next id", lambda: [database.next_id()], args.repeat)
+        time_query("count past", lambda: database.count(removed=True), args.repeat)
+        time_query("past $500-$800, by price, first 50",
+                   lambda: database.query(removed=True, price_min=50000, price_max=80000,
+                                          sort='price', limit=50), args.repeat)
+        time_query("past laptops, dearest 50",
+                   lambda: database.query(removed=True, type='laptop', sort='price-desc',
+                                          limit=50), args.repeat)
+        time_query("past, title search", lambda: database.query(removed=True, text="listing 1234"),
+                   args.repeat)
+        time_query("stale 30 days", lambda: database.stale(30), args.repeat)
+        time_query("edit one card (write)",
+                   lambda: database.write(database.records(), b''), args.repeat)
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
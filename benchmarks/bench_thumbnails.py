@@ -0,0 +1,100 @@
+"""
+Benchmark: JPEG thumbnail decoding with and without draft mode.
+
+Times the 60px list thumbnail and the 300/400px previews for every JPEG in
+assets/gallery/ plus a synthetic 24 MP photo, comparing:
+
+    full    - decode at full resolution, then downscale
+    default - Image.thumbnail() with Pillow's default reducing_gap
+    draft   - load_thumbnail(): DCT-scaled draft decode, then downscale
+
+Usage:
+    python benchmarks/bench_thumbnails.py [--repeat N]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+BOXES = [(60, 60), (300, 300), (400, 400)]
+
+
+def thumb_full(path, box):
+    img = Image.open(path)
+    img.load()
+    img.thumbnail(box, reducing_gap=None)
+    return img
+
+
+def thumb_default(path, box):
+    img = Image.open(path)
+    img.thumbnail(box)
+    return img
+
+
+def thumb_draft(path, box):
+    return gm.load_thumbnail(path, box)
+
+
+METHODS = [('full', thumb_full), ('default', thumb_default), ('draft', thumb_draft)]
+
+
+def decoded_pixels(path, box):
+    """Pixels libjpeg actually decodes for a draft-mode thumbnail."""
+    img = Image.open(path)
+    full = img.width * img.height
+    img.draft(None, box)
+    return full, img.width * img.height
+
+
+def make_synthetic(path, size=(6000, 4000)):
+    """Write a 24 MP JPEG with enough detail to be realistic to decode."""
+    small = Image.effect_mandelbrot((size[0] // 8, size[1] // 8), (-2.0, -1.2, 1.0, 1.2), 100)
+    img = Image.merge('RGB', (small, small.rotate(180), small.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    img.resize(size, Image.Resampling.BICUBIC).save(path, 'JPEG', quality=90)
+
+
+def time_ms(func, path, box, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path, box)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = Path(tmp) / 'synthetic-24mp.jpg'
+        make_synthetic(synthetic)
+        images = sorted((ROOT / 'assets' / 'gallery').glob('*.jpg')) + [synthetic]
+
+        print(f"{'image':<24}{'size':>11}{'box':>6}"
+              + ''.join(f"{name + ' ms':>12}" for name, _ in METHODS)
+              + f"{'decoded px':>14}")
+        for path in images:
+            with Image.open(path) as img:
+                dims = f"{img.width}x{img.height}"
+            for box in BOXES:
+                timings = [time_ms(func, path, box, args.repeat) for _, func in METHODS]
+                full_px, draft_px = decoded_pixels(path, box)
+                print(f"{path.name:<24}{dims:>11}{box[0]:>6}"
+                      + ''.join(f"{ms:>12.2f}" for ms in timings)
+                      + f"{draft_px / full_px:>13.1%} ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: virtualized computer list vs. one widget tree per computer.
+
+Builds a synthetic index.html with 2,000 cards, opens the Gallery Manager on
+it and measures:
+
+    refresh - refresh_list() until the window is idle
+    scroll  - stepping through the whole list one viewport at a time
+
+The "before" numbers rebuild the list the old way: a CTkFrame with its
+labels and click bindings for every computer inside a CTkScrollableFrame.
+Needs a display (Tk cannot run headless).
+
+Usage:
+    python benchmarks/bench_virtual_list.py [--cards N]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tkinter
+from pathlib import Path
+
+import customtkinter as ctk
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import gallery_core as core  # noqa: E402
+import gallery_gui as gm  # noqa: E402
+
+
+def write_synthetic_site(website_dir, count):
+    """Write an index.html with `count` cards and no images."""
+    soup = BeautifulSoup('', 'html.parser')
+    cards = []
+    for i in range(1, count + 1):
+        computer_type = 'desktop' if i % 2 else 'laptop'
+        category = ['custom', 'refurbished', 'new'][i % 3]
+        card = core.create_card_element(soup, {
+            'id': str(i),
+            'type': computer_type,
+            'category': category,
+            'title': f'Synthetic {computer_type.title()} {i}',
+            'price': f'${500 + i}',
+            'image': '',
+            'badge_text': category.title(),
+            'specs': [{'label': 'CPU', 'value': f'Model {i}'}] + [{'label': '', 'value': ''}] * 3,
+        })
+        cards.append(str(card))
+
+    html = ('<!DOCTYPE html>\n<html>\n <body>\n  <div class="gallery-grid" id="gallery-grid">\n'
+            + '\n'.join(cards) + '\n  </div>\n </body>\n</html>\n')
+    (Path(website_dir) / 'index.html').write_text(html, encoding='utf-8')
+
+
+def legacy_refresh(app, parent, computers):
+    """The old refresh_list: destroy everything, then one frame per computer."""
+    for widget in parent.winfo_children():
+        widget.destroy()
+    for computer in computers:
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", padx=5, pady=5)
+        text_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        text_frame.pack(side="left", fill="both", expand=True, padx=5)
+        ctk.CTkLabel(text_frame, text=computer['title'],
+                     font=ctk.CTkFont(size=13, weight="bold"), anchor="w").pack(fill="x")
+        info = f"{computer['price']} | {computer['type'].title()} | {computer['category'].title()}"
+        ctk.CTkLabel(text_frame, text=info, font=ctk.CTkFont(size=10),
+                     anchor="w", text_color="gray").pack(fill="x")
+        frame.bind("<Button-1>", lambda e, c=computer: app.select_computer(c))
+        for child in frame.winfo_children():
+            child.bind("<Button-1>", lambda e, c=computer: app.select_computer(c))
+            for subchild in child.winfo_children():
+                subchild.bind("<Button-1>", lambda e, c=computer: app.select_computer(c))
+
+
+def timed(app, func):
+    start = time.perf_counter()
+    func()
+    app.update_idletasks()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cards', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_site(tmp, args.cards)
+        try:
+            app = gm.GalleryManager(tmp)
+        except tkinter.TclError as e:
+            print(f"Cannot open a window ({e}); run this benchmark on a desktop session.")
+            return 1
+        app.update()
+
+        # After: virtualized list
+        refresh_ms = timed(app, app.refresh_list)
+        view = app.list_view
+        page = view.viewport_height()
+        total = len(view.items) * view.row_height
+        steps = 0
+        start = time.perf_counter()
+        for offset in range(0, total, page):
+            view.scroll_to(offset)
+            app.update_idletasks()
+            steps += 1
+        scroll_ms = (time.perf_counter() - start) * 1000 / max(steps, 1)
+        rows = len(view.rows)
+
+        # Before: one widget tree per card in a CTkScrollableFrame
+        legacy_frame = ctk.CTkScrollableFrame(app)
+        legacy_frame.grid(row=0, column=0, sticky="nsew")
+        legacy_ms = timed(app, lambda: legacy_refresh(app, legacy_frame, app.computers))
+        legacy_canvas = legacy_frame._parent_canvas
+        legacy_steps = 20
+        start = time.perf_counter()
+        for i in range(legacy_steps):
+            legacy_canvas.yview_moveto(i / legacy_steps)
+            app.update_idletasks()
+        legacy_scroll_ms = (time.perf_counter() - start) * 1000 / legacy_steps
+
+        app.on_close()
+
+    print(f"{args.cards} cards\n")
+    print(f"{'':<22}{'before':>12}{'after':>12}")
+    print(f"{'refresh (ms)':<22}{legacy_ms:>12.1f}{refresh_ms:>12.1f}")
+    print(f"{'scroll step (ms)':<22}{legacy_scroll_ms:>12.2f}{scroll_ms:>12.2f}")
+    print(f"{'row widgets':<22}{args.cards:>12}{rows:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
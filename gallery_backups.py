@@ -0,0 +1,536 @@
+"""
+Gallery backups for Computer Store Kansas Website
+Keeping the page safe: atomic writes, the lock shared with the Node API,
+deduplicated backup snapshots of index.html and the card history journal.
+"""
+
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+# Backup chunks end after a line whose CRC matches this mask (~1 line in 32),
+# so an edit only changes the chunks around it
+BACKUP_CHUNK_MASK = 0x1f
+BACKUP_CHUNK_MIN = 1024
+BACKUP_CHUNK_MAX = 64 * 1024
+
+# Default retention: the newest BACKUP_KEEP_LAST snapshots, plus the last
+# snapshot of each of the past BACKUP_KEEP_DAILY days
+BACKUP_KEEP_LAST = 30
+BACKUP_KEEP_DAILY = 14
+
+# Full copies written by older versions, e.g. index_backup_20251110_130037.html
+LEGACY_BACKUP_RE = re.compile(r'index_backup_(\d{8}_\d{6})\.html$')
+
+# How long to wait for another program's lock on index.html, and the age at
+# which a lock is taken to be left over from a program that crashed
+LOCK_TIMEOUT = 10
+LOCK_STALE_AGE = 120
+
+
+def write_bytes_atomic(path, data):
+    """Replace a file with `data` so that no reader or crash ever sees half of it.
+
+    The bytes go to a temporary file in the same directory, which is synced
+    to disk and then renamed over the target; the directory entry is synced
+    too where the OS allows it.
+    """
+    path = Path(path)
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_file)
+        os.replace(tmp_file, path)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    sync_directory(path.parent)
+
+
+def sync_directory(directory):
+    """Flush a rename in `directory` to disk (not possible on Windows)."""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """Lock shared between processes, held as an exclusively created file.
+
+    The lock file holds its owner's pid, host and start time as JSON. Taking
+    it is an O_CREAT | O_EXCL open, which api/gallery-api.js does too
+    (fs.open with 'wx'), so Gallery Manager instances and the Node API take
+    turns. A lock older than LOCK_STALE_AGE, or one whose process is gone,
+    is removed. The lock is re-entrant within a process.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._owner = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if not self._depth:
+            try:
+                self._create()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if not self._depth:
+            try:
+                if self.path.read_bytes() == self._owner:
+                    self.path.unlink()
+            except FileNotFoundError:
+                pass
+        self._thread_lock.release()
+
+    def owner(self):
+        """Return the JSON a lock file holds, or None."""
+        try:
+            return json.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _create(self):
+        self._owner = json.dumps({
+            'pid': os.getpid(), 'host': socket.gethostname(),
+            'tool': 'gallery-manager', 'time': time.time(),
+        }).encode('utf-8')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._remove_stale():
+                    continue
+                if time.monotonic() >= deadline:
+                    owner = self.owner() or {}
+                    raise TimeoutError(f"{self.path.name} is held by "
+                                       f"{owner.get('tool', 'another program')} "
+                                       f"(pid {owner.get('pid', '?')})")
+                time.sleep(0.05)
+                continue
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._owner)
+            return
+
+    def _remove_stale(self):
+        """Delete the lock file if its owner is gone; return True if it was."""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        owner = self.owner() or {}
+        stale = age > LOCK_STALE_AGE
+        # Signal 0 only checks the pid on POSIX; on Windows os.kill terminates
+        if not stale and os.name == 'posix' and owner.get('host') == socket.gethostname():
+            try:
+                os.kill(owner['pid'], 0)
+            except ProcessLookupError:
+                stale = True
+            except (KeyError, TypeError, PermissionError):
+                pass
+        if stale:
+            self.path.unlink(missing_ok=True)
+        return stale
+
+
+_page_locks = {}
+
+
+def page_lock(html_file):
+    """Return this process's FileLock for writing `html_file` (.index.html.lock)."""
+    html_file = Path(html_file).resolve()
+    lock = _page_locks.get(html_file)
+    if lock is None:
+        lock = _page_locks[html_file] = FileLock(html_file.with_name(f".{html_file.name}.lock"))
+    return lock
+
+
+def split_chunks(data):
+    """Cut page bytes into content-defined chunks that join back to `data`.
+
+    Boundaries depend only on nearby lines, so inserting a card shifts no
+    chunks except the one it lands in. Long lines (inline base64 images) are
+    chunks of their own, cut every BACKUP_CHUNK_MAX bytes.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for line in data.splitlines(keepends=True):
+        if len(line) >= BACKUP_CHUNK_MIN:
+            # Long lines stand alone, so small edits nearby don't store them again
+            if current:
+                chunks.append(b''.join(current))
+                current, size = [], 0
+            chunks.extend(line[i:i + BACKUP_CHUNK_MAX]
+                          for i in range(0, len(line), BACKUP_CHUNK_MAX))
+            continue
+
+        current.append(line)
+        size += len(line)
+        if size >= BACKUP_CHUNK_MAX or (
+                size >= BACKUP_CHUNK_MIN and zlib.crc32(line) & BACKUP_CHUNK_MASK == 0):
+            chunks.append(b''.join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(b''.join(current))
+    return chunks
+
+
+class BackupStore:
+    """Deduplicated, compressed snapshots of index.html.
+
+    A snapshot is a small JSON manifest in backups/store/snapshots/ listing
+    the page's chunks (see split_chunks). Chunks are zlib-compressed and kept
+    once in backups/store/objects/ under their SHA-256, so a snapshot taken
+    after an edit only adds the chunks that edit touched.
+    """
+
+    def __init__(self, backup_dir):
+        self.backup_dir = Path(backup_dir)
+        self.root = self.backup_dir / "store"
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+
+    def snapshot(self, html_file, label="", created=None):
+        """Store the current page unless it matches the latest snapshot.
+
+        Returns:
+            (snapshot, created) where created is False if nothing was stored.
+        """
+        data = Path(html_file).read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        latest = self.latest()
+        if latest and latest['sha256'] == sha:
+            return latest, False
+
+        created = created or datetime.now()
+        snapshot = {
+            'id': f"{created:%Y%m%d-%H%M%S}-{sha[:8]}",
+            'created': created.isoformat(),
+            'label': label,
+            'size': len(data),
+            'sha256': sha,
+            'chunks': [self._put(chunk) for chunk in split_chunks(data)],
+        }
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.snapshots_dir / f"{snapshot['id']}.json",
+                           json.dumps(snapshot).encode('utf-8'))
+        return snapshot, True
+
+    def snapshots(self):
+        """Return all snapshots, oldest first."""
+        if not self.snapshots_dir.is_dir():
+            return []
+        found = []
+        for path in self.snapshots_dir.glob('*.json'):
+            try:
+                found.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError) as e:
+                print(f"Error reading backup {path.name}: {e}")
+        found.sort(key=lambda snapshot: (snapshot['created'], snapshot['id']))
+        return found
+
+    def latest(self):
+        """Return the newest snapshot, or None."""
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def find(self, snapshot_id):
+        """Return the snapshot whose id starts with `snapshot_id` ("latest" works too)."""
+        snapshots = self.snapshots()
+        if snapshot_id == 'latest' and snapshots:
+            return snapshots[-1]
+        matches = [s for s in snapshots if s['id'].startswith(snapshot_id)]
+        if len(matches) != 1:
+            problem = "matches several backups" if matches else "not found"
+            raise KeyError(f"Backup {snapshot_id} {problem}")
+        return matches[0]
+
+    def read(self, snapshot_id):
+        """Return the page bytes of a snapshot, checked against its hash."""
+        snapshot = self.find(snapshot_id)
+        data = b''.join(zlib.decompress(self._object_path(name).read_bytes())
+                        for name in snapshot['chunks'])
+        if hashlib.sha256(data).hexdigest() != snapshot['sha256']:
+            raise ValueError(f"Backup {snapshot['id']} is damaged")
+        return data
+
+    def restore(self, snapshot_id, html_file):
+        """Write a snapshot back to html_file, snapshotting the page it replaces.
+
+        Returns:
+            The restored snapshot.
+        """
+        snapshot = self.find(snapshot_id)
+        data = self.read(snapshot['id'])
+        with page_lock(html_file):
+            if Path(html_file).exists():
+                self.snapshot(html_file, label=f"before restoring {snapshot['id']}")
+            write_bytes_atomic(html_file, data)
+        return snapshot
+
+    def prune(self, keep_last=BACKUP_KEEP_LAST, keep_daily=BACKUP_KEEP_DAILY, now=None):
+        """Apply the retention policy and delete chunks no snapshot uses.
+
+        Returns:
+            (removed snapshot ids, bytes freed)
+        """
+        snapshots = self.snapshots()
+        keep = {s['id'] for s in snapshots[-keep_last:]} if keep_last > 0 else set()
+
+        # Newest snapshot of each recent day; later ones overwrite earlier ones
+        first_day = (now or datetime.now()).date().toordinal() - keep_daily + 1
+        daily = {}
+        for snapshot in snapshots:
+            day = datetime.fromisoformat(snapshot['created']).date().toordinal()
+            if day >= first_day:
+                daily[day] = snapshot['id']
+        keep.update(daily.values())
+
+        removed = []
+        for snapshot in snapshots:
+            if snapshot['id'] not in keep:
+                (self.snapshots_dir / f"{snapshot['id']}.json").unlink(missing_ok=True)
+                removed.append(snapshot['id'])
+
+        freed = 0
+        if removed:
+            used = {name for s in snapshots if s['id'] in keep for name in s['chunks']}
+            for path in self.objects_dir.glob('*/*'):
+                if path.name not in used:
+                    freed += path.stat().st_size
+                    path.unlink()
+        return removed, freed
+
+    def disk_usage(self):
+        """Return the bytes the store takes up on disk."""
+        if not self.root.is_dir():
+            return 0
+        return sum(path.stat().st_size for path in self.root.rglob('*') if path.is_file())
+
+    def import_legacy(self, delete=False):
+        """Move old full-copy backups (index_backup_*.html) into the store.
+
+        Returns:
+            [(file name, snapshot id)] oldest first.
+        """
+        imported = []
+        legacy = sorted(self.backup_dir.glob('index_backup_*.html'))
+        for path in legacy:
+            match = LEGACY_BACKUP_RE.search(path.name)
+            if not match:
+                continue
+            created = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+            snapshot, _ = self.snapshot(path, label=path.name, created=created)
+            imported.append((path.name, snapshot['id']))
+            if delete:
+                path.unlink()
+        return imported
+
+    def _object_path(self, name):
+        return self.objects_dir / name[:2] / name
+
+    def _put(self, chunk):
+        """Store one chunk unless it is already there, and return its name."""
+        name = hashlib.sha256(chunk).hexdigest()
+        path = self._object_path(name)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_bytes_atomic(path, zlib.compress(chunk, 9))
+        return name
+
+
+def backup_html(html_file, backup_dir, label=""):
+    """Snapshot index.html into the backup store and apply the retention policy.
+
+    Returns:
+        The snapshot; the latest one if the page hasn't changed since.
+    """
+    store = BackupStore(backup_dir)
+    snapshot, created = store.snapshot(html_file, label=label)
+    if created:
+        store.prune()
+    return snapshot
+
+
+def describe_change(entry):
+    """Return e.g. "updated 3 (Frosty)" for a CardJournal entry."""
+    before, after = entry['before'], entry['after']
+    verb = 'added' if before is None else 'deleted' if after is None else 'updated'
+    title = (after or before)['data'].get('title', '')
+    return f"{verb} {entry['id']} ({title})"
+
+
+class CardJournal:
+    """Append-only history of card changes, with undo and redo.
+
+    A CardIndex with the journal attached appends one JSON line per changed
+    card, keyed by its data-computer-id, holding the card's state before and
+    after (see CardIndex.card_state; None where the card didn't exist).
+    Changes written together form a group, which is what undo and redo step
+    over. Undo and redo are appended as groups of their own, so the file is
+    only ever added to and other processes (the CLI) can share it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = []
+        self._read_size = 0
+        self._action = ('edit', None)
+
+    def refresh(self):
+        """Read the entries appended since the last call."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._read_size:
+            # Replaced or truncated; start over
+            self.entries, self._read_size = [], 0
+        if size == self._read_size:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._read_size)
+            chunk = f.read(size - self._read_size)
+        end = chunk.rfind(b'\n') + 1  # A line still being written waits
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                self.entries.append(json.loads(line))
+        self._read_size += end
+
+    def append(self, changes):
+        """Add a group of changes ({'id', 'before', 'after'}) to the journal."""
+        self.refresh()
+        kind, target = self._action
+        seq = self.entries[-1]['seq'] + 1 if self.entries else 1
+        now = datetime.now().isoformat(timespec='seconds')
+        entries = []
+        for number, change in enumerate(changes):
+            entry = {'seq': seq + number, 'group': seq, 'time': now, 'kind': kind}
+            if target:
+                entry['target'] = target
+            entry.update(change)
+            entries.append(entry)
+
+        payload = b''.join(json.dumps(entry).encode('utf-8') + b'\n' for entry in entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+        self.refresh()
+
+    def groups(self):
+        """Return {group: [entries]} in journal order."""
+        self.refresh()
+        groups = {}
+        for entry in self.entries:
+            groups.setdefault(entry['group'], []).append(entry)
+        return groups
+
+    def stacks(self):
+        """Return (undo, redo): the edit groups that can be undone and redone, last on top."""
+        undo, redo = [], []
+        for group, entries in self.groups().items():
+            kind, target = entries[0]['kind'], entries[0].get('target')
+            if kind == 'edit':
+                undo.append(group)
+                redo.clear()
+            elif kind == 'undo' and undo and undo[-1] == target:
+                redo.append(undo.pop())
+            elif kind == 'redo' and redo and redo[-1] == target:
+                undo.append(redo.pop())
+        return undo, redo
+
+    def undo(self, card_index):
+        """Undo the latest edit group in card_index; return its entries, or None."""
+        undo, _ = self.stacks()
+        if not undo:
+            return None
+        entries = self.groups()[undo[-1]]
+        steps = [(e['id'], e['after'], e['before']) for e in reversed(entries)]
+        self._apply(card_index, steps, ('undo', undo[-1]))
+        return entries
+
+    def redo(self, card_index):
+        """Redo the latest undone edit group; return its entries, or None."""
+        _, redo = self.stacks()
+        if not redo:
+            return None
+        entries = self.groups()[redo[-1]]
+        steps = [(e['id'], e['before'], e['after']) for e in entries]
+        self._apply(card_index, steps, ('redo', redo[-1]))
+        return entries
+
+    def revert(self, card_index, seq):
+        """Put every card back the way it was after journal entry `seq`.
+
+        Only cards changed since are touched, each straight to its old state,
+        in one write that is recorded as a single edit (so it can be undone).
+
+        Returns:
+            The ids of the cards changed.
+        """
+        self.refresh()
+        current, target = {}, {}
+        for entry in self.entries:
+            if entry['seq'] > seq:
+                target.setdefault(entry['id'], entry['before'])
+                current[entry['id']] = entry['after']
+
+        # Removals first, then insertions in page order so positions hold
+        steps = sorted(((cid, current[cid], state) for cid, state in target.items()),
+                       key=lambda step: (step[2] is not None, step[2] and step[2]['index']))
+        self._apply(card_index, steps, ('edit', None))
+        return [cid for cid, _, _ in steps]
+
+    def _apply(self, card_index, steps, action):
+        """Move cards from the `expected` state to `state` for (id, expected, state) steps."""
+        checked = set()
+        for computer_id, expected, _ in steps:
+            if computer_id in checked:
+                continue
+            checked.add(computer_id)
+            now = card_index.card_state(computer_id)
+            if (now and now['markup']) != (expected and expected['markup']):
+                raise ValueError(f"Card {computer_id} was changed outside the history")
+
+        card_index.journal = self
+        self._action = action
+        try:
+            with card_index.batch():
+                for computer_id, _, state in steps:
+                    card_index.restore_card(computer_id, state)
+        finally:
+            self._action = ('edit', None)
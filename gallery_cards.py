@@ -0,0 +1,488 @@
+"""
+Gallery cards for Computer Store Kansas Website
+The markup of a gallery card: finding the cards in index.html, reading and
+writing a card's fields, checking them, and indexing them for filtering.
+"""
+
+from bs4 import BeautifulSoup
+import re
+import bisect
+from collections import defaultdict
+
+# Values the card type and category filters on the website know about
+COMPUTER_TYPES = ('desktop', 'laptop')
+CATEGORIES = ('refurbished', 'custom', 'new')
+
+# Badge shown on a card for each category
+BADGE_TEXT = {
+    'custom': "Custom Build",
+    'new': "New",
+    'refurbished': "Refurbished",
+}
+
+# Width a card image is shown at: the grid has one column on phones, two on
+# tablets and three 380px columns in the 1200px container on desktops
+CARD_IMAGE_SIZES = "(max-width: 768px) 90vw, (max-width: 1024px) 45vw, 380px"
+
+# Matches the opening tag of the gallery grid container
+GRID_OPEN_RE = re.compile(rb'<div\b[^>]*\bid=["\']gallery-grid["\'][^>]*>')
+
+# Matches comments and <div>/</div> tags (quoted attributes may contain '>')
+DIV_TAG_RE = re.compile(rb'<!--.*?-->|<(/?)div\b((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>', re.S)
+
+GALLERY_CARD_CLASS_RE = re.compile(rb'\bclass=["\'](?:[^"\']*\s)?gallery-card(?:\s[^"\']*)?["\']')
+
+COMPUTER_ID_ATTR_RE = re.compile(rb'\bdata-computer-id=["\']([^"\']*)["\']')
+
+# Words in titles and spec values, keeping model numbers like "i7-12700k" whole
+SEARCH_TOKEN_RE = re.compile(r'[a-z0-9]+(?:[.\-][a-z0-9]+)*')
+
+
+def scan_card_spans(raw):
+    """Scan raw HTML bytes for the gallery cards inside #gallery-grid.
+
+    This is a byte-level tag scan, not an HTML parse, so it is cheap enough to
+    run after every write.
+
+    Returns:
+        (grid_span, card_spans) where grid_span is the (start, end) byte range
+        of the grid's contents and card_spans is a list of (id, start, end)
+        tuples, one per direct gallery-card child. Returns (None, []) if the
+        grid is missing.
+    """
+    grid_match = GRID_OPEN_RE.search(raw)
+    if not grid_match:
+        return None, []
+
+    depth = 0
+    card_start = None
+    card_id = None
+    spans = []
+    for match in DIV_TAG_RE.finditer(raw, grid_match.end()):
+        closing = match.group(1)
+        if closing is None:
+            continue  # Comment
+
+        if closing == b'/':
+            if depth == 0:
+                # Closing tag of the grid itself
+                return (grid_match.end(), match.start()), spans
+            depth -= 1
+            if depth == 0 and card_start is not None:
+                spans.append((card_id, card_start, match.end()))
+                card_start = None
+        else:
+            attrs = match.group(2)
+            if depth == 0 and GALLERY_CARD_CLASS_RE.search(attrs):
+                card_start = match.start()
+                id_match = COMPUTER_ID_ATTR_RE.search(attrs)
+                card_id = id_match.group(1).decode('utf-8') if id_match else None
+            depth += 1
+
+    return None, []
+
+
+def parse_card(card):
+    """Parse a single gallery card element."""
+    try:
+        data = {
+            'id': card.get('data-computer-id'),
+            'type': card.get('data-type'),
+            'category': card.get('data-category')
+        }
+
+        # Parse badge
+        badge = card.find('div', class_=lambda x: x and 'gallery-card-badge' in x)
+        data['badge_text'] = badge.get_text(strip=True) if badge else ''
+
+        # Parse image
+        img = card.find('img')
+        data['image'] = img.get('src', '') if img else ''
+        data['srcset'] = img.get('srcset', '') if img else ''
+        data['sources'] = [{'type': source.get('type', ''), 'srcset': source.get('srcset', '')}
+                           for source in card.find_all('source')]
+        data['alt'] = img.get('alt', '') if img else ''
+
+        # Parse back content
+        title = card.find('h3', {'class': 'gallery-card-title'})
+        data['title'] = title.get_text(strip=True) if title else ''
+
+        price = card.find('div', {'class': 'gallery-card-price'})
+        data['price'] = price.get_text(strip=True) if price else ''
+
+        # Parse specs
+        specs = card.find_all('div', {'class': 'spec-item'})
+        data['specs'] = []
+        for spec in specs[:4]:  # Max 4 specs
+            text = spec.get_text(strip=True)
+            if ':' in text:
+                label, value = text.split(':', 1)
+                data['specs'].append({
+                    'label': label.strip(),
+                    'value': value.strip()
+                })
+
+        # Ensure we have exactly 4 specs
+        while len(data['specs']) < 4:
+            data['specs'].append({'label': '', 'value': ''})
+
+        return data
+
+    except Exception as e:
+        print(f"Error parsing card: {e}")
+        return None
+
+
+def create_card_element(soup, data):
+    """Create a BeautifulSoup card element from computer data."""
+    # Main card div
+    card = soup.new_tag('div', attrs={
+        'class': 'gallery-card',
+        'data-type': data['type'],
+        'data-category': data['category'],
+        'data-computer-id': data['id']
+    })
+
+    # Inner container
+    inner = soup.new_tag('div', attrs={'class': 'gallery-card-inner'})
+    card.append(inner)
+
+    # Front of card
+    front = soup.new_tag('div', attrs={'class': 'gallery-card-front'})
+    inner.append(front)
+
+    # Badge
+    badge_class = f"gallery-card-badge badge-{data['category']}"
+    badge = soup.new_tag('div', attrs={'class': badge_class})
+    badge.string = data['badge_text']
+    front.append(badge)
+
+    # Image container
+    img_container = soup.new_tag('div', attrs={'class': 'gallery-card-image'})
+    front.append(img_container)
+
+    # Image
+    img = soup.new_tag('img', attrs={
+        'alt': data['title'],
+        'onerror': "this.src='./assets/logo.png'"
+    })
+    img_container.append(img)
+    set_card_image(soup, img, data['image'], data.get('srcset'), data.get('sources'))
+
+    # Back of card
+    back = soup.new_tag('div', attrs={'class': 'gallery-card-back'})
+    inner.append(back)
+
+    # Title
+    title = soup.new_tag('h3', attrs={'class': 'gallery-card-title'})
+    title.string = data['title']
+    back.append(title)
+
+    # Price
+    price = soup.new_tag('div', attrs={'class': 'gallery-card-price'})
+    price.string = data['price']
+    back.append(price)
+
+    # Specs container
+    specs_container = soup.new_tag('div', attrs={'class': 'gallery-card-specs'})
+    back.append(specs_container)
+
+    # Individual specs
+    for spec in data['specs']:
+        if spec['label'] and spec['value']:
+            spec_item = soup.new_tag('div', attrs={'class': 'spec-item'})
+
+            label_tag = soup.new_tag('strong')
+            label_tag.string = f"{spec['label']}:"
+            spec_item.append(label_tag)
+            spec_item.append(f" {spec['value']}")
+
+            specs_container.append(spec_item)
+
+    return card
+
+
+def set_card_image(soup, img, src, srcset='', sources=()):
+    """Point a card's <img> at src with its responsive copies.
+
+    With sources (extra formats) the <img> is wrapped in a <picture> holding
+    a <source> per format; without them any <picture> is removed again.
+    """
+    img['src'] = src
+    for attr in ('srcset', 'sizes'):
+        if img.has_attr(attr):
+            del img[attr]
+    if srcset:
+        img['srcset'] = srcset
+        img['sizes'] = CARD_IMAGE_SIZES
+
+    picture = img.parent if img.parent and img.parent.name == 'picture' else None
+    if picture:
+        for source in picture.find_all('source'):
+            source.decompose()
+    if not sources:
+        if picture:
+            picture.unwrap()
+        return
+
+    if not picture:
+        picture = img.wrap(soup.new_tag('picture'))
+    for source in sources:
+        img.insert_before(soup.new_tag('source', attrs={
+            'type': source['type'],
+            'srcset': source['srcset'],
+            'sizes': CARD_IMAGE_SIZES,
+        }))
+
+
+def update_card_element(soup, card, old, data):
+    """Change a hand-made card's fields in place, keeping the rest of its markup.
+
+    Only fields that differ from old (the card's current data) are touched:
+    the type and category attributes, the title, the image, the price (a
+    new price replaces sale markup such as original and sale prices) and
+    the labelled spec rows parse_card reads. Other rows, ribbons and extra
+    markup are left alone; the badge only changes with the category.
+
+    Raises:
+        ValueError: If the card lacks an element a changed field lives in.
+    """
+    def find(name, class_):
+        tag = card.find(name, class_=class_)
+        if tag is None:
+            raise ValueError(f"Card {data['id']} has no {class_} to update")
+        return tag
+
+    card['data-type'] = data['type']
+    if data['category'] != old['category']:
+        card['data-category'] = data['category']
+        badge = card.find('div', class_=lambda x: x and 'gallery-card-badge' in x)
+        if badge is not None:
+            badge['class'] = [f"badge-{data['category']}" if name == f"badge-{old['category']}"
+                              else name for name in badge['class']]
+            badge.string = data['badge_text']
+
+    if data['title'] != old['title']:
+        find('h3', 'gallery-card-title').string = data['title']
+
+    img = card.find('img')
+    if img is not None:
+        if data['title'] != old['title'] and img.get('alt') == old['title']:
+            img['alt'] = data['title']
+        if (data['image'], data.get('srcset'), data.get('sources')) != (
+                old['image'], old.get('srcset'), old.get('sources')):
+            set_card_image(soup, img, data['image'], data.get('srcset'), data.get('sources'))
+
+    if data['price'] != old['price']:
+        price = find('div', 'gallery-card-price')
+        price.clear()
+        price.string = data['price']
+
+    if data['specs'] != old['specs']:
+        _update_spec_rows(soup, find('div', 'gallery-card-specs'), data['specs'])
+
+
+def _update_spec_rows(soup, container, specs):
+    """Rewrite the "Label: value" rows parse_card reads, keeping any other rows."""
+    items = container.find_all('div', {'class': 'spec-item'})
+    labelled = [item for item in items[:4] if ':' in item.get_text(strip=True)]
+    specs = [spec for spec in specs if spec['label'] and spec['value']]
+    previous = None
+    for i, spec in enumerate(specs):
+        if i < len(labelled):
+            item = labelled[i]
+            item.clear()
+        else:
+            item = soup.new_tag('div', attrs={'class': 'spec-item'})
+            if previous is not None:
+                previous.insert_after(item)
+            else:
+                container.insert(0, item)
+        label_tag = soup.new_tag('strong')
+        label_tag.string = f"{spec['label']}:"
+        item.append(label_tag)
+        item.append(f" {spec['value']}")
+        previous = item
+    for item in labelled[len(specs):]:
+        item.decompose()
+
+
+def is_custom_card(card, data):
+    """Return True if a card has markup create_card_element wouldn't write for its data.
+
+    Hand-made cards (sale prices, ribbons) keep their markup in the inventory.
+    """
+    made = create_card_element(BeautifulSoup('', 'html.parser'), data)
+    return made.prettify() != card.prettify()
+
+
+def badge_text_for(category):
+    """Return the badge text for a card category."""
+    return BADGE_TEXT.get(category, "Refurbished")
+
+
+def validate_computer(data, require_image=False):
+    """Check a computer's fields and return a list of error messages.
+
+    These are the same rules the edit dialog enforces, so cards added from
+    the command line look like cards added in the app.
+    """
+    errors = []
+
+    if not data.get('title', '').strip():
+        errors.append("Computer name is required")
+
+    price = data.get('price', '').strip()
+    if not price:
+        errors.append("Price is required")
+    if not price.startswith('$'):
+        errors.append("Price must start with $")
+
+    specs = data.get('specs') or []
+    if not any(spec.get('label', '').strip() and spec.get('value', '').strip() for spec in specs):
+        errors.append("At least one specification is required")
+
+    if require_image and not data.get('image'):
+        errors.append("Image is required for new computers")
+
+    return errors
+
+
+def normalize_specs(specs):
+    """Drop empty specs and pad the list to the four slots a card shows."""
+    specs = [{'label': spec.get('label', '').strip(), 'value': spec.get('value', '').strip()}
+             for spec in specs or []]
+    specs = [spec for spec in specs if spec['label'] and spec['value']]
+    while len(specs) < 4:
+        specs.append({'label': '', 'value': ''})
+    return specs
+
+
+def next_computer_id(computers):
+    """Return the next free numeric computer ID as a string."""
+    ids = [int(c['id']) for c in computers if c['id'].isdigit()]
+    return str(max(ids) + 1) if ids else "1"
+
+
+def search_tokens(text):
+    """Split text into lowercase search terms."""
+    return SEARCH_TOKEN_RE.findall(text.lower())
+
+
+class CardFilterIndex:
+    """Secondary indexes over the gallery cards for filtering and search.
+
+    Cards are indexed by type, category and badge (value -> set of ids) and
+    by the words in their title and spec values (word -> set of ids). Each
+    card also remembers its page position so results come back in page
+    order. Indexes are updated per card, never rebuilt.
+    """
+
+    FIELDS = ('type', 'category', 'badge')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.fields = {field: defaultdict(set) for field in self.FIELDS}
+        self.terms = defaultdict(set)
+        self.positions = {}
+        self._next_position = 0
+        self._sorted_terms = None
+
+    @staticmethod
+    def _field_values(data):
+        return {
+            'type': (data.get('type') or '').lower(),
+            'category': (data.get('category') or '').lower(),
+            'badge': (data.get('badge_text') or '').lower(),
+        }
+
+    @staticmethod
+    def _card_terms(data):
+        values = [spec['value'] for spec in data.get('specs', [])]
+        return set(search_tokens(' '.join([data.get('title') or ''] + values)))
+
+    def add(self, data):
+        """Index a card; a card that was indexed before keeps its position."""
+        computer_id = data['id']
+        if computer_id not in self.positions:
+            self.positions[computer_id] = self._next_position
+            self._next_position += 1
+
+        for field, value in self._field_values(data).items():
+            self.fields[field][value].add(computer_id)
+        for term in self._card_terms(data):
+            if term not in self.terms:
+                self._sorted_terms = None
+            self.terms[term].add(computer_id)
+
+    def remove(self, data, keep_position=False):
+        """Remove a card from the indexes."""
+        computer_id = data['id']
+        for field, value in self._field_values(data).items():
+            self._discard(self.fields[field], value, computer_id)
+        for term in self._card_terms(data):
+            if self._discard(self.terms, term, computer_id):
+                self._sorted_terms = None
+        if not keep_position:
+            self.positions.pop(computer_id, None)
+
+    def reorder(self, ids):
+        """Set the page order of the indexed cards."""
+        self.positions = {computer_id: i for i, computer_id in enumerate(ids)}
+        self._next_position = len(self.positions)
+
+    @staticmethod
+    def _discard(index, key, computer_id):
+        """Remove an id from index[key]; return True if the key was dropped."""
+        ids = index.get(key)
+        if ids is None:
+            return False
+        ids.discard(computer_id)
+        if not ids:
+            del index[key]
+            return True
+        return False
+
+    def values(self, field):
+        """Return the distinct values of a field, sorted."""
+        return sorted(value for value in self.fields[field] if value)
+
+    def _terms_with_prefix(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.terms)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def query(self, filters=None, text=''):
+        """Return the ids of the cards matching every filter, in page order.
+
+        Args:
+            filters: Mapping of field ('type', 'category' or 'badge') to a
+                value or a collection of values. Values of one field are ORed;
+                fields are ANDed. None, '' and 'all' mean no filter.
+            text: Free text; every word must prefix-match a word in the
+                card's title or spec values.
+        """
+        result = None
+        for field, wanted in (filters or {}).items():
+            if wanted in (None, '', 'all'):
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            index = self.fields[field]
+            ids = set().union(*(index.get(value.lower(), ()) for value in wanted))
+            result = ids if result is None else result & ids
+
+        for token in search_tokens(text or ''):
+            ids = set()
+            for term in self._terms_with_prefix(token):
+                ids |= self.terms[term]
+            result = ids if result is None else result & ids
+
+        if result is None:
+            result = self.positions.keys()
+        return sorted(result, key=self.positions.__getitem__)
@@ -0,0 +1,249 @@
+"""
+Gallery core for Computer Store Kansas Website
+Reading and editing the gallery cards in index.html without any GUI.
+
+Both the desktop app (gallery_gui.py) and the command line
+(python -m gallery_manager) are built on this module. It only needs
+BeautifulSoup; Pillow is imported when an image is actually decoded.
+
+The code lives in one module per concern, all importable from here:
+
+    gallery_cards      card markup: finding, parsing, rendering and checking cards
+    gallery_backups    atomic writes, the page lock, backup snapshots, card history
+    gallery_images     thumbnails, the image store, srcset copies, image gc
+    gallery_inventory  the card data in inventory.jsonl or inventory.db
+    gallery_git        git status, publish plans and the publisher
+    gallery_index      CardIndex and staged edits
+
+This module adds the bulk import, which draws on most of them.
+"""
+
+import csv
+import json
+from pathlib import Path
+
+from gallery_cards import (
+    BADGE_TEXT, CARD_IMAGE_SIZES, CATEGORIES, COMPUTER_ID_ATTR_RE, COMPUTER_TYPES, DIV_TAG_RE,
+    GALLERY_CARD_CLASS_RE, GRID_OPEN_RE, SEARCH_TOKEN_RE, CardFilterIndex, badge_text_for,
+    create_card_element, is_custom_card, next_computer_id, normalize_specs, parse_card,
+    scan_card_spans, search_tokens, set_card_image, update_card_element, validate_computer,
+)
+from gallery_backups import (
+    BACKUP_CHUNK_MASK, BACKUP_CHUNK_MAX, BACKUP_CHUNK_MIN, BACKUP_KEEP_DAILY, BACKUP_KEEP_LAST,
+    LEGACY_BACKUP_RE, LOCK_STALE_AGE, LOCK_TIMEOUT, BackupStore, CardJournal, FileLock,
+    backup_html, describe_change, page_lock, split_chunks, sync_directory, write_bytes_atomic,
+)
+from gallery_images import (
+    DATA_URI_RE, FORMAT_OPTIONS, FORMAT_TYPES, GALLERY_REF_RE, GC_MIN_AGE, GC_SKIP_DIRS,
+    IMAGE_EXTENSIONS, MAX_BYTES_PER_PIXEL, MAX_IMAGE_SIZE, MODERN_FORMATS, TEXT_ASSET_SUFFIXES,
+    VARIANT_WIDTHS, ImageIngestPool, ThumbnailCache, available_image_formats, card_image_source,
+    collect_garbage, content_name, decode_data_uri, ensure_variants, extract_inline_images,
+    file_content_name, file_sha256, format_report, gallery_references, gallery_src,
+    image_job_for, image_sources, image_src_for, image_srcset,
+    is_data_uri, is_gallery_image, is_web_ready, load_thumbnail, process_image,
+    remove_gallery_image, resolve_image_path, store_file, store_image, variant_ladder,
+    variant_path, write_variants,
+)
+from gallery_inventory import (
+    INVENTORY_DB_FILE, INVENTORY_FIELDS, INVENTORY_FILE, INVENTORY_SCHEMA, INVENTORY_VERSION,
+    LISTING_SORTS, PRICE_RE, InventoryDatabase, InventoryStore, open_inventory, price_cents,
+    same_card_fields, sort_by_price,
+)
+from gallery_git import (
+    DEFAULT_PUBLISH_MESSAGE, GIT_GALLERY_PATHS, GIT_IDLE_TIMEOUT, GIT_NOTHING_TO_COMMIT,
+    GIT_PROGRESS_RE, GIT_WATCH_PATHS, PUBLISH_MAX_PATHS, PUBLISH_STATE_FILE, GitPublisher,
+    GitService, PublishPlan, git_environment, publish_changes,
+)
+from gallery_index import CardIndex, StagedEdits
+
+__all__ = [
+    'BACKUP_CHUNK_MASK', 'BACKUP_CHUNK_MAX', 'BACKUP_CHUNK_MIN', 'BACKUP_KEEP_DAILY',
+    'BACKUP_KEEP_LAST', 'BADGE_TEXT', 'CARD_IMAGE_SIZES', 'CATEGORIES', 'COMPUTER_ID_ATTR_RE',
+    'COMPUTER_TYPES', 'DATA_URI_RE', 'DEFAULT_PUBLISH_MESSAGE', 'DEFAULT_WEBSITE_DIR',
+    'DIV_TAG_RE', 'FORMAT_OPTIONS', 'FORMAT_TYPES', 'GALLERY_CARD_CLASS_RE', 'GALLERY_REF_RE',
+    'GC_MIN_AGE', 'GC_SKIP_DIRS', 'GIT_GALLERY_PATHS', 'GIT_IDLE_TIMEOUT', 'GIT_NOTHING_TO_COMMIT',
+    'GIT_PROGRESS_RE', 'GIT_WATCH_PATHS', 'GRID_OPEN_RE', 'IMAGE_EXTENSIONS',
+    'INVENTORY_DB_FILE', 'INVENTORY_FIELDS', 'INVENTORY_FILE', 'INVENTORY_SCHEMA',
+    'INVENTORY_VERSION', 'LEGACY_BACKUP_RE', 'LISTING_SORTS', 'LOCK_STALE_AGE', 'LOCK_TIMEOUT',
+    'MANIFEST_FIELDS', 'MAX_BYTES_PER_PIXEL', 'MAX_IMAGE_SIZE', 'MODERN_FORMATS', 'PRICE_RE',
+    'PUBLISH_MAX_PATHS', 'PUBLISH_STATE_FILE', 'SEARCH_TOKEN_RE', 'TEXT_ASSET_SUFFIXES',
+    'VARIANT_WIDTHS',
+    'BackupStore', 'CardFilterIndex', 'CardIndex', 'CardJournal', 'FileLock', 'GitPublisher',
+    'GitService', 'ImageIngestPool', 'InventoryDatabase', 'InventoryStore', 'PublishPlan',
+    'StagedEdits', 'ThumbnailCache', 'apply_import', 'available_image_formats', 'backup_html',
+    'badge_text_for', 'card_image_source', 'collect_garbage', 'content_name',
+    'create_card_element', 'decode_data_uri', 'describe_change', 'ensure_variants',
+    'extract_inline_images', 'file_content_name', 'file_sha256', 'format_report',
+    'gallery_references', 'gallery_src',
+    'git_environment', 'image_job_for', 'image_sources', 'image_src_for', 'image_srcset',
+    'import_computers', 'is_custom_card', 'is_data_uri', 'is_gallery_image', 'is_web_ready',
+    'load_thumbnail', 'next_computer_id', 'normalize_specs', 'open_inventory', 'page_lock',
+    'parse_card', 'plan_import', 'price_cents', 'process_image', 'publish_changes',
+    'read_manifest', 'remove_gallery_image', 'resolve_image_path', 'same_card_fields',
+    'scan_card_spans', 'search_tokens', 'set_card_image', 'sort_by_price', 'split_chunks',
+    'store_file', 'store_image', 'sync_directory', 'update_card_element', 'validate_computer',
+    'variant_ladder', 'variant_path', 'write_bytes_atomic', 'write_variants',
+]
+
+# Local checkout of the website repository
+DEFAULT_WEBSITE_DIR = Path(r"C:\Users\Matthew\Documents\GitHub\Computer_Store_KS")
+
+# Manifest columns that are card fields; any other CSV column is a spec
+MANIFEST_FIELDS = ('id', 'type', 'category', 'title', 'price', 'image')
+
+
+def read_manifest(path):
+    """Read a CSV or JSON manifest of computers into a list of row dicts.
+
+    JSON holds a list of objects with the fields `list --json` prints. CSV
+    has one computer per row; columns other than MANIFEST_FIELDS become
+    specs, with the column header as the label.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        rows = []
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for record in csv.DictReader(f):
+                row = {'specs': []}
+                for column, value in record.items():
+                    if column is None:
+                        continue  # Values past the last header
+                    value = (value or '').strip()
+                    if column.strip().lower() in MANIFEST_FIELDS:
+                        row[column.strip().lower()] = value
+                    else:
+                        row['specs'].append({'label': column.strip(), 'value': value})
+                rows.append(row)
+        return rows
+
+    rows = json.loads(path.read_text(encoding='utf-8'))
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"{path.name} must contain a list of computers")
+    return rows
+
+
+def plan_import(card_index, rows, website_dir, base_dir=None):
+    """Validate manifest rows and work out the cards and images to add.
+
+    Every row is checked with validate_computer and rows without an id get
+    the next free one. Relative image paths are looked up in base_dir first.
+
+    Returns:
+        (pending, errors): pending is a list of (row number, computer data,
+        image job or None); errors is a list of (row number, error message).
+    """
+    website_dir = Path(website_dir)
+    base_dir = Path(base_dir) if base_dir else Path.cwd()
+
+    reserved = {str(row['id']).strip() for row in rows if str(row.get('id') or '').strip()}
+    taken = set(card_index.cards)
+    next_id = int(card_index.next_id())
+
+    pending, errors = [], []
+    for number, row in enumerate(rows, 1):
+        category = str(row.get('category') or 'refurbished').strip().lower()
+        data = {
+            'id': str(row.get('id') or '').strip(),
+            'type': str(row.get('type') or 'desktop').strip().lower(),
+            'category': category,
+            'title': str(row.get('title') or '').strip(),
+            'price': str(row.get('price') or '').strip(),
+            'image': str(row.get('image') or '').strip(),
+            'badge_text': badge_text_for(category),
+            'specs': normalize_specs(row.get('specs')),
+        }
+        if not data['id']:
+            while str(next_id) in taken or str(next_id) in reserved:
+                next_id += 1
+            data['id'] = str(next_id)
+
+        row_errors = validate_computer(data, require_image=True)
+        if data['type'] not in COMPUTER_TYPES:
+            row_errors.append(f"Unknown type: {data['type']}")
+        if data['category'] not in CATEGORIES:
+            row_errors.append(f"Unknown category: {data['category']}")
+        if data['id'] in taken:
+            row_errors.append(f"Computer ID {data['id']} already exists")
+
+        if row_errors:
+            errors.extend((number, error) for error in row_errors)
+            continue
+
+        image = data['image']
+        local_file = base_dir / image
+        if not is_gallery_image(website_dir, image) and local_file.is_file():
+            image = str(local_file)
+        try:
+            data['image'], job = image_job_for(website_dir, image)
+        except ValueError as e:
+            errors.append((number, str(e)))
+            continue
+        taken.add(data['id'])
+        pending.append((number, data, job))
+
+    return pending, errors
+
+
+def apply_import(card_index, pending, stored=None, failed=None, backup_dir=None):
+    """Add planned cards with one backup and a single write of index.html.
+
+    stored and failed are what ImageIngestPool.run returned for the image
+    jobs; rows whose image failed are skipped.
+
+    Returns:
+        (list of added computers, list of (row number, error message))
+    """
+    stored, failed = stored or {}, failed or {}
+    added, errors = [], []
+    ready = []
+    for number, data, job in pending:
+        if job and str(job[0]) not in stored:
+            error = failed.get(str(job[0]), "not processed")
+            errors.append((number, f"Failed to process image: {error}"))
+            continue
+        if job:
+            data['image'] = gallery_src(stored[str(job[0])])
+        if data['id'] in card_index.cards:
+            errors.append((number, f"Computer ID {data['id']} already exists"))
+        else:
+            ready.append(data)
+
+    if not ready:
+        return added, errors
+
+    if backup_dir:
+        backup_html(card_index.html_file, backup_dir)
+
+    with card_index.batch():
+        for data in ready:
+            card_index.add(data)
+            added.append(data)
+    return added, errors
+
+
+def import_computers(card_index, rows, website_dir, base_dir=None, backup_dir=None,
+                     ingest_pool=None, progress=None):
+    """Validate manifest rows and add them to the gallery as one batch.
+
+    Bad rows are reported and skipped. Photos are processed on ingest_pool
+    (a temporary ImageIngestPool if none is given) with progress(done, total)
+    called as each one finishes; then the cards are added by apply_import.
+
+    Returns:
+        (list of added computers, list of (row number, error message))
+    """
+    pending, errors = plan_import(card_index, rows, website_dir, base_dir)
+
+    stored, failed = {}, {}
+    jobs = list({str(job[0]): job for _, _, job in pending if job}.values())
+    if jobs:
+        pool = ingest_pool or ImageIngestPool(formats=card_index.image_formats)
+        try:
+            stored, failed = pool.run(jobs, progress)
+        finally:
+            if ingest_pool is None:
+                pool.shutdown()
+
+    added, apply_errors = apply_import(card_index, pending, stored, failed, backup_dir)
+    errors = sorted(errors + apply_errors, key=lambda error: error[0])
+    return added, errors
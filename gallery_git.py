@@ -0,0 +1,598 @@
+"""
+Gallery publishing for Computer Store Kansas Website
+Git for the website repository: the working tree status, what changed since
+the last publish, and the publisher that commits and pushes it.
+"""
+
+import subprocess
+import os
+import re
+import signal
+import hashlib
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from gallery_backups import write_bytes_atomic
+from gallery_images import file_sha256
+from gallery_inventory import INVENTORY_DB_FILE, INVENTORY_FILE, open_inventory
+
+# Paths of a site whose changes can change the status of its gallery files;
+# folders change mtime when a file is added to or removed from them
+GIT_WATCH_PATHS = ('.', 'index.html', INVENTORY_FILE, INVENTORY_DB_FILE,
+                   'assets/gallery', 'assets/gallery/variants')
+
+# The gallery files of a site, as given to GitService.pending
+GIT_GALLERY_PATHS = ('index.html', INVENTORY_FILE, INVENTORY_DB_FILE, 'assets/gallery/')
+
+# Snapshot of the site at the last successful publish, in the backups folder
+PUBLISH_STATE_FILE = "last_publish.json"
+
+# Past this many changed images, the whole gallery folder is staged instead
+# (keeps the git command line short)
+PUBLISH_MAX_PATHS = 100
+
+# Subject of a publish commit when the changed cards aren't known
+DEFAULT_PUBLISH_MESSAGE = "Update gallery via Gallery Manager"
+
+# A git step is stopped as hung after this many seconds without output; a
+# push of a large page can take minutes, but it keeps reporting progress
+GIT_IDLE_TIMEOUT = 120
+
+# Progress counters git prints while it works ("Writing objects:  45% (9/20)")
+GIT_PROGRESS_RE = re.compile(r'^[A-Za-z][\w ]*:\s+\d+% \(\d+/\d+\)')
+
+# What git says when a commit has nothing in it
+GIT_NOTHING_TO_COMMIT = ('nothing to commit', 'nothing added to commit', 'already up to date')
+
+
+def git_environment():
+    """Return the environment git is run with: no terminal to type a password
+    into, so a missing credential fails instead of waiting forever."""
+    return dict(os.environ, GIT_TERMINAL_PROMPT='0')
+
+
+class GitService:
+    """Runs git for one working tree, always with cwd= and never os.chdir.
+
+    status() runs `git status --porcelain=v2 --branch` and keeps the result
+    until something it depends on changes: git's index, HEAD and branch
+    refs, or one of the watched paths. Checking that is a few stat calls,
+    so the status can be polled freely; it can miss a file rewritten in
+    place, so anything acting on the status asks for status(refresh=True).
+    Object lookups go through long-lived `git cat-file` processes instead
+    of one process per query.
+    """
+
+    def __init__(self, work_dir, watch=GIT_WATCH_PATHS):
+        self.work_dir = Path(work_dir)
+        self.watch = [self.work_dir / path for path in watch]
+        self.git_dir = None
+        self.prefix = ''  # work_dir's path inside the repository, as status reports paths
+        self.process_count = 0  # git processes started, for benchmarks
+        self._status = None
+        self._status_key = None
+        self._batches = {}  # cat-file mode -> Popen
+        self._lock = threading.RLock()
+
+    def run(self, args, timeout=30):
+        """Run a git command to completion and return the CompletedProcess."""
+        self.process_count += 1
+        return subprocess.run(['git'] + list(args), cwd=self.work_dir, env=git_environment(),
+                              stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                              encoding='utf-8', errors='replace', timeout=timeout)
+
+    def _find_git_dir(self):
+        if self.git_dir is None:
+            result = self.run(['rev-parse', '--absolute-git-dir', '--show-prefix'])
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or "Not a git repository")
+            git_dir, _, prefix = result.stdout.partition('\n')
+            self.git_dir, self.prefix = Path(git_dir), prefix.strip()
+        return self.git_dir
+
+    def _status_signature(self):
+        git_dir = self._find_git_dir()
+        paths = [git_dir / 'index', git_dir / 'HEAD', git_dir / 'packed-refs']
+        if self._status:
+            if self._status['branch']:
+                paths.append(git_dir / 'refs' / 'heads' / self._status['branch'])
+            if self._status['upstream']:
+                paths.append(git_dir / 'refs' / 'remotes' / self._status['upstream'])
+        signature = []
+        for path in paths + self.watch:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def status(self, refresh=False):
+        """Return the working tree status, from the cache while nothing changed.
+
+        Returns:
+            Dict with 'branch' (None when detached), 'upstream', 'ahead',
+            'behind' and 'changes': (code, path) pairs where code is git's
+            two-letter XY ('.M', 'A.', 'D.') or '??' for untracked files.
+        """
+        with self._lock:
+            if (not refresh and self._status is not None
+                    and self._status_signature() == self._status_key):
+                return self._status
+            # Taken before the run, so a change made while git status runs
+            # shows up as a change next time instead of being missed
+            key = self._status_signature()
+            # Without optional locks a poll never holds index.lock while a
+            # publish runs git add or commit. Every untracked file is listed,
+            # not just a new folder, so pending() matches the exact paths a
+            # PublishPlan names
+            result = self.run(['--no-optional-locks', 'status', '--porcelain=v2', '--branch',
+                               '--untracked-files=all', '-z'])
+            if result.returncode != 0:
+                raise RuntimeError(f"Git command failed: {result.stderr.strip()}")
+            self._status = self._parse_status(result.stdout)
+            self._status_key = key
+            return self._status
+
+    @staticmethod
+    def _parse_status(output):
+        status = {'branch': None, 'upstream': None, 'ahead': 0, 'behind': 0, 'changes': []}
+        records = iter(output.split('\0'))
+        for record in records:
+            if record.startswith('# branch.head '):
+                head = record[len('# branch.head '):]
+                status['branch'] = None if head == '(detached)' else head
+            elif record.startswith('# branch.upstream '):
+                status['upstream'] = record[len('# branch.upstream '):]
+            elif record.startswith('# branch.ab '):
+                ahead, behind = record[len('# branch.ab '):].split()
+                status['ahead'], status['behind'] = int(ahead), -int(behind)
+            elif record.startswith('1 '):
+                fields = record.split(' ', 8)
+                status['changes'].append((fields[1], fields[8]))
+            elif record.startswith('2 '):
+                fields = record.split(' ', 9)
+                status['changes'].append((fields[1], fields[9]))
+                next(records, None)  # The path it was renamed from
+            elif record.startswith('u '):
+                fields = record.split(' ', 10)
+                status['changes'].append((fields[1], fields[10]))
+            elif record.startswith('? '):
+                status['changes'].append(('??', record[2:]))
+        return status
+
+    def _batch(self, mode):
+        process = self._batches.get(mode)
+        if process is None or process.poll() is not None:
+            self.process_count += 1
+            process = subprocess.Popen(['git', 'cat-file', mode], cwd=self.work_dir,
+                                       env=git_environment(), stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            self._batches[mode] = process
+        return process
+
+    def _ask(self, mode, spec):
+        """Send one object name to a cat-file session and return its header fields."""
+        if '\n' in spec:
+            raise ValueError(f"Invalid object name: {spec!r}")
+        process = self._batch(mode)
+        try:
+            process.stdin.write(spec.encode('utf-8') + b'\n')
+            process.stdin.flush()
+            header = process.stdout.readline().decode('utf-8', 'replace').split()
+        except OSError:
+            header = []
+        if not header:
+            self._batches.pop(mode, None)
+            raise RuntimeError("git cat-file stopped")
+        if header[-1] in ('missing', 'ambiguous'):
+            return process, None
+        return process, header
+
+    def object_info(self, spec):
+        """Return (object id, type, size) for e.g. "HEAD" or "HEAD:./index.html", or None."""
+        with self._lock:
+            _, header = self._ask('--batch-check', spec)
+            return (header[0], header[1], int(header[2])) if header else None
+
+    def read_object(self, spec):
+        """Return (type, contents) of an object, or None if there is no such object."""
+        with self._lock:
+            process, header = self._ask('--batch', spec)
+            if not header:
+                return None
+            data = process.stdout.read(int(header[2]))
+            process.stdout.read(1)  # Newline after the contents
+            return header[1], data
+
+    def last_commit(self, spec='HEAD'):
+        """Return the subject of a commit, or None (e.g. before the first commit)."""
+        found = self.read_object(spec)
+        if not found or found[0] != 'commit':
+            return None
+        _, _, message = found[1].partition(b'\n\n')
+        return message.decode('utf-8', 'replace').split('\n')[0]
+
+    def is_pushed(self, remote='origin'):
+        """Return True if the remote's copy of the branch is at HEAD (as of the last fetch)."""
+        status = self.status()
+        if status['upstream']:
+            return not status['ahead']
+        head = self.object_info('HEAD')
+        pushed = status['branch'] and self.object_info(f"refs/remotes/{remote}/{status['branch']}")
+        return bool(head and pushed and head[0] == pushed[0])
+
+    def pending(self, paths):
+        """Return the status changes under paths (files or folders ending in "/")."""
+        changes = self.status()['changes']
+        paths = [self.prefix + path for path in paths]
+
+        def under(path):
+            return any(path == p or (p.endswith('/') and path.startswith(p)) for p in paths)
+        return [(code, path) for code, path in changes if under(path)]
+
+    def close(self):
+        """Stop the cat-file sessions."""
+        with self._lock:
+            for process in self._batches.values():
+                try:
+                    process.stdin.close()
+                    process.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    process.kill()
+            self._batches.clear()
+
+
+class PublishPlan:
+    """What a publish has to commit, worked out against the last publish.
+
+    A successful publish saves a snapshot of the site: the SHA-256 of
+    index.html and the inventory, each card's data fingerprint and title,
+    and the size and mtime of every file under assets/gallery/. Comparing
+    the site with it needs no git, so an unchanged gallery costs no git
+    process at all, and only the files that changed are staged.
+    """
+
+    def __init__(self, card_index, state_file):
+        self.card_index = card_index
+        self.state_file = Path(state_file)
+        self.website_dir = card_index.html_file.parent
+        self.added, self.updated, self.removed = [], [], []  # (id, title)
+        self.snapshot = self._take_snapshot()
+        self.previous = self._read_state()
+        self.paths = self._changed_paths()
+
+    @property
+    def changed(self):
+        return bool(self.paths)
+
+    def _read_state(self):
+        try:
+            return json.loads(self.state_file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            print(f"Error reading {self.state_file.name}: {e}")
+            return None
+
+    def _take_snapshot(self):
+        if self.card_index.is_stale():
+            self.card_index.load()
+        files = {'index.html': file_sha256(self.card_index.html_file)}
+        inventory = self.card_index.inventory
+        if inventory is not None and inventory.exists:
+            files[inventory.path.name] = file_sha256(inventory.path)
+
+        images = {}
+        gallery_dir = self.website_dir / "assets" / "gallery"
+        for root, _, names in os.walk(gallery_dir):
+            for name in names:
+                path = Path(root) / name
+                stat = path.stat()
+                images[path.relative_to(self.website_dir).as_posix()] = [stat.st_size,
+                                                                         stat.st_mtime_ns]
+
+        cards = {}
+        for data in self.card_index.computers():
+            fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8'))
+            cards[data['id']] = [fingerprint.hexdigest()[:16], data['title']]
+        return {'time': datetime.now().isoformat(timespec='seconds'),
+                'files': files, 'images': images, 'cards': cards}
+
+    def _changed_paths(self):
+        if self.previous is None:
+            # First publish from this copy: stage the lot, as before
+            paths = list(self.snapshot['files']) + ['assets/gallery/']
+            return [path for path in paths if (self.website_dir / path).exists()]
+
+        paths = []
+        for key in ('files', 'images'):
+            now, before = self.snapshot[key], self.previous.get(key, {})
+            paths += sorted(path for path in now.keys() | before.keys()
+                            if now.get(path) != before.get(path))
+        images = [path for path in paths if path.startswith('assets/gallery/')]
+        if len(images) > PUBLISH_MAX_PATHS:
+            paths = [path for path in paths if path not in images] + ['assets/gallery/']
+
+        now, before = self.snapshot['cards'], self.previous.get('cards', {})
+        for computer_id, (fingerprint, title) in now.items():
+            if computer_id not in before:
+                self.added.append((computer_id, title))
+            elif before[computer_id][0] != fingerprint:
+                self.updated.append((computer_id, title))
+        self.removed = [(computer_id, before[computer_id][1])
+                        for computer_id in before if computer_id not in now]
+        return paths
+
+    def message(self, subject=None):
+        """Return a commit message naming the cards added, updated and removed."""
+        changes = [(verb, cards) for verb, cards in (("Add", self.added),
+                                                     ("Update", self.updated),
+                                                     ("Remove", self.removed)) if cards]
+        if not subject:
+            if self.previous is None:
+                subject = DEFAULT_PUBLISH_MESSAGE
+            elif not changes:
+                only_images = all(path.startswith('assets/gallery/') for path in self.paths)
+                subject = "Update gallery images" if only_images else "Update gallery page"
+            else:
+                subject = "Gallery: " + "; ".join(
+                    f"{verb.lower()} {', '.join(title for _, title in cards)}"
+                    for verb, cards in changes)
+                if len(subject) > 72:
+                    subject = "Gallery: " + ", ".join(
+                        f"{verb.lower()} {len(cards)}" for verb, cards in changes) + " cards"
+
+        lines = [subject]
+        for verb, cards in changes:
+            lines.append("")
+            lines.append(f"{verb.rstrip('e')}ed:")
+            lines += [f"- #{computer_id} {title}" for computer_id, title in cards]
+        return "\n".join(lines)
+
+    def summary(self):
+        """Return e.g. "2 added, 1 removed, 3 files" for a confirmation prompt."""
+        counts = [f"{len(cards)} {verb}" for verb, cards in (("added", self.added),
+                                                             ("updated", self.updated),
+                                                             ("removed", self.removed)) if cards]
+        return ", ".join(counts + [f"{len(self.paths)} file(s)"])
+
+    def save(self):
+        """Record the site as published."""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.state_file, json.dumps(self.snapshot, indent=1).encode('utf-8'))
+
+
+class GitPublisher:
+    """Runs the git steps of a publish on a worker thread, streaming their output.
+
+    Everything git prints (stdout and stderr together) is put on `events`
+    line by line while the step runs, for the caller to show from its own
+    thread:
+
+        ('step', description, command)
+        ('output', line)
+        ('progress', line)            a progress counter, replacing the one before
+        ('step-done', description, seconds, returncode)
+        ('finished', status, error)   status is 'done', 'failed' or 'cancelled'
+
+    With paths (from a PublishPlan) exactly those are staged and committed;
+    without, index.html, the inventory and assets/gallery/ are. With a
+    GitService, the branch and whether there is anything to commit or push
+    come from its status, and steps with nothing to do are skipped.
+    cancel() stops the git process that is running and skips the rest.
+    """
+
+    def __init__(self, website_dir, message=DEFAULT_PUBLISH_MESSAGE, paths=None,
+                 idle_timeout=GIT_IDLE_TIMEOUT, git=None):
+        self.website_dir = Path(website_dir)
+        self.message = message
+        self.paths = paths
+        self.git = git
+        self.idle_timeout = idle_timeout
+        self.events = queue.Queue()
+        self.timings = []  # (description, seconds) per finished step
+        self._cancelled = threading.Event()
+        self._process = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="git-publish", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop the running git command and skip the remaining steps."""
+        self._cancelled.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            self._stop(process)
+
+    @staticmethod
+    def _stop(process):
+        """Stop a git process with the helpers it started (ssh, pack-objects).
+
+        Those hold the output pipe open, so stopping git alone isn't enough.
+        """
+        try:
+            if os.name == 'nt':
+                subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                               capture_output=True, timeout=10)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except (OSError, subprocess.SubprocessError):
+            process.kill()
+
+    def steps(self, branch):
+        """Return the (command, description) steps of a publish to branch."""
+        if self.paths is not None:
+            return [
+                (['git', 'add', '-A', '--'] + self.paths,
+                 f"Adding {len(self.paths)} changed file(s)..."),
+                (['git', 'commit', '-m', self.message, '--'] + self.paths, "Creating commit..."),
+                (['git', 'push', '--progress', 'origin', branch], f"Pushing to {branch}..."),
+            ]
+        descriptions = {'index.html': "Adding index.html...",
+                        'assets/gallery/': "Adding gallery images..."}
+        steps = [(['git', 'add', path], descriptions.get(path, "Adding inventory..."))
+                 for path in self.publish_paths()]
+        return steps + [
+            (['git', 'commit', '-m', self.message], "Creating commit..."),
+            (['git', 'push', '--progress', 'origin', branch], f"Pushing to {branch}..."),
+        ]
+
+    def publish_paths(self):
+        """Return the paths this publish stages and commits."""
+        if self.paths is not None:
+            return self.paths
+        inventory = open_inventory(self.website_dir)
+        return ['index.html'] + ([inventory.path.name] if inventory.exists else []) + [
+            'assets/gallery/']
+
+    def timing_summary(self):
+        return ", ".join(f"{description.rstrip('.')} {seconds:.1f}s"
+                         for description, seconds in self.timings)
+
+    def _run(self):
+        try:
+            if self.git is not None:
+                steps = self._checked_steps()
+            else:
+                returncode, output = self._run_step(['git', 'branch', '--show-current'],
+                                                    "Checking branch...")
+                if returncode != 0:
+                    raise RuntimeError(f"Git command failed: {output.strip()}")
+                steps = self.steps(output.strip())
+
+            for cmd, description in steps:
+                if self.cancelled:
+                    break
+                returncode, output = self._run_step(cmd, description)
+                if returncode == 0 or self.cancelled:
+                    continue
+                # "nothing to commit" and "already up to date" aren't errors
+                if any(phrase in output.lower() for phrase in GIT_NOTHING_TO_COMMIT):
+                    self.events.put(('output', "→ No changes to commit"))
+                else:
+                    raise RuntimeError(f"Git command failed: {output.strip()}")
+        except Exception as e:
+            self.events.put(('finished', 'failed', e))
+        else:
+            self.events.put(('finished', 'cancelled' if self.cancelled else 'done', None))
+
+    def _checked_steps(self):
+        """Return the steps still needed, going by a fresh git status."""
+        # Never the cached status: a skipped change would be saved as published
+        status = self.git.status(refresh=True)
+        if not status['branch']:
+            raise RuntimeError("Not on a branch; check out the branch to publish to first")
+        *commit_steps, push_step = self.steps(status['branch'])
+        if not self.git.pending(self.publish_paths()):
+            self.events.put(('output', "→ No changes to commit"))
+            commit_steps = []
+            if self.git.is_pushed():
+                self.events.put(('output', "→ Already pushed"))
+                return []
+        if status['behind']:
+            self.events.put(('output', f"Warning: {status['upstream']} has {status['behind']} "
+                                       "commit(s) this copy doesn't; the push may be rejected"))
+        return commit_steps + [push_step]
+
+    def _run_step(self, cmd, description):
+        """Run one git command, streaming its output; return (returncode, output)."""
+        self.events.put(('step', description, cmd))
+        start = time.perf_counter()
+        env = git_environment()
+        # In a process group of its own, so cancel() can stop all of it
+        group = ({'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == 'nt'
+                 else {'start_new_session': True})
+        process = subprocess.Popen(cmd, cwd=self.website_dir, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, text=True,
+                                   encoding='utf-8', errors='replace', **group)
+        self._process = process
+        lines = []
+        last_output = [time.monotonic()]
+
+        def read():
+            # Universal newlines split push progress ("\r") into lines too
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                last_output[0] = time.monotonic()
+                if GIT_PROGRESS_RE.match(line) and not line.endswith('done.'):
+                    self.events.put(('progress', line))
+                    continue
+                lines.append(line)
+                self.events.put(('output', line))
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        hung = False
+        while True:
+            try:
+                process.wait(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if self.cancelled:
+                    self._stop(process)
+                elif time.monotonic() - last_output[0] > self.idle_timeout:
+                    hung = True
+                    self._stop(process)
+        reader.join(timeout=5)
+        self._process = None
+
+        seconds = time.perf_counter() - start
+        self.timings.append((description, seconds))
+        self.events.put(('step-done', description, seconds, process.returncode))
+        if hung:
+            raise subprocess.TimeoutExpired(cmd, self.idle_timeout)
+        return process.returncode, '\n'.join(lines)
+
+
+def publish_changes(website_dir, message=DEFAULT_PUBLISH_MESSAGE, log=print, paths=None,
+                    git=None):
+    """Commit index.html, the inventory and the gallery images and push them.
+
+    Runs a GitPublisher (staging only paths, if given; see GitPublisher for
+    git) and reports its output line by line through log.
+    Raises RuntimeError when a git command fails, subprocess.TimeoutExpired
+    when one hangs and KeyboardInterrupt when interrupted (after stopping git).
+    """
+    publisher = GitPublisher(website_dir, message, paths, git=git)
+    publisher.start()
+    interrupted = False
+    while True:
+        try:
+            event = publisher.events.get()
+        except KeyboardInterrupt:
+            publisher.cancel()
+            interrupted = True
+            continue
+
+        kind = event[0]
+        if kind == 'step':
+            log(f"\n{event[1]}")
+            # Only the subject of a multi-line commit message
+            log("Command: " + ' '.join(arg.split('\n')[0] + (" ..." if '\n' in arg else "")
+                                       for arg in event[2]))
+        elif kind == 'output':
+            log(event[1])
+        elif kind == 'finished':
+            if publisher.timings:
+                log(f"\nTimings: {publisher.timing_summary()}")
+            if event[1] == 'failed':
+                raise event[2]
+            if interrupted:
+                raise KeyboardInterrupt
+            return
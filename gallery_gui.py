@@ -0,0 +1,1797 @@
+"""
+Gallery Manager GUI for Computer Store Kansas Website
+The CustomTkinter desktop app. Card parsing, editing and image handling
+live in gallery_core.py.
+"""
+
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from PIL import Image
+import subprocess
+import os
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import queue
+
+from gallery_core import (
+    DEFAULT_WEBSITE_DIR, GIT_GALLERY_PATHS, PUBLISH_STATE_FILE, BackupStore,
+    CardIndex, CardJournal, GitPublisher, GitService, ImageIngestPool, PublishPlan, StagedEdits,
+    ThumbnailCache,
+    apply_import, available_image_formats, backup_html, badge_text_for, collect_garbage,
+    create_card_element, describe_change, extract_inline_images, gallery_src, image_job_for,
+    is_data_uri, normalize_specs, open_inventory, parse_card, plan_import, price_cents,
+    read_manifest, remove_gallery_image, resolve_image_path, sort_by_price,
+    validate_computer,
+)
+
+# Size of the list row thumbnails and how often finished ones are collected
+LIST_THUMB_SIZE = (60, 60)
+THUMBNAIL_POLL_MS = 30
+
+# How often output of a running publish is collected
+PUBLISH_POLL_MS = 50
+
+# How often the Git status line is refreshed (cached between gallery changes),
+# and how often a status being read on the worker thread is checked for
+GIT_STATUS_POLL_MS = 2000
+GIT_RESULT_POLL_MS = 50
+# How often progress of uploaded photos being processed is checked
+INGEST_POLL_MS = 100
+
+# Badge filter entry that matches every card
+ALL_BADGES = "All badges"
+
+# List orders offered next to the price range, and their sort_by_price names
+PAGE_ORDER = "Page order"
+SORT_ORDERS = {PAGE_ORDER: 'page', "Price: low to high": 'price',
+               "Price: high to low": 'price-desc'}
+
+# Delay before a search is run while the user is still typing
+SEARCH_DELAY_MS = 150
+
+# Height of one row in the computer list, including the gap below it
+LIST_ROW_HEIGHT = 80
+LIST_ROW_GAP = 10
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only creates widgets for the rows on screen.
+
+    A pool of row widgets, just large enough to fill the viewport, is
+    positioned with place() and rebound to whichever items are visible as the
+    list scrolls. Scrolling and refreshing reconfigure existing rows instead
+    of destroying and recreating them, so the cost does not grow with the
+    number of items.
+
+    Refreshes are reconciled by item identity: a row already showing an item
+    is only moved, and bind_row runs just for items that are new or were
+    replaced, so a single-card edit rebinds a single row.
+
+    Args:
+        create_row: Called as create_row(parent) to build one pooled row.
+        bind_row: Called as bind_row(row, item) to show an item in a row.
+        empty_text: Message shown when there are no items.
+    """
+
+    def __init__(self, master, create_row, bind_row, row_height=LIST_ROW_HEIGHT,
+                 empty_text="", **kwargs):
+        super().__init__(master, **kwargs)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+        self.items = []
+        self.offset = 0
+        self.rows = []
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.empty_label = ctk.CTkLabel(self.viewport, text=empty_text,
+                                        font=ctk.CTkFont(size=12, slant="italic"))
+
+        self.viewport.bind("<Configure>", lambda e: self.layout())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_all(sequence, self.on_mousewheel, add="+")
+
+    def set_items(self, items, keep_offset=True):
+        """Show a new list of items, optionally keeping the scroll position."""
+        self.items = list(items)
+        if not keep_offset:
+            self.offset = 0
+        self.layout()
+
+    def visible_range(self):
+        """Return the (first, last) item indexes currently on screen."""
+        first = self.offset // self.row_height
+        last = min(len(self.items), first + len(self.rows))
+        return first, last
+
+    def scroll_to(self, offset):
+        """Scroll so that `offset` pixels of the list are above the viewport."""
+        self.offset = offset
+        self.layout()
+
+    def viewport_height(self):
+        """Viewport height in unscaled units, the same units place() takes."""
+        scaling = ctk.ScalingTracker.get_widget_scaling(self)
+        return max(int(self.viewport.winfo_height() / scaling), 1)
+
+    def scroll_to_index(self, index):
+        """Scroll the minimum amount needed to show the item at `index`."""
+        top = index * self.row_height
+        height = self.viewport_height()
+        if top < self.offset:
+            self.scroll_to(top)
+        elif top + self.row_height > self.offset + height:
+            self.scroll_to(top + self.row_height - height)
+
+    def layout(self):
+        """Position the pooled rows for the current scroll offset."""
+        height = self.viewport_height()
+        total = len(self.items) * self.row_height
+        self.offset = max(0, min(self.offset, total - height))
+
+        # Grow the pool to cover the viewport plus one partially visible row
+        needed = height // self.row_height + 2
+        while len(self.rows) < needed:
+            row = self.create_row(self.viewport)
+            row.item = None
+            row.slot = None
+            self.rows.append(row)
+
+        first = self.offset // self.row_height
+        shift = self.offset % self.row_height
+        visible = self.items[first:first + needed]
+
+        # Keep rows that already show a visible item; the rest are free
+        bound = {id(row.item): row for row in self.rows if row.item is not None}
+        placed = [bound.pop(id(item), None) for item in visible]
+        free = list(bound.values()) + [row for row in self.rows if row.item is None]
+
+        for i, (item, row) in enumerate(zip(visible, placed)):
+            if row is None:
+                row = free.pop()
+                self.bind_row(row, item)
+                row.item = item
+            if row.slot != (i, shift):
+                row.place(x=0, y=i * self.row_height - shift, relwidth=1.0)
+                row.slot = (i, shift)
+
+        for row in free:
+            if row.item is not None:
+                row.place_forget()
+                row.item = None
+                row.slot = None
+
+        if self.items:
+            self.empty_label.place_forget()
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + height) / total))
+        else:
+            self.empty_label.place(relx=0.5, y=20, anchor="n")
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scrollbar(self, action, value, unit=None):
+        """Handle scrollbar drags ('moveto') and arrow/page clicks ('scroll')."""
+        total = len(self.items) * self.row_height
+        if action == "moveto":
+            self.scroll_to(int(float(value) * total))
+        elif action == "scroll":
+            step = self.viewport_height() if unit == "pages" else self.row_height
+            self.scroll_to(self.offset + int(value) * step)
+
+    def on_mousewheel(self, event):
+        """Scroll by one row when the wheel turns over this list."""
+        if not str(event.widget).startswith(str(self)):
+            return
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            direction = -1
+        else:
+            direction = 1
+        self.scroll_to(self.offset + direction * self.row_height)
+
+
+class GalleryManager(ctk.CTk):
+    def __init__(self, website_dir=DEFAULT_WEBSITE_DIR, image_formats=()):
+        super().__init__()
+
+        # Configure window
+        self.title("Computer Store Kansas - Gallery Manager")
+        self.geometry("1400x900")
+
+        # Set color theme
+        ctk.set_appearance_mode("dark")
+        ctk.set_default_color_theme("blue")
+
+        # File paths
+        self.website_dir = Path(website_dir)
+        self.html_file = self.website_dir / "index.html"
+        self.gallery_dir = self.website_dir / "assets" / "gallery"
+        self.backup_dir = self.website_dir / "backups"
+        self.thumbnail_cache = ThumbnailCache(self.website_dir,
+                                              self.website_dir / ".cache" / "thumbs")
+
+        # Thumbnails for list rows are decoded on a worker pool and handed
+        # back to the Tk thread through a queue drained by after()
+        self.image_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                             thread_name_prefix="thumbnails")
+        self.thumbnail_results = queue.Queue()
+        blank = Image.new('RGBA', LIST_THUMB_SIZE, (0, 0, 0, 0))
+        self.placeholder_thumb = ctk.CTkImage(light_image=blank, dark_image=blank,
+                                              size=LIST_THUMB_SIZE)
+
+        # One git service answers status polls and object lookups from a cache
+        # and long-lived git processes, and is shared with publishing. Status
+        # is read on a worker thread so a slow git never blocks the window,
+        # and the poll is paused while a publish runs
+        self.git = GitService(self.website_dir)
+        self.git_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="git-status")
+        self.publisher = None  # The GitPublisher of the last publish
+
+        # Uploaded photos are resized and encoded in worker processes
+        self.ingest_pool = ImageIngestPool(formats=available_image_formats(image_formats))
+
+        # Ensure directories exist
+        self.gallery_dir.mkdir(parents=True, exist_ok=True)
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+
+        # Data storage
+        # 'splice' rewrites only the changed card; 'prettify' re-serializes the page
+        self.write_mode = "splice"
+        # Every card change is journaled, for undo/redo (shared with the CLI)
+        self.card_journal = CardJournal(self.backup_dir / "journal.jsonl")
+        # Card data is read from the inventory (inventory.jsonl or inventory.db);
+        # the page grid is generated from it
+        self.card_index = CardIndex(self.html_file, write_mode=self.write_mode,
+                                    image_formats=self.ingest_pool.formats,
+                                    journal=self.card_journal,
+                                    inventory=open_inventory(self.website_dir))
+        self.computers = []
+        # Edits made while staging is on wait here for "Apply All"
+        self.staged = StagedEdits()
+        self.current_selection = None
+        self.current_image_path = None
+        self.last_filter = None
+
+        # Create UI
+        self.create_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.bind("<Control-z>", self.undo)
+        self.bind("<Control-y>", self.redo)
+        self.bind("<Control-Shift-Z>", self.redo)
+
+        # Load data
+        self.load_computers()
+        self.after(THUMBNAIL_POLL_MS, self.poll_thumbnails)
+        self.after(GIT_STATUS_POLL_MS, self.poll_git_status)
+
+    def create_ui(self):
+        """Create the main user interface."""
+        # Create main layout - 3 columns
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Left panel - Computer list
+        self.create_left_panel()
+
+        # Middle panel - Preview
+        self.create_middle_panel()
+
+        # Right panel - Edit controls
+        self.create_right_panel()
+
+        # Bottom status bar
+        self.create_status_bar()
+
+    def create_left_panel(self):
+        """Create the left panel with computer list."""
+        left_frame = ctk.CTkFrame(self, width=300)
+        left_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        left_frame.grid_propagate(False)
+
+        # Title
+        title = ctk.CTkLabel(left_frame, text="Gallery Computers",
+                            font=ctk.CTkFont(size=20, weight="bold"))
+        title.pack(pady=10, padx=10)
+
+        # Filter buttons
+        filter_frame = ctk.CTkFrame(left_frame)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+
+        # Type and category filters combine (e.g. Desktop AND Refurb)
+        self.type_filter_var = ctk.StringVar(value="all")
+        self.category_filter_var = ctk.StringVar(value="all")
+
+        filter_rows = [
+            (self.type_filter_var, [
+                ("All", "all"),
+                ("Desktop", "desktop"),
+                ("Laptop", "laptop")
+            ]),
+            (self.category_filter_var, [
+                ("All", "all"),
+                ("Custom", "custom"),
+                ("New", "new"),
+                ("Refurb", "refurbished")
+            ]),
+        ]
+
+        for row, (variable, filters) in enumerate(filter_rows):
+            for column, (label, value) in enumerate(filters):
+                btn = ctk.CTkRadioButton(filter_frame, text=label, width=60,
+                                        variable=variable, value=value,
+                                        command=self.apply_filter)
+                btn.grid(row=row, column=column, padx=5, pady=2, sticky="w")
+
+        self.badge_filter_var = ctk.StringVar(value=ALL_BADGES)
+        self.badge_menu = ctk.CTkOptionMenu(filter_frame, values=[ALL_BADGES],
+                                            variable=self.badge_filter_var,
+                                            command=lambda value: self.apply_filter())
+        self.badge_menu.grid(row=len(filter_rows), column=0, columnspan=4,
+                             padx=5, pady=(5, 2), sticky="ew")
+
+        # Price range and order; prices are compared in cents
+        price_frame = ctk.CTkFrame(filter_frame, fg_color="transparent")
+        price_frame.grid(row=len(filter_rows) + 1, column=0, columnspan=4,
+                         padx=5, pady=2, sticky="ew")
+        self.price_min_entry = ctk.CTkEntry(price_frame, width=60, placeholder_text="Min $")
+        self.price_min_entry.pack(side="left", padx=(0, 2))
+        self.price_max_entry = ctk.CTkEntry(price_frame, width=60, placeholder_text="Max $")
+        self.price_max_entry.pack(side="left", padx=2)
+        for entry in (self.price_min_entry, self.price_max_entry):
+            entry.bind("<KeyRelease>", self.on_search_changed)
+        self.sort_var = ctk.StringVar(value=PAGE_ORDER)
+        sort_menu = ctk.CTkOptionMenu(price_frame, values=list(SORT_ORDERS),
+                                      variable=self.sort_var,
+                                      command=lambda value: self.apply_filter())
+        sort_menu.pack(side="left", fill="x", expand=True, padx=(2, 0))
+
+        # Free-text search over titles and spec values
+        self.search_entry = ctk.CTkEntry(left_frame,
+                                         placeholder_text="Search title or specs...")
+        self.search_entry.pack(fill="x", padx=10, pady=5)
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self.search_job = None
+
+        # Scrollable list; only the rows on screen exist as widgets
+        self.list_view = VirtualList(left_frame, self.create_list_row, self.bind_list_row,
+                                     empty_text="No computers match filter")
+        self.list_view.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # Action buttons
+        action_frame = ctk.CTkFrame(left_frame)
+        action_frame.pack(fill="x", padx=10, pady=10)
+
+        btn_add = ctk.CTkButton(action_frame, text="Add New",
+                               command=self.add_computer,
+                               fg_color="green", hover_color="darkgreen")
+        btn_add.pack(fill="x", pady=2)
+
+        btn_edit = ctk.CTkButton(action_frame, text="Edit Selected",
+                                command=self.edit_computer)
+        btn_edit.pack(fill="x", pady=2)
+
+        btn_delete = ctk.CTkButton(action_frame, text="Delete Selected",
+                                  command=self.delete_computer,
+                                  fg_color="red", hover_color="darkred")
+        btn_delete.pack(fill="x", pady=2)
+
+        history_frame = ctk.CTkFrame(action_frame, fg_color="transparent")
+        history_frame.pack(fill="x", pady=2)
+        btn_undo = ctk.CTkButton(history_frame, text="Undo", width=100, command=self.undo)
+        btn_undo.pack(side="left", expand=True, fill="x", padx=(0, 2))
+        btn_redo = ctk.CTkButton(history_frame, text="Redo", width=100, command=self.redo)
+        btn_redo.pack(side="left", expand=True, fill="x", padx=(2, 0))
+
+        # Staged editing: changes pile up and are written together
+        stage_frame = ctk.CTkFrame(left_frame)
+        stage_frame.pack(fill="x", padx=10, pady=(0, 10))
+
+        self.stage_var = ctk.BooleanVar(value=False)
+        stage_check = ctk.CTkCheckBox(stage_frame, text="Stage edits, apply together",
+                                      variable=self.stage_var, command=self.toggle_staging)
+        stage_check.pack(fill="x", pady=2)
+
+        self.publish_after_apply_var = ctk.BooleanVar(value=False)
+        publish_check = ctk.CTkCheckBox(stage_frame, text="Publish after applying",
+                                        variable=self.publish_after_apply_var)
+        publish_check.pack(fill="x", pady=2)
+
+        apply_frame = ctk.CTkFrame(stage_frame, fg_color="transparent")
+        apply_frame.pack(fill="x", pady=2)
+        self.btn_apply = ctk.CTkButton(apply_frame, text="Apply All", width=100,
+                                       command=self.apply_staged, state="disabled")
+        self.btn_apply.pack(side="left", expand=True, fill="x", padx=(0, 2))
+        self.btn_discard = ctk.CTkButton(apply_frame, text="Discard", width=100,
+                                         command=self.discard_staged, state="disabled",
+                                         fg_color="gray40", hover_color="gray30")
+        self.btn_discard.pack(side="left", expand=True, fill="x", padx=(2, 0))
+
+    def create_middle_panel(self):
+        """Create the middle panel with preview."""
+        middle_frame = ctk.CTkFrame(self)
+        middle_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
+
+        # Title
+        title = ctk.CTkLabel(middle_frame, text="Preview",
+                           font=ctk.CTkFont(size=20, weight="bold"))
+        title.pack(pady=10)
+
+        # Preview card frame
+        self.preview_frame = ctk.CTkFrame(middle_frame, fg_color="transparent")
+        self.preview_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # Preview content
+        self.preview_content = ctk.CTkLabel(self.preview_frame,
+                                           text="Select a computer to preview",
+                                           font=ctk.CTkFont(size=16))
+        self.preview_content.pack(expand=True)
+
+    def create_right_panel(self):
+        """Create the right panel with edit controls."""
+        right_frame = ctk.CTkFrame(self, width=350)
+        right_frame.grid(row=0, column=2, sticky="nsew", padx=10, pady=10)
+        right_frame.grid_propagate(False)
+
+        # Title
+        title = ctk.CTkLabel(right_frame, text="Git Actions",
+                           font=ctk.CTkFont(size=20, weight="bold"))
+        title.pack(pady=10)
+
+        # Git status
+        self.git_status_label = ctk.CTkLabel(right_frame, text="Git Status: Unknown",
+                                            font=ctk.CTkFont(size=12))
+        self.git_status_label.pack(pady=5)
+
+        # Git actions
+        git_frame = ctk.CTkFrame(right_frame)
+        git_frame.pack(fill="x", padx=10, pady=10)
+
+        btn_status = ctk.CTkButton(git_frame, text="Check Git Status",
+                                  command=self.check_git_status)
+        btn_status.pack(fill="x", pady=5)
+
+        btn_publish = ctk.CTkButton(git_frame, text="Publish Changes",
+                                   command=self.publish_changes,
+                                   fg_color="green", hover_color="darkgreen")
+        btn_publish.pack(fill="x", pady=5)
+
+        # Maintenance tools
+        tools_frame = ctk.CTkFrame(right_frame)
+        tools_frame.pack(fill="x", padx=10, pady=10)
+
+        btn_import = ctk.CTkButton(tools_frame, text="Import Inventory...",
+                                   command=self.import_inventory)
+        btn_import.pack(fill="x", pady=5)
+
+        # New and edited cards also offer WebP/AVIF copies in a <picture>
+        self.modern_formats_var = ctk.BooleanVar(value=bool(self.card_index.image_formats))
+        modern_check = ctk.CTkCheckBox(tools_frame, text="Save WebP/AVIF copies",
+                                       variable=self.modern_formats_var,
+                                       command=self.toggle_modern_formats)
+        modern_check.pack(fill="x", pady=5)
+        if not available_image_formats():
+            modern_check.configure(state="disabled")
+
+        btn_extract = ctk.CTkButton(tools_frame, text="Extract Inline Images",
+                                    command=self.extract_images)
+        btn_extract.pack(fill="x", pady=5)
+
+        btn_clean = ctk.CTkButton(tools_frame, text="Clean Up Images",
+                                  command=self.clean_up_images)
+        btn_clean.pack(fill="x", pady=5)
+
+        btn_backups = ctk.CTkButton(tools_frame, text="Restore Backup...",
+                                    command=self.show_backups)
+        btn_backups.pack(fill="x", pady=5)
+
+        # Separator
+        separator = ctk.CTkLabel(right_frame, text="─" * 40)
+        separator.pack(pady=20)
+
+        # Help section
+        help_title = ctk.CTkLabel(right_frame, text="Quick Help",
+                                 font=ctk.CTkFont(size=16, weight="bold"))
+        help_title.pack(pady=5)
+
+        help_text = """
+How to use:
+
+1. Select a computer from the list
+2. Click Edit to modify details
+3. Use Add New to create cards
+4. Delete removes selected card
+5. Publish commits to Git
+
+Images are automatically:
+• Copied to gallery folder
+• Stored under a content-hash name,
+  so identical photos share one file
+• Optimized for web
+• Backed up before changes
+        """
+
+        help_label = ctk.CTkLabel(right_frame, text=help_text,
+                                 font=ctk.CTkFont(size=12),
+                                 justify="left")
+        help_label.pack(pady=10, padx=10)
+
+    def create_status_bar(self):
+        """Create the bottom status bar."""
+        status_frame = ctk.CTkFrame(self, height=40)
+        status_frame.grid(row=1, column=0, columnspan=3, sticky="ew", padx=10, pady=5)
+
+        self.status_label = ctk.CTkLabel(status_frame,
+                                        text="Ready | No computers loaded",
+                                        font=ctk.CTkFont(size=12))
+        self.status_label.pack(side="left", padx=10)
+
+        self.cache_label = ctk.CTkLabel(status_frame, text="",
+                                       font=ctk.CTkFont(size=12), text_color="gray")
+        self.cache_label.pack(side="right", padx=10)
+
+    def load_computers(self):
+        """Load computers from index.html."""
+        try:
+            if not self.html_file.exists():
+                self.update_status(f"Error: index.html not found at {self.html_file}")
+                return
+
+            # Only parse the page when it is new or was changed outside the app
+            if self.card_index.is_stale():
+                if not self.load_card_index():
+                    return
+
+            self.computers = self.staged.view(self.card_index)
+
+            # Follow the selected card to its latest data (or drop it if deleted)
+            if self.current_selection:
+                selected = self.staged.get(self.card_index, self.current_selection['id'])
+                if selected is not self.current_selection:
+                    self.current_selection = selected
+                    if selected:
+                        self.show_preview(selected)
+
+            # Update UI
+            self.update_badge_filter()
+            self.refresh_list()
+            self.update_status(f"Loaded {len(self.computers)} computers successfully")
+
+        except Exception as e:
+            self.update_status(f"Error loading computers: {str(e)}")
+            messagebox.showerror("Load Error", f"Failed to load computers:\n{str(e)}")
+
+    def load_card_index(self):
+        """Load the page, asking which side to keep if it and the inventory disagree."""
+        try:
+            loaded = self.card_index.load()
+        except RuntimeError as e:
+            if self.card_index.inventory_state not in ('conflict', 'damaged'):
+                raise
+            name = self.card_index.inventory.path.name
+            if self.card_index.inventory_state == 'conflict':
+                answer = messagebox.askyesnocancel(
+                    "Inventory Conflict",
+                    f"index.html and {name} were both changed.\n\n"
+                    f"Yes: keep index.html and rebuild {name} from it\n"
+                    f"No: keep {name} and regenerate the gallery grid "
+                    f"(index.html is backed up first)\n"
+                    f"Cancel: change nothing for now")
+            else:
+                answer = messagebox.askyesno(
+                    "Inventory Damaged", f"{e}.\n\nRebuild {name} from index.html?") or None
+            if answer is None:
+                self.update_status(f"Error: {e}")
+                return False
+            if not answer:
+                backup_html(self.html_file, self.backup_dir,
+                            label="before resolving from the inventory")
+            loaded = self.card_index.load(prefer='page' if answer else 'inventory')
+        if not loaded:
+            self.update_status("Error: Gallery grid not found in HTML")
+        return loaded
+
+    def parse_card(self, card):
+        """Parse a single gallery card element."""
+        return parse_card(card)
+
+    def refresh_list(self):
+        """Refresh the computer list display."""
+        # Apply filters through the card index (set lookups, no scan)
+        filters = {
+            'type': self.type_filter_var.get(),
+            'category': self.category_filter_var.get(),
+        }
+        if self.badge_filter_var.get() != ALL_BADGES:
+            filters['badge'] = self.badge_filter_var.get()
+        text = self.search_entry.get().strip()
+        filtered = self.staged.query(self.card_index, filters, text) if self.card_index.loaded else []
+        price_min, price_max = (self.price_filter(entry)
+                                for entry in (self.price_min_entry, self.price_max_entry))
+        sort = SORT_ORDERS[self.sort_var.get()]
+        filtered = sort_by_price(filtered, price_min, price_max, sort)
+
+        # Rebind the visible rows; a new filter starts at the top
+        filter_key = (tuple(filters.items()), text, price_min, price_max, sort)
+        keep_offset = filter_key == self.last_filter
+        self.last_filter = filter_key
+        self.list_view.set_items(filtered, keep_offset=keep_offset)
+        self.update_cache_status()
+
+    @staticmethod
+    def price_filter(entry):
+        """Return a price entry's amount in cents, or None if it's empty or not a price."""
+        text = entry.get().strip()
+        return price_cents(text if text.startswith('$') else f"${text}") if text else None
+
+    def create_list_row(self, parent):
+        """Create an empty, reusable row widget for the computer list."""
+        frame = ctk.CTkFrame(parent, height=LIST_ROW_HEIGHT - LIST_ROW_GAP)
+        frame.pack_propagate(False)
+
+        # Thumbnail placeholder; the image is filled in once decoded
+        frame.img_label = ctk.CTkLabel(frame, text="", width=LIST_THUMB_SIZE[0],
+                                       height=LIST_THUMB_SIZE[1], fg_color="gray25",
+                                       corner_radius=6)
+        frame.img_label.pack(side="left", padx=5, pady=5)
+        frame.image_src = None
+        frame.selected = False
+
+        # Text info
+        text_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        text_frame.pack(side="left", fill="both", expand=True, padx=5)
+
+        frame.title_label = ctk.CTkLabel(text_frame, text="",
+                                         font=ctk.CTkFont(size=13, weight="bold"),
+                                         anchor="w")
+        frame.title_label.pack(fill="x")
+
+        frame.details_label = ctk.CTkLabel(text_frame, text="",
+                                           font=ctk.CTkFont(size=10),
+                                           anchor="w", text_color="gray")
+        frame.details_label.pack(fill="x")
+
+        # Make clickable; the handler looks up whichever computer is bound now
+        def on_click(event, row=frame):
+            if row.item is not None:
+                self.select_computer(row.item)
+
+        frame.bind("<Button-1>", on_click)
+        for child in frame.winfo_children():
+            child.bind("<Button-1>", on_click)
+            for subchild in child.winfo_children():
+                subchild.bind("<Button-1>", on_click)
+
+        return frame
+
+    def bind_list_row(self, row, computer):
+        """Show a computer in a pooled list row."""
+        self.style_list_row(row, computer)
+        pending = "● " if computer['id'] in self.staged else ""
+        row.title_label.configure(text=pending + computer['title'])
+        info = f"{computer['price']} | {computer['type'].title()} | {computer['category'].title()}"
+        row.details_label.configure(text=info)
+
+        if row.image_src == computer['image']:
+            return
+        row.image_src = computer['image']
+
+        img = self.thumbnail_cache.peek(computer['image'], LIST_THUMB_SIZE)
+        if img:
+            self.set_list_thumbnail(row.img_label, img)
+            return
+
+        row.img_label.configure(image=self.placeholder_thumb, fg_color="gray25")
+        row.img_label.image = self.placeholder_thumb
+        if computer['image']:
+            future = self.image_pool.submit(self.thumbnail_cache.get,
+                                            computer['image'], LIST_THUMB_SIZE)
+            future.add_done_callback(
+                lambda f, src=computer['image']: self.thumbnail_results.put((row, src, f)))
+
+    def style_list_row(self, row, computer):
+        """Outline the row of the selected computer."""
+        selected = (self.current_selection is not None
+                    and computer['id'] == self.current_selection['id'])
+        if row.selected != selected:
+            row.configure(border_width=2 if selected else 0,
+                          border_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+            row.selected = selected
+
+    def set_list_thumbnail(self, img_label, img):
+        """Show a decoded thumbnail in a list row's placeholder."""
+        photo = ctk.CTkImage(light_image=img, dark_image=img, size=LIST_THUMB_SIZE)
+        img_label.configure(image=photo, fg_color="transparent")
+        img_label.image = photo  # Keep reference
+
+    def poll_thumbnails(self):
+        """Apply thumbnails finished by the worker pool (runs on the Tk thread)."""
+        applied = False
+        while True:
+            try:
+                row, src, future = self.thumbnail_results.get_nowait()
+            except queue.Empty:
+                break
+
+            # Skip results for rows that were recycled for another computer
+            # by a filter change or while scrolling
+            if row.image_src != src:
+                continue
+            try:
+                img = future.result()
+            except Exception as e:
+                print(f"Error loading thumbnail: {e}")
+                continue
+            if img:
+                self.set_list_thumbnail(row.img_label, img)
+                applied = True
+
+        if applied:
+            self.update_cache_status()
+        self.after(THUMBNAIL_POLL_MS, self.poll_thumbnails)
+
+    def on_close(self):
+        """Stop background work and close the window."""
+        if self.staged:
+            answer = messagebox.askyesnocancel(
+                "Unapplied Changes",
+                f"Apply the staged changes ({self.staged.summary()}) before closing?")
+            if answer is None:
+                return
+            if answer:
+                self.apply_staged()
+                if self.staged:
+                    return  # Some changes failed; leave them on screen
+        self.image_pool.shutdown(wait=False, cancel_futures=True)
+        self.ingest_pool.shutdown()
+        self.git_pool.shutdown(wait=False, cancel_futures=True)
+        self.git.close()
+        self.destroy()
+
+    def ingest_images(self, jobs, on_done):
+        """Process (source, gallery_dir) image jobs without blocking the UI.
+
+        Progress is shown in the status bar. on_done(stored, failed) is called
+        on the Tk thread with dicts keyed by str(source), as returned by
+        ImageIngestPool.run.
+        """
+        futures = {self.ingest_pool.submit(source, gallery_dir): str(source)
+                   for source, gallery_dir in jobs}
+        total = len(futures)
+        stored, failed = {}, {}
+
+        def poll():
+            for future in [f for f in futures if f.done()]:
+                source = futures.pop(future)
+                try:
+                    stored[source] = future.result()
+                except Exception as e:
+                    failed[source] = str(e)
+            self.update_status(f"Processing images... {total - len(futures)}/{total}")
+            if futures:
+                self.after(INGEST_POLL_MS, poll)
+            else:
+                on_done(stored, failed)
+
+        poll()
+
+    def select_computer(self, computer):
+        """Select a computer and show preview."""
+        self.current_selection = computer
+        for row in self.list_view.rows:
+            if row.item is not None:
+                self.style_list_row(row, row.item)
+        self.show_preview(computer)
+        self.update_status(f"Selected: {computer['title']}")
+
+    def show_preview(self, computer):
+        """Display preview of computer card."""
+        # Clear previous preview
+        for widget in self.preview_frame.winfo_children():
+            widget.destroy()
+
+        # Create card preview
+        card_frame = ctk.CTkFrame(self.preview_frame, corner_radius=15,
+                                 border_width=2, border_color="gray")
+        card_frame.pack(expand=True, padx=20, pady=20)
+
+        # Image
+        try:
+            img = self.thumbnail_cache.get(computer['image'], (400, 400))
+            if img:
+                photo = ctk.CTkImage(light_image=img, dark_image=img,
+                                   size=(min(img.width, 400), min(img.height, 400)))
+                img_label = ctk.CTkLabel(card_frame, image=photo, text="")
+                img_label.image = photo
+                img_label.pack(pady=10)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+        self.update_cache_status()
+
+        # Badge
+        badge_color = "green" if computer['category'] == "custom" else "orange"
+        badge = ctk.CTkLabel(card_frame, text=computer['badge_text'],
+                           font=ctk.CTkFont(size=12, weight="bold"),
+                           fg_color=badge_color, corner_radius=5,
+                           padx=10, pady=5)
+        badge.pack(pady=5)
+
+        # Title
+        title = ctk.CTkLabel(card_frame, text=computer['title'],
+                           font=ctk.CTkFont(size=20, weight="bold"))
+        title.pack(pady=5)
+
+        if computer['id'] in self.staged:
+            pending = ctk.CTkLabel(card_frame, text="Not applied yet",
+                                   font=ctk.CTkFont(size=12), text_color="orange")
+            pending.pack()
+
+        # Price
+        price = ctk.CTkLabel(card_frame, text=computer['price'],
+                           font=ctk.CTkFont(size=24, weight="bold"),
+                           text_color="lightblue")
+        price.pack(pady=5)
+
+        # Specs
+        specs_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
+        specs_frame.pack(pady=10, padx=20, fill="both")
+
+        for spec in computer['specs']:
+            if spec['label'] and spec['value']:
+                spec_text = f"{spec['label']}: {spec['value']}"
+                spec_label = ctk.CTkLabel(specs_frame, text=spec_text,
+                                         font=ctk.CTkFont(size=12),
+                                         anchor="w")
+                spec_label.pack(fill="x", pady=2)
+
+    def apply_filter(self):
+        """Apply the selected filter."""
+        self.refresh_list()
+
+    def on_search_changed(self, event=None):
+        """Re-run the search once the user pauses typing."""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def run_search(self):
+        self.search_job = None
+        self.refresh_list()
+
+    def update_badge_filter(self):
+        """Offer the badges currently in use in the badge filter menu."""
+        badges = [badge.title() for badge in self.card_index.filters.values('badge')]
+        self.badge_menu.configure(values=[ALL_BADGES] + badges)
+        if self.badge_filter_var.get().lower() not in self.card_index.filters.fields['badge']:
+            self.badge_filter_var.set(ALL_BADGES)
+
+    def add_computer(self):
+        """Open dialog to add a new computer."""
+        dialog = ComputerEditDialog(self, None, self.get_next_id())
+        self.wait_window(dialog)
+
+        if dialog.result:
+            if self.stage_var.get():
+                self.stage_edit(dialog.result)
+                return
+
+            # Create backup
+            self.create_backup()
+
+            # Add to HTML
+            if self.add_card_to_html(dialog.result):
+                # Reload computers
+                self.load_computers()
+                messagebox.showinfo("Success", "Computer added successfully!")
+            else:
+                messagebox.showerror("Error", "Failed to add computer to HTML")
+
+    def edit_computer(self):
+        """Open dialog to edit selected computer."""
+        if not self.current_selection:
+            messagebox.showwarning("No Selection", "Please select a computer to edit")
+            return
+
+        dialog = ComputerEditDialog(self, self.current_selection)
+        self.wait_window(dialog)
+
+        if dialog.result:
+            if self.stage_var.get():
+                self.stage_edit(dialog.result)
+                return
+
+            # Create backup
+            self.create_backup()
+
+            # Update HTML
+            if self.update_card_in_html(dialog.result):
+                # Reload computers
+                self.load_computers()
+                messagebox.showinfo("Success", "Computer updated successfully!")
+            else:
+                messagebox.showerror("Error", "Failed to update computer in HTML")
+
+    def delete_computer(self):
+        """Delete the selected computer."""
+        if not self.current_selection:
+            messagebox.showwarning("No Selection", "Please select a computer to delete")
+            return
+
+        # Confirm deletion
+        result = messagebox.askyesno("Confirm Delete",
+                                    f"Are you sure you want to delete '{self.current_selection['title']}'?\n\n"
+                                    "This will remove it from the website.")
+
+        if result and self.stage_var.get():
+            # Staged deletes keep the image; "Clean Up Images" removes unused ones
+            self.stage_edit(None, computer_id=self.current_selection['id'])
+            return
+
+        if result:
+            # Ask about image
+            delete_image = messagebox.askyesno("Delete Image?",
+                                               "Do you also want to delete the image file?")
+
+            # Create backup
+            self.create_backup()
+
+            # Delete from HTML
+            if self.delete_card_from_html(self.current_selection['id']):
+                # Delete image if requested
+                if delete_image:
+                    img_path = resolve_image_path(self.website_dir, self.current_selection['image'])
+                    users = self.card_index.image_refcounts()[img_path.name] if img_path else 0
+                    if users:
+                        # Identical images are stored once, so other cards may share it
+                        messagebox.showinfo("Image Kept",
+                                            f"The image is also used by {users} other computer(s), "
+                                            "so it was not deleted.")
+                    elif img_path and img_path.exists():
+                        try:
+                            remove_gallery_image(img_path)
+                        except Exception as e:
+                            print(f"Error deleting image: {e}")
+
+                # Reload computers
+                self.current_selection = None
+                self.load_computers()
+
+                # Clear preview
+                for widget in self.preview_frame.winfo_children():
+                    widget.destroy()
+                label = ctk.CTkLabel(self.preview_frame,
+                                   text="Computer deleted successfully",
+                                   font=ctk.CTkFont(size=16))
+                label.pack(expand=True)
+
+                messagebox.showinfo("Success", "Computer deleted successfully!")
+            else:
+                messagebox.showerror("Error", "Failed to delete computer from HTML")
+
+    def stage_edit(self, data, computer_id=None):
+        """Hold a dialog result (or, with data None, a delete) until Apply All."""
+        if self.card_index.is_stale() and not self.card_index.load():
+            messagebox.showerror("Error", "Gallery grid not found in HTML")
+            return
+        if data is None:
+            title = self.staged.get(self.card_index, computer_id)['title']
+            self.staged.stage_delete(self.card_index, computer_id)
+            self.update_status(f"Staged delete of {title}")
+        else:
+            self.staged.stage(self.card_index, data)
+            self.update_status(f"Staged {data['title']}")
+        self.refresh_staged()
+
+    def refresh_staged(self):
+        """Show the staged state in the list, preview and Apply All button."""
+        count = len(self.staged)
+        state = "normal" if count else "disabled"
+        self.btn_apply.configure(text=f"Apply All ({count})" if count else "Apply All",
+                                 state=state)
+        self.btn_discard.configure(state=state)
+        self.load_computers()
+        if self.current_selection:
+            self.show_preview(self.current_selection)
+
+    def apply_staged(self):
+        """Write every staged edit with one backup and a single page write."""
+        if not self.staged:
+            return
+        summary = self.staged.summary()
+
+        if self.card_index.is_stale() and not self.card_index.load():
+            messagebox.showerror("Error", "Gallery grid not found in HTML")
+            return
+
+        # Create backup
+        self.create_backup()
+
+        try:
+            applied, errors = self.staged.apply(self.card_index)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to apply changes:\n{str(e)}")
+            return
+
+        self.refresh_staged()
+        if errors:
+            details = "\n".join(f"Computer {computer_id}: {error}" for computer_id, error in errors)
+            messagebox.showwarning("Apply All", f"Applied {len(applied)} change(s).\n\n"
+                                                f"Still staged:\n{details}")
+            return
+
+        self.update_status(f"Applied {summary}")
+        if self.publish_after_apply_var.get():
+            self.publish_changes()
+
+    def discard_staged(self):
+        """Throw away every staged edit."""
+        if not self.staged:
+            return
+        if not messagebox.askyesno("Discard Changes",
+                                   f"Discard the staged changes ({self.staged.summary()})?"):
+            return
+        self.staged.discard()
+        self.refresh_staged()
+        self.update_status("Discarded staged changes")
+
+    def toggle_staging(self):
+        """Turn staged editing on or off; turning it off applies what is staged."""
+        if self.stage_var.get():
+            self.update_status("Staging edits - click Apply All to write them")
+        elif self.staged:
+            self.apply_staged()
+
+    def undo(self, event=None):
+        """Undo the last change to the gallery cards."""
+        self.step_history(event, undo=True)
+
+    def redo(self, event=None):
+        """Redo the last undone change."""
+        self.step_history(event, undo=False)
+
+    def step_history(self, event, undo):
+        """Take one step back or forward in the card journal."""
+        if event is not None and isinstance(event.widget, (tk.Entry, tk.Text)):
+            return  # Ctrl+Z in a text box is for the text
+
+        undo_stack, redo_stack = self.card_journal.stacks()
+        if not (undo_stack if undo else redo_stack):
+            self.update_status("Nothing to undo" if undo else "Nothing to redo")
+            return
+
+        if self.card_index.is_stale() and not self.card_index.load():
+            messagebox.showerror("Error", "Gallery grid not found in HTML")
+            return
+
+        # Create backup
+        self.create_backup()
+
+        try:
+            if undo:
+                entries = self.card_journal.undo(self.card_index)
+            else:
+                entries = self.card_journal.redo(self.card_index)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to {'undo' if undo else 'redo'}:\n{str(e)}")
+            return
+
+        self.load_computers()
+        changes = ", ".join(describe_change(entry) for entry in entries[:3])
+        if len(entries) > 3:
+            changes += f" and {len(entries) - 3} more"
+        self.update_status(f"{'Undid' if undo else 'Redid'}: {changes}")
+
+    def get_next_id(self):
+        """Get the next available computer ID."""
+        return self.card_index.next_id(self.staged.new_ids)
+
+    def add_card_to_html(self, computer_data):
+        """Add a new card to the HTML file."""
+        try:
+            if self.card_index.is_stale() and not self.card_index.load():
+                return False
+
+            self.card_index.add(computer_data)
+            return True
+
+        except Exception as e:
+            print(f"Error adding card: {e}")
+            return False
+
+    def update_card_in_html(self, computer_data):
+        """Update an existing card in the HTML file."""
+        try:
+            if self.card_index.is_stale() and not self.card_index.load():
+                return False
+
+            # Find the card to update
+            if not self.card_index.get(computer_data['id']):
+                return False
+
+            self.card_index.update(computer_data)
+            return True
+
+        except Exception as e:
+            print(f"Error updating card: {e}")
+            return False
+
+    def delete_card_from_html(self, computer_id):
+        """Delete a card from the HTML file."""
+        try:
+            if self.card_index.is_stale() and not self.card_index.load():
+                return False
+
+            # Find the card to remove
+            if not self.card_index.get(computer_id):
+                return False
+
+            self.card_index.delete(computer_id)
+            return True
+
+        except Exception as e:
+            print(f"Error deleting card: {e}")
+            return False
+
+    def create_card_element(self, soup, data):
+        """Create a BeautifulSoup card element from computer data."""
+        return create_card_element(soup, data)
+
+    def extract_images(self):
+        """Move inline base64 images out of index.html into asset files."""
+        if self.card_index.is_stale():
+            self.load_computers()
+
+        inline = [c for c in self.computers if is_data_uri(c['image'])]
+        if not inline:
+            messagebox.showinfo("Extract Images", "No inline images found in index.html")
+            return
+
+        result = messagebox.askyesno("Extract Images",
+                                     f"{len(inline)} card image(s) are embedded in index.html.\n\n"
+                                     "Save them to assets/gallery/ and update the cards?")
+        if not result:
+            return
+
+        # Create backup
+        self.create_backup()
+
+        extracted, errors = extract_inline_images(self.card_index, self.gallery_dir,
+                                                  self.website_dir)
+        self.load_computers()
+
+        message = f"Extracted {len(extracted)} image(s) to assets/gallery/"
+        if errors:
+            details = "\n".join(f"Card {cid}: {error}" for cid, error in errors)
+            messagebox.showwarning("Extract Images", f"{message}\n\nFailed:\n{details}")
+        else:
+            messagebox.showinfo("Extract Images", message)
+        self.update_status(message)
+
+    def toggle_modern_formats(self):
+        """Switch WebP/AVIF copies on or off for cards saved from now on."""
+        formats = available_image_formats() if self.modern_formats_var.get() else ()
+        self.card_index.image_formats = formats
+        self.ingest_pool.formats = formats
+        if formats:
+            self.update_status(f"Saving {', '.join(formats).upper()} copies with new images")
+        else:
+            self.update_status("Saving JPEG images only")
+
+    def import_inventory(self):
+        """Add every computer in a CSV or JSON manifest in one write."""
+        file_path = filedialog.askopenfilename(
+            title="Select Inventory File",
+            filetypes=[("Inventory files", "*.csv *.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            rows = read_manifest(file_path)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Failed to read {Path(file_path).name}:\n{str(e)}")
+            return
+
+        if self.card_index.is_stale() and not self.card_index.load():
+            messagebox.showerror("Import Error", "Gallery grid not found in HTML")
+            return
+
+        pending, errors = plan_import(self.card_index, rows, self.website_dir,
+                                      base_dir=Path(file_path).parent)
+
+        def finish(stored, failed):
+            # Another edit may have rewritten index.html while images were processed
+            if self.card_index.is_stale():
+                self.card_index.load()
+            added, apply_errors = apply_import(self.card_index, pending, stored, failed,
+                                               backup_dir=self.backup_dir)
+            self.load_computers()
+            self.show_import_result(len(rows), added,
+                                    sorted(errors + apply_errors, key=lambda e: e[0]))
+
+        jobs = list({str(job[0]): job for _, _, job in pending if job}.values())
+        if jobs:
+            self.ingest_images(jobs, finish)
+        else:
+            finish({}, {})
+
+    def show_import_result(self, total, added, errors):
+        """Summarize an inventory import, listing the rows that failed."""
+        message = f"Imported {len(added)} of {total} computer(s)"
+        if errors:
+            details = "\n".join(f"Row {number}: {error}" for number, error in errors[:20])
+            if len(errors) > 20:
+                details += f"\n... and {len(errors) - 20} more"
+            messagebox.showwarning("Import Inventory", f"{message}\n\nProblems:\n{details}")
+        else:
+            messagebox.showinfo("Import Inventory", message)
+        self.update_status(message)
+
+    def clean_up_images(self):
+        """Merge duplicate gallery images and delete the unused ones."""
+        if self.card_index.is_stale():
+            self.load_computers()
+
+        moved, removed = collect_garbage(self.card_index, self.website_dir, dry_run=True,
+                                         staged=self.staged)
+        if not moved and not removed:
+            messagebox.showinfo("Clean Up Images", "No duplicate or unused images found")
+            return
+
+        result = messagebox.askyesno("Clean Up Images",
+                                     f"{len(moved)} card(s) will point at a shared copy of their image "
+                                     f"and {len(removed)} unused file(s) will be deleted.\n\nContinue?")
+        if not result:
+            return
+
+        # Create backup
+        self.create_backup()
+
+        moved, removed = collect_garbage(self.card_index, self.website_dir, staged=self.staged)
+        self.load_computers()
+        message = f"Moved {len(moved)} card image(s), deleted {len(removed)} unused file(s)"
+        messagebox.showinfo("Clean Up Images", message)
+        self.update_status(message)
+
+    def create_backup(self):
+        """Create a backup of index.html."""
+        try:
+            snapshot = backup_html(self.html_file, self.backup_dir)
+            self.update_status(f"Backup created: {snapshot['id']}")
+        except Exception as e:
+            print(f"Error creating backup: {e}")
+
+    def show_backups(self):
+        """List the backup snapshots, newest first, each with a Restore button."""
+        snapshots = BackupStore(self.backup_dir).snapshots()
+        if not snapshots:
+            messagebox.showinfo("Restore Backup", "No backups yet")
+            return
+
+        window = ctk.CTkToplevel(self)
+        window.title("Restore Backup")
+        window.geometry("600x500")
+        window.transient(self)
+
+        rows = ctk.CTkScrollableFrame(window)
+        rows.pack(fill="both", expand=True, padx=20, pady=20)
+        for snapshot in reversed(snapshots):
+            row = ctk.CTkFrame(rows)
+            row.pack(fill="x", pady=2)
+            created = datetime.fromisoformat(snapshot['created']).strftime("%Y-%m-%d %H:%M:%S")
+            text = f"{created}  {snapshot['size']:,} bytes  {snapshot['label']}"
+            ctk.CTkLabel(row, text=text, anchor="w").pack(side="left", fill="x", expand=True,
+                                                          padx=10)
+            ctk.CTkButton(row, text="Restore", width=80,
+                          command=lambda s=snapshot: self.restore_backup(s, window)).pack(
+                side="right", padx=5, pady=5)
+
+    def restore_backup(self, snapshot, window):
+        """Put a backup snapshot back as index.html."""
+        result = messagebox.askyesno("Restore Backup",
+                                     f"Replace index.html with the backup from "
+                                     f"{snapshot['created'][:19].replace('T', ' ')}?\n\n"
+                                     "The current page is backed up first.", parent=window)
+        if not result:
+            return
+
+        try:
+            BackupStore(self.backup_dir).restore(snapshot['id'], self.html_file)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to restore backup:\n{str(e)}", parent=window)
+            return
+
+        window.destroy()
+        self.load_computers()
+        self.update_status(f"Restored backup {snapshot['id']}")
+
+    def check_git_status(self, quiet=False, then=None):
+        """Check Git status of the repository.
+
+        git runs on the worker thread and the label is updated when it is
+        done. The status is cached by the git service until a gallery file
+        or git's own state changes, so this is cheap enough to poll. quiet
+        skips the error dialogs (for the poll); then(ok) is called after.
+        """
+        future = self.git_pool.submit(self.read_git_status, not quiet)
+        self.after(GIT_RESULT_POLL_MS, self.show_git_status, future, quiet, then)
+
+    def read_git_status(self, refresh):
+        """Return the Git status line text (runs on the worker thread)."""
+        status = self.git.status(refresh=refresh)
+        pending = self.git.pending(GIT_GALLERY_PATHS)
+        if pending:
+            lines = "\n".join(f"{code} {path}" for code, path in pending[:3])
+            more = f"\n... and {len(pending) - 3} more" if len(pending) > 3 else ""
+            text = f"Git Status: {len(pending)} change(s)\n{lines}{more}"
+        else:
+            text = "Git Status: Clean (no changes)"
+        if status['ahead'] or not self.git.is_pushed():
+            text += "\nCommitted, not pushed yet"
+        if status['behind']:
+            text += f"\nRemote is {status['behind']} commit(s) ahead; pull first"
+        return text
+
+    def show_git_status(self, future, quiet, then):
+        """Show a status read by read_git_status once it is done (runs on the Tk thread)."""
+        if not future.done():
+            self.after(GIT_RESULT_POLL_MS, self.show_git_status, future, quiet, then)
+            return
+        ok = False
+        try:
+            self.git_status_label.configure(text=future.result())
+            ok = True
+        except subprocess.TimeoutExpired:
+            if not quiet:
+                messagebox.showerror("Timeout", "Git command timed out")
+        except FileNotFoundError:
+            if not quiet:
+                messagebox.showerror("Git Not Found", "Git is not installed or not in PATH")
+        except Exception as e:
+            if not quiet:
+                messagebox.showerror("Error", f"Error checking Git status:\n{str(e)}")
+        if not ok:
+            self.git_status_label.configure(text="Git Status: Error checking status")
+        if then:
+            then(ok)
+
+    def poll_git_status(self):
+        """Keep the Git status current; stops once git can't be run."""
+        if self.publisher is not None and self.publisher.running:
+            # The publisher is running git add and commit; look again afterwards
+            self.after(GIT_STATUS_POLL_MS, self.poll_git_status)
+            return
+
+        def next_poll(ok):
+            if ok:
+                self.after(GIT_STATUS_POLL_MS, self.poll_git_status)
+        self.check_git_status(quiet=True, then=next_poll)
+
+    def publish_changes(self):
+        """Commit and push changes to Git."""
+        # Compared with the last publish without running git
+        try:
+            plan = PublishPlan(self.card_index, self.backup_dir / PUBLISH_STATE_FILE)
+        except OSError as e:
+            messagebox.showerror("Publish Error", f"Could not read the site:\n{e}")
+            return
+        if not plan.changed:
+            messagebox.showinfo("Nothing to Publish",
+                                "Nothing has changed since the last publish.")
+            return
+        message = plan.message()
+
+        # Confirm action
+        result = messagebox.askyesno("Confirm Publish",
+                                    f"This will commit {plan.summary()}:\n\n"
+                                    f"{message}\n\n"
+                                    "and push it to the remote repository.\n\n"
+                                    "Continue?")
+
+        if not result:
+            return
+
+        # Create progress window
+        progress_window = ctk.CTkToplevel(self)
+        progress_window.title("Publishing Changes")
+        progress_window.geometry("600x440")
+        progress_window.transient(self)
+        progress_window.grab_set()
+
+        label = ctk.CTkLabel(progress_window, text="Publishing changes to Git...",
+                           font=ctk.CTkFont(size=16, weight="bold"))
+        label.pack(pady=10)
+
+        output_text = ctk.CTkTextbox(progress_window, width=560, height=300)
+        output_text.pack(padx=20, pady=10)
+
+        # git runs on the publisher's thread; its output reaches the window
+        # through a queue emptied here on the Tk thread
+        publisher = GitPublisher(self.website_dir, message, plan.paths, git=self.git)
+
+        def cancel():
+            if publisher.running:
+                publisher.cancel()
+                label.configure(text="Cancelling...")
+                button.configure(state="disabled")
+            else:
+                progress_window.destroy()
+
+        button = ctk.CTkButton(progress_window, text="Cancel", command=cancel)
+        button.pack(pady=10)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel)
+
+        progress_shown = [False]
+
+        def write(line, progress=False):
+            # Each progress counter replaces the previous one
+            if progress_shown[0]:
+                output_text.delete("end-2l", "end-1l")
+            output_text.insert("end", f"{line}\n")
+            output_text.see("end")
+            progress_shown[0] = progress
+
+        def poll():
+            while True:
+                try:
+                    event = publisher.events.get_nowait()
+                except queue.Empty:
+                    break
+                kind = event[0]
+                if kind == 'step':
+                    write(f"\n{event[1]}")
+                    label.configure(text=event[1])
+                elif kind == 'output':
+                    write(event[1])
+                elif kind == 'progress':
+                    write(event[1], progress=True)
+                elif kind == 'step-done':
+                    write(f"  ({event[2]:.1f}s)")
+                elif kind == 'finished':
+                    finish(event[1], event[2])
+                    return
+            progress_window.after(PUBLISH_POLL_MS, poll)
+
+        def finish(status, error):
+            if not progress_window.winfo_exists():
+                return
+            if publisher.timings:
+                write(f"\nTimings: {publisher.timing_summary()}")
+            if status == 'done':
+                plan.save()
+                self.check_git_status(quiet=True)
+                write("\n✓ Publishing completed successfully!")
+                write("✓ Changes pushed - website will update shortly!")
+                label.configure(text="Published")
+                self.update_status("Changes published to Git successfully")
+            elif status == 'cancelled':
+                write("\n✗ Publishing cancelled")
+                label.configure(text="Cancelled")
+                self.update_status("Publishing cancelled")
+            elif isinstance(error, subprocess.TimeoutExpired):
+                write(f"\n✗ Error: Git printed nothing for {error.timeout} seconds and was stopped")
+                label.configure(text="Publishing failed")
+            else:
+                write(f"\n✗ Error: {error}")
+                label.configure(text="Publishing failed")
+            button.configure(text="Close", state="normal")
+
+        self.publisher = publisher
+        publisher.start()
+        poll()
+
+    def update_status(self, message):
+        """Update the status bar message."""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.status_label.configure(text=f"{timestamp} | {message}")
+
+    def update_cache_status(self):
+        """Show thumbnail cache hit/miss counters in the status bar."""
+        self.cache_label.configure(text=self.thumbnail_cache.stats_text())
+
+
+class ComputerEditDialog(ctk.CTkToplevel):
+    """Dialog window for adding/editing computer details."""
+
+    def __init__(self, parent, computer_data=None, new_id=None):
+        super().__init__(parent)
+
+        self.parent = parent
+        self.computer_data = computer_data
+        self.result = None
+        self.new_image_path = None
+
+        # Configure window
+        title = "Edit Computer" if computer_data else "Add New Computer"
+        self.title(title)
+        self.geometry("700x800")
+
+        # Make modal
+        self.transient(parent)
+        self.grab_set()
+
+        # Create UI
+        self.create_form(new_id)
+
+        # Center window
+        self.update_idletasks()
+        x = (self.winfo_screenwidth() // 2) - (self.winfo_width() // 2)
+        y = (self.winfo_screenheight() // 2) - (self.winfo_height() // 2)
+        self.geometry(f"+{x}+{y}")
+
+    def create_form(self, new_id):
+        """Create the edit form."""
+        # Scrollable frame
+        scroll_frame = ctk.CTkScrollableFrame(self)
+        scroll_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # Computer ID (hidden or auto-generated)
+        self.id_var = ctk.StringVar(value=self.computer_data['id'] if self.computer_data else new_id)
+
+        # Computer Name
+        ctk.CTkLabel(scroll_frame, text="Computer Name:",
+                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.name_entry = ctk.CTkEntry(scroll_frame, width=600, height=35)
+        self.name_entry.pack(pady=(0, 15))
+        if self.computer_data:
+            self.name_entry.insert(0, self.computer_data['title'])
+
+        # Type (Desktop/Laptop)
+        ctk.CTkLabel(scroll_frame, text="Type:",
+                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.type_var = ctk.StringVar(value=self.computer_data['type'] if self.computer_data else "desktop")
+        type_frame = ctk.CTkFrame(scroll_frame)
+        type_frame.pack(fill="x", pady=(0, 15))
+
+        desktop_radio = ctk.CTkRadioButton(type_frame, text="Desktop", variable=self.type_var,
+                          value="desktop", command=self.update_category_options)
+        desktop_radio.pack(side="left", padx=10)
+
+        laptop_radio = ctk.CTkRadioButton(type_frame, text="Laptop", variable=self.type_var,
+                          value="laptop", command=self.update_category_options)
+        laptop_radio.pack(side="left", padx=10)
+
+        # Category (Custom/Refurbished for Desktop, New/Refurbished for Laptop)
+        self.category_label = ctk.CTkLabel(scroll_frame, text="Category:",
+                    font=ctk.CTkFont(size=13, weight="bold"))
+        self.category_label.pack(anchor="w", pady=(0, 5))
+        self.category_var = ctk.StringVar(value=self.computer_data['category'] if self.computer_data else "custom")
+        self.cat_frame = ctk.CTkFrame(scroll_frame)
+        self.cat_frame.pack(fill="x", pady=(0, 15))
+
+        # We'll populate this dynamically based on type
+        self.category_radio_1 = None
+        self.category_radio_2 = None
+        self.update_category_options()
+
+        # Price
+        ctk.CTkLabel(scroll_frame, text="Price:",
+                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.price_entry = ctk.CTkEntry(scroll_frame, width=200, height=35,
+                                       placeholder_text="$999")
+        self.price_entry.pack(anchor="w", pady=(0, 15))
+        if self.computer_data:
+            self.price_entry.insert(0, self.computer_data['price'])
+
+        # Image
+        ctk.CTkLabel(scroll_frame, text="Image:",
+                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
+
+        image_frame = ctk.CTkFrame(scroll_frame)
+        image_frame.pack(fill="x", pady=(0, 15))
+
+        btn_upload = ctk.CTkButton(image_frame, text="Upload Image",
+                                   command=self.upload_image)
+        btn_upload.pack(side="left", padx=5)
+
+        self.image_label = ctk.CTkLabel(image_frame, text="No image selected")
+        self.image_label.pack(side="left", padx=10)
+
+        # Image preview
+        self.image_preview_label = ctk.CTkLabel(scroll_frame, text="")
+        self.image_preview_label.pack(pady=10)
+
+        # If editing, show current image
+        if self.computer_data and self.computer_data['image']:
+            self.show_image_preview(src=self.computer_data['image'])
+
+        # Specs (4 fields)
+        ctk.CTkLabel(scroll_frame, text="Specifications:",
+                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(10, 5))
+
+        self.spec_entries = []
+        specs = self.computer_data['specs'] if self.computer_data else [{'label': '', 'value': ''} for _ in range(4)]
+
+        for i in range(4):
+            spec_frame = ctk.CTkFrame(scroll_frame)
+            spec_frame.pack(fill="x", pady=5)
+
+            ctk.CTkLabel(spec_frame, text=f"Spec {i+1}:", width=60).pack(side="left", padx=5)
+
+            label_entry = ctk.CTkEntry(spec_frame, width=150, placeholder_text="CPU")
+            label_entry.pack(side="left", padx=5)
+
+            value_entry = ctk.CTkEntry(spec_frame, width=350, placeholder_text="Intel Core i7-12700K")
+            value_entry.pack(side="left", padx=5)
+
+            if i < len(specs):
+                label_entry.insert(0, specs[i]['label'])
+                value_entry.insert(0, specs[i]['value'])
+
+            self.spec_entries.append((label_entry, value_entry))
+
+        # Buttons
+        button_frame = ctk.CTkFrame(self)
+        button_frame.pack(fill="x", padx=20, pady=10)
+
+        self.btn_save = ctk.CTkButton(button_frame, text="Save",
+                                      command=self.save,
+                                      fg_color="green", hover_color="darkgreen",
+                                      width=150, height=40)
+        self.btn_save.pack(side="left", padx=10)
+
+        btn_cancel = ctk.CTkButton(button_frame, text="Cancel",
+                                   command=self.cancel,
+                                   width=150, height=40)
+        btn_cancel.pack(side="left", padx=10)
+
+    def update_category_options(self):
+        """Update category options based on selected type."""
+        # Clear existing radio buttons
+        if self.category_radio_1:
+            self.category_radio_1.destroy()
+        if self.category_radio_2:
+            self.category_radio_2.destroy()
+
+        computer_type = self.type_var.get()
+
+        if computer_type == "desktop":
+            # Desktop options: Custom Build / Refurbished
+            self.category_radio_1 = ctk.CTkRadioButton(
+                self.cat_frame, text="Custom Build",
+                variable=self.category_var, value="custom"
+            )
+            self.category_radio_1.pack(side="left", padx=10)
+
+            self.category_radio_2 = ctk.CTkRadioButton(
+                self.cat_frame, text="Refurbished",
+                variable=self.category_var, value="refurbished"
+            )
+            self.category_radio_2.pack(side="left", padx=10)
+
+            # Set default for desktop if current value is invalid
+            if self.category_var.get() not in ["custom", "refurbished"]:
+                self.category_var.set("custom")
+
+        else:  # laptop
+            # Laptop options: New / Refurbished
+            self.category_radio_1 = ctk.CTkRadioButton(
+                self.cat_frame, text="New",
+                variable=self.category_var, value="new"
+            )
+            self.category_radio_1.pack(side="left", padx=10)
+
+            self.category_radio_2 = ctk.CTkRadioButton(
+                self.cat_frame, text="Refurbished",
+                variable=self.category_var, value="refurbished"
+            )
+            self.category_radio_2.pack(side="left", padx=10)
+
+            # Set default for laptop if current value is invalid
+            if self.category_var.get() not in ["new", "refurbished"]:
+                self.category_var.set("refurbished")
+
+    def upload_image(self):
+        """Handle image upload."""
+        file_path = filedialog.askopenfilename(
+            title="Select Image",
+            filetypes=[
+                ("Image files", "*.jpg *.jpeg *.png *.gif *.bmp"),
+                ("All files", "*.*")
+            ]
+        )
+
+        if file_path:
+            self.new_image_path = file_path
+            self.image_label.configure(text=os.path.basename(file_path))
+            self.show_image_preview(file_path)
+
+    def show_image_preview(self, image_path=None, src=None):
+        """Show preview of selected image (a local file or a card's image src)."""
+        try:
+            cache = self.parent.thumbnail_cache
+            if src is not None:
+                img = cache.get(src, (300, 300))
+            else:
+                img = cache.get_file(image_path, (300, 300))
+            if img is None:
+                return
+            photo = ctk.CTkImage(light_image=img, dark_image=img,
+                               size=(min(img.width, 300), min(img.height, 300)))
+            self.image_preview_label.configure(image=photo, text="")
+            self.image_preview_label.image = photo
+        except Exception as e:
+            print(f"Error showing preview: {e}")
+
+    def validate_fields(self):
+        """Validate all form fields."""
+        data = {
+            'title': self.name_entry.get(),
+            'price': self.price_entry.get(),
+            'specs': [{'label': label_entry.get(), 'value': value_entry.get()}
+                      for label_entry, value_entry in self.spec_entries],
+            'image': self.new_image_path or (self.computer_data or {}).get('image'),
+        }
+        errors = validate_computer(data, require_image=not self.computer_data)
+
+        if errors:
+            messagebox.showerror("Validation Error", "\n".join(errors))
+            return False
+
+        return True
+
+    def save(self):
+        """Save the computer data."""
+        if not self.validate_fields():
+            return
+
+        # Prepare data
+        computer_type = self.type_var.get()
+        category = self.category_var.get()
+        computer_id = self.id_var.get()
+
+        # Collect specs
+        specs = normalize_specs({'label': label_entry.get(), 'value': value_entry.get()}
+                                for label_entry, value_entry in self.spec_entries)
+
+        # Keep the existing image unless a new one was uploaded
+        self.pending_result = {
+            'id': computer_id,
+            'type': computer_type,
+            'category': category,
+            'title': self.name_entry.get().strip(),
+            'price': self.price_entry.get().strip(),
+            'image': self.computer_data['image'] if self.computer_data else "",
+            'badge_text': badge_text_for(category),
+            'specs': specs
+        }
+
+        if self.new_image_path:
+            try:
+                image_path, job = image_job_for(self.parent.website_dir, self.new_image_path)
+            except ValueError as e:
+                messagebox.showerror("Image Error", str(e))
+                return
+            self.pending_result['image'] = image_path
+            if job:
+                # Process the image in the background; the dialog closes when it is done
+                self.btn_save.configure(state="disabled", text="Processing image...")
+                self.parent.ingest_images([job], self.finish_save)
+                return
+
+        self.finish_save({}, {})
+
+    def finish_save(self, stored, failed):
+        """Close the dialog with the result once the image is processed."""
+        if not self.winfo_exists():
+            return  # Cancelled while the image was processed
+
+        if failed:
+            self.btn_save.configure(state="normal", text="Save")
+            error = next(iter(failed.values()))
+            messagebox.showerror("Image Error", f"Failed to process image:\n{error}")
+            return
+
+        if stored:
+            self.pending_result['image'] = gallery_src(next(iter(stored.values())))
+
+        self.result = self.pending_result
+        self.destroy()
+
+    def cancel(self):
+        """Cancel the dialog."""
+        self.result = None
+        self.destroy()
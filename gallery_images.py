@@ -0,0 +1,808 @@
+"""
+Gallery images for Computer Store Kansas Website
+Card image files: inline data URIs, list thumbnails, processing uploads
+into the content-addressed store in assets/gallery/, srcset copies and
+extra formats, and removing images nothing uses.
+"""
+
+import os
+import re
+import io
+import base64
+import hashlib
+import mimetypes
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlparse, unquote_to_bytes
+
+from gallery_backups import BackupStore, write_bytes_atomic
+
+DATA_URI_RE = re.compile(r'^data:([\w.+-]+/[\w.+-]+)?((?:;[^;,]*)*?)(;base64)?,', re.I)
+
+IMAGE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/avif': '.avif',
+}
+
+# Longest side of images saved to assets/gallery/
+MAX_IMAGE_SIZE = 1200
+
+# Largest file, per pixel, accepted as is from an upload; q85 JPEGs of
+# photos come out around 0.1-0.3 bytes per pixel
+MAX_BYTES_PER_PIXEL = 0.5
+
+# Widths of the smaller copies offered next to each card image in its srcset
+VARIANT_WIDTHS = (320, 640, 960)
+
+# Extra image formats a card can offer in a <picture>, best first, with the
+# MIME type browsers match and the encoder settings used
+MODERN_FORMATS = ('avif', 'webp')
+FORMAT_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+FORMAT_OPTIONS = {'avif': {'quality': 60}, 'webp': {'quality': 80, 'method': 6}}
+
+# Names of gallery files mentioned in page markup, e.g. "./assets/gallery/x.jpg"
+GALLERY_REF_RE = re.compile(r'assets/gallery/([^/"\'\s?#),\\]+)')
+
+# Site files collect_garbage reads for gallery references (pages, scripts
+# such as script.js's computerData, styles, the API's data), and the
+# folders it doesn't look in besides assets/gallery/ itself
+TEXT_ASSET_SUFFIXES = ('.html', '.htm', '.js', '.mjs', '.css', '.json')
+GC_SKIP_DIRS = ('.git', '.cache', 'backups', 'node_modules', '__pycache__')
+
+# Unused gallery files younger than this are left alone by collect_garbage;
+# they may be uploads whose card hasn't been saved yet
+GC_MIN_AGE = 60 * 60
+
+
+def is_data_uri(src):
+    """Return True if an image src is an inline data: URI."""
+    return src[:5].lower() == 'data:'
+
+
+def decode_data_uri(src):
+    """Decode a data: URI into (mime_type, payload bytes).
+
+    Raises:
+        ValueError: If the URI is malformed.
+    """
+    match = DATA_URI_RE.match(src)
+    if not match:
+        raise ValueError("Not a valid data URI")
+
+    mime = (match.group(1) or 'text/plain').lower()
+    payload = src[match.end():]
+    if match.group(3):
+        try:
+            return mime, base64.b64decode(''.join(payload.split()))
+        except Exception as e:
+            raise ValueError(f"Invalid base64 data: {e}")
+    return mime, unquote_to_bytes(payload)
+
+
+def resolve_image_path(website_dir, src):
+    """Map a card's image src to a file inside the website directory.
+
+    Absolute URLs are mapped by their path (so https://site/assets/x.jpg
+    resolves to assets/x.jpg). Returns None for empty srcs and data URIs,
+    which have no file behind them.
+    """
+    if not src or is_data_uri(src):
+        return None
+    if '://' in src:
+        src = urlparse(src).path
+    return Path(website_dir) / src.replace('./', '').lstrip('/')
+
+
+def card_image_source(website_dir, src):
+    """Return something Image.open() can read for a card's image, or None."""
+    if src and is_data_uri(src):
+        try:
+            return io.BytesIO(decode_data_uri(src)[1])
+        except ValueError:
+            return None
+
+    path = resolve_image_path(website_dir, src)
+    try:
+        return path if path and path.exists() else None
+    except OSError:
+        return None
+
+
+def load_thumbnail(source, box):
+    """Decode an image scaled down to fit inside box.
+
+    JPEGs are opened in draft mode so libjpeg's DCT scaling decodes them at
+    1/2, 1/4 or 1/8 size, picking the smallest scale that still covers box.
+    A 24 MP camera photo is never decoded at full resolution for a 60px row.
+    """
+    from PIL import Image
+
+    img = Image.open(source)
+    if img.format == 'JPEG':
+        img.draft(None, box)
+    img.thumbnail(box)
+    return img
+
+
+class ThumbnailCache:
+    """Two-tier cache of downscaled gallery images.
+
+    Thumbnails are keyed on (source path, mtime, size, target box), or on a
+    hash of the URI for inline data: images, so a changed source file never
+    serves a stale thumbnail. The memory tier is an LRU bounded by decoded
+    pixel bytes; the disk tier keeps PNGs under cache_dir so thumbnails
+    survive restarts.
+
+    The cache is thread-safe so thumbnails can be decoded on worker threads.
+    """
+
+    def __init__(self, website_dir, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.website_dir = Path(website_dir)
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (image, byte_count)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, src, box):
+        """Return a thumbnail for a card's image src, or None if it has no image."""
+        found = self._key_for_src(src, box)
+        return self._lookup(*found, box) if found else None
+
+    def get_file(self, path, box):
+        """Return a thumbnail for a local image file."""
+        return self._lookup(*self._key_for_file(path, box), box)
+
+    def peek(self, src, box):
+        """Return a thumbnail only if it is already in memory; never decodes."""
+        try:
+            found = self._key_for_src(src, box)
+        except OSError:
+            return None
+        if not found:
+            return None
+        return self._memory_get(found[0])
+
+    def stats_text(self):
+        """Short hit/miss summary for the status bar."""
+        return (f"Thumbs: {self.hits} mem / {self.disk_hits} disk hits, "
+                f"{self.misses} misses | {self.current_bytes / 1048576:.1f} MB")
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left in place)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _key_for_src(self, src, box):
+        """Return (key, open_source) for a card's image src, or None."""
+        if src and is_data_uri(src):
+            digest = hashlib.sha1(src.encode('utf-8')).hexdigest()
+            key = f"data:{digest}|{box[0]}x{box[1]}"
+            return key, lambda: card_image_source(self.website_dir, src)
+
+        path = card_image_source(self.website_dir, src)
+        return self._key_for_file(path, box) if path else None
+
+    def _key_for_file(self, path, box):
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = f"{path}|{stat.st_mtime_ns}|{stat.st_size}|{box[0]}x{box[1]}"
+        return key, lambda: path
+
+    def _memory_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _lookup(self, key, open_source, box):
+        from PIL import Image
+
+        img = self._memory_get(key)
+        if img is not None:
+            return img
+
+        disk_file = self.cache_dir / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+        if disk_file.exists():
+            try:
+                img = Image.open(disk_file)
+                img.load()
+                with self._lock:
+                    self.disk_hits += 1
+                self._store(key, img)
+                return img
+            except Exception:
+                pass  # Corrupt cache file; rebuild it below
+
+        source = open_source()
+        if source is None:
+            return None
+
+        with self._lock:
+            self.misses += 1
+        img = load_thumbnail(source, box)
+        if img.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+            img = img.convert('RGB')
+
+        # Write to a private temp name so concurrent readers never see a partial file
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = disk_file.with_suffix(f".{threading.get_ident()}.tmp")
+            img.save(tmp_file, 'PNG')
+            os.replace(tmp_file, disk_file)
+        except OSError as e:
+            print(f"Error writing thumbnail cache: {e}")
+
+        self._store(key, img)
+        return img
+
+    def _store(self, key, img):
+        """Add an image to the memory tier, evicting least recently used ones."""
+        byte_count = img.width * img.height * len(img.getbands())
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.current_bytes -= old[1]
+            self._entries[key] = (img, byte_count)
+            self.current_bytes += byte_count
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+
+def extract_inline_images(card_index, gallery_dir, website_dir):
+    """Move data-URI card images out of index.html into hashed asset files.
+
+    Each inline image is decoded and written to gallery_dir under the first
+    16 hex digits of its SHA-256 (identical images share one file), and the
+    card's src is rewritten to point at it.
+
+    Returns:
+        (extracted, errors) where extracted is a list of
+        (computer_id, new_src, byte_count) and errors a list of
+        (computer_id, message).
+    """
+    gallery_dir = Path(gallery_dir)
+    gallery_dir.mkdir(parents=True, exist_ok=True)
+    extracted = []
+    errors = []
+
+    for computer in card_index.computers():
+        src = computer['image']
+        if not is_data_uri(src):
+            continue
+
+        try:
+            mime, payload = decode_data_uri(src)
+            ext = IMAGE_EXTENSIONS.get(mime) or mimetypes.guess_extension(mime) or '.bin'
+            dest, _ = store_image(payload, gallery_dir, ext)
+
+            new_src = "./" + dest.relative_to(website_dir).as_posix()
+            card_index.set_image_src(computer['id'], new_src)
+            extracted.append((computer['id'], new_src, len(payload)))
+        except Exception as e:
+            errors.append((computer['id'], str(e)))
+
+    return extracted, errors
+
+
+def is_web_ready(img, file_size):
+    """Return True if an opened (not yet decoded) image can be served as is.
+
+    Only the header is inspected: a baseline or progressive JPEG in RGB or
+    grayscale, no larger than MAX_IMAGE_SIZE, stored upright, without GPS
+    data and not much bigger than a q85 re-encode would be.
+    """
+    if img.format != 'JPEG' or img.mode not in ('RGB', 'L'):
+        return False
+    if max(img.size) > MAX_IMAGE_SIZE:
+        return False
+    exif = img.getexif()
+    if exif.get(0x0112, 1) != 1 or 0x8825 in exif:
+        return False  # Needs rotating, or would publish where the photo was taken
+    return file_size <= img.width * img.height * MAX_BYTES_PER_PIXEL
+
+
+def process_image(source, gallery_dir, formats=()):
+    """Store an uploaded photo in gallery_dir as a web-ready JPEG.
+
+    A photo that is_web_ready() is copied into the store unchanged. Anything
+    else is turned upright from its EXIF orientation, converted to RGB,
+    scaled down to MAX_IMAGE_SIZE on its longest side and re-encoded. Either
+    way it is stored under its content hash, and its srcset copies (also in
+    `formats`, e.g. ('webp',)) are written unless the store already had it.
+    This runs in the ImageIngestPool worker processes, so it must stay free
+    of GUI state.
+
+    Returns:
+        The file name of the stored image.
+    """
+    from PIL import Image, ImageOps
+
+    img = Image.open(source)
+
+    # Fast path: no decode, no generation loss
+    if is_web_ready(img, Path(source).stat().st_size):
+        img.close()
+        dest, created = store_file(source, gallery_dir, 'jpg')
+        if created:
+            ensure_variants(dest, formats)
+        return dest.name
+
+    # Decode large JPEGs at a reduced DCT scale that still covers the output
+    if img.format == 'JPEG':
+        img.draft(None, (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE))
+
+    # Apply the camera's orientation so portrait photos stay upright
+    img = ImageOps.exif_transpose(img)
+
+    # Convert to RGB if necessary
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    # Resize if too large
+    if max(img.size) > MAX_IMAGE_SIZE:
+        ratio = MAX_IMAGE_SIZE / max(img.size)
+        new_size = tuple(int(dim * ratio) for dim in img.size)
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+    # Save with optimization
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85, optimize=True)
+    dest, created = store_image(buffer.getvalue(), gallery_dir, '.jpg')
+    if created:
+        write_variants(img, dest, formats)
+    return dest.name
+
+
+class ImageIngestPool:
+    """Process pool that turns uploaded photos into gallery JPEGs.
+
+    Decoding, resizing and optimized JPEG encoding are CPU-bound, so a batch
+    of photos is spread over one worker process per core. The pool starts on
+    the first submit and is reused until shutdown().
+    """
+
+    def __init__(self, max_workers=None, formats=()):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.formats = tuple(formats)
+        self._executor = None
+
+    def submit(self, source, gallery_dir):
+        """Queue one photo; returns a Future for the stored file name."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor.submit(process_image, str(source), str(gallery_dir),
+                                     self.formats)
+
+    def run(self, jobs, progress=None):
+        """Process (source, gallery_dir) jobs and wait for all of them.
+
+        progress(done, total) is called as each image finishes.
+
+        Returns:
+            (stored, failed): dicts keyed by str(source) of the stored file
+            name and of the error message.
+        """
+        futures = {self.submit(source, gallery_dir): str(source) for source, gallery_dir in jobs}
+        stored, failed = {}, {}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                stored[futures[future]] = future.result()
+            except Exception as e:
+                failed[futures[future]] = str(e)
+            if progress:
+                progress(done, len(futures))
+        return stored, failed
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def content_name(payload, ext):
+    """Return the store file name for image bytes: 16 hex digits of SHA-256."""
+    return f"{hashlib.sha256(payload).hexdigest()[:16]}{ext}"
+
+
+def file_sha256(path):
+    """Return the SHA-256 of a file's contents as hex, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_content_name(path):
+    """Return the store file name for an existing image file."""
+    path = Path(path)
+    return f"{file_sha256(path)[:16]}{path.suffix.lower()}"
+
+
+def store_image(payload, gallery_dir, ext):
+    """Save image bytes in gallery_dir under their content hash.
+
+    Identical images end up as one file, so cards can share it.
+
+    Returns:
+        (path, created) where created is False if the file was already there.
+    """
+    gallery_dir = Path(gallery_dir)
+    gallery_dir.mkdir(parents=True, exist_ok=True)
+    dest = gallery_dir / content_name(payload, ext)
+    if dest.exists():
+        return dest, False
+
+    write_bytes_atomic(dest, payload)
+    return dest, True
+
+
+def store_file(path, gallery_dir, ext):
+    """Copy an image file into gallery_dir under its content hash.
+
+    The file is hashed and copied in chunks, never loaded whole. `ext` is
+    the stored extension, whatever the upload was called (.jpeg, .JPG...).
+
+    Returns:
+        (path, created) like store_image.
+    """
+    gallery_dir = Path(gallery_dir)
+    gallery_dir.mkdir(parents=True, exist_ok=True)
+    dest = gallery_dir / f"{Path(file_content_name(path)).stem}.{ext}"
+    if dest.exists():
+        return dest, False
+
+    tmp_file = gallery_dir / f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(path, tmp_file)
+    os.replace(tmp_file, dest)
+    return dest, True
+
+
+def gallery_src(name):
+    """Return the card src for a file in assets/gallery/."""
+    return f"./assets/gallery/{name}"
+
+
+def is_gallery_image(website_dir, src):
+    """Return True if src names an existing file in assets/gallery/."""
+    site_path = resolve_image_path(website_dir, src)
+    gallery_dir = Path(website_dir) / "assets" / "gallery"
+    return bool(site_path and site_path.parent == gallery_dir and site_path.is_file())
+
+
+def image_job_for(website_dir, image):
+    """Work out the card src for an image given by the user.
+
+    An image already in assets/gallery/, another existing file of the site
+    or an http(s) or data: URL is kept as given; any other local photo has
+    to be processed into the gallery store first.
+
+    Returns:
+        (src, None) for an image used as given, or (None, job) where job is
+        the (source, gallery_dir) pair to process; its src is gallery_src()
+        of the stored file name.
+
+    Raises:
+        ValueError: If the image is none of these, e.g. a mistyped path.
+    """
+    if is_gallery_image(website_dir, image):
+        return image, None
+    if is_data_uri(image) or urlparse(image).scheme.lower() in ('http', 'https'):
+        return image, None
+
+    path = Path(image).expanduser()
+    site_path = resolve_image_path(website_dir, image)
+    if site_path and not path.is_absolute() and site_path.is_file():
+        return image, None
+    if path.is_file():
+        return None, (path, Path(website_dir) / "assets" / "gallery")
+    raise ValueError(f"Image not found: {image}")
+
+
+def image_src_for(website_dir, image, formats=()):
+    """Like image_job_for, but process the image right away and return its src."""
+    src, job = image_job_for(website_dir, image)
+    if job:
+        src = gallery_src(process_image(*job, formats))
+    return src
+
+
+def available_image_formats(formats=MODERN_FORMATS):
+    """Return the formats in `formats` that the installed Pillow can encode."""
+    from PIL import features
+
+    return tuple(fmt for fmt in formats if features.check(fmt))
+
+
+def variant_path(image_path, width, ext='jpg'):
+    """Return where the `width` pixel copy of a gallery image is stored."""
+    image_path = Path(image_path)
+    return image_path.parent / "variants" / f"{image_path.stem}-{width}w.{ext}"
+
+
+def variant_ladder(width, formats=()):
+    """Return the (width, ext) copies a gallery image `width` pixels wide gets.
+
+    JPEG copies are made for the smaller VARIANT_WIDTHS (the image itself is
+    the largest JPEG); every extra format gets those widths plus full size.
+    """
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    ladder = [(w, 'jpg') for w in widths]
+    for fmt in formats:
+        ladder += [(w, fmt) for w in widths + [width]]
+    return ladder
+
+
+def write_variants(img, image_path, formats=()):
+    """Save the srcset copies of a decoded gallery image."""
+    from PIL import Image
+
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    resized = {img.width: img}
+    for width, ext in variant_ladder(img.width, formats):
+        if width not in resized:
+            height = max(1, round(img.height * width / img.width))
+            resized[width] = img.resize((width, height), Image.Resampling.LANCZOS)
+        path = variant_path(image_path, width, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if ext == 'jpg':
+            resized[width].save(path, 'JPEG', quality=85, optimize=True)
+        else:
+            resized[width].save(path, ext.upper(), **FORMAT_OPTIONS[ext])
+
+
+def ensure_variants(image_path, formats=()):
+    """Make sure the srcset copies of a gallery image exist and are current.
+
+    Copies are only rendered when one is missing or older than the image, so
+    this is a few stat() calls for an image that hasn't changed.
+
+    Returns:
+        (width of the image, list of (width, ext, path) for its copies)
+    """
+    from PIL import Image, ImageOps
+
+    image_path = Path(image_path)
+    with Image.open(image_path) as img:
+        width, height = img.size
+        if img.getexif().get(0x0112) in (5, 6, 7, 8):
+            width, height = height, width  # Stored sideways; shown upright
+
+    ladder = [(w, ext, variant_path(image_path, w, ext))
+              for w, ext in variant_ladder(width, formats)]
+    source_mtime = image_path.stat().st_mtime_ns
+    if any(not path.exists() or path.stat().st_mtime_ns < source_mtime for _, _, path in ladder):
+        with Image.open(image_path) as img:
+            largest = max(w for w, _, _ in ladder)
+            img.draft(None, (largest, largest))
+            write_variants(ImageOps.exif_transpose(img), image_path, formats)
+
+    return width, ladder
+
+
+def image_sources(website_dir, src, formats=()):
+    """Work out the responsive markup for a card image.
+
+    Missing or outdated copies are generated on the way.
+
+    Returns:
+        (srcset for the JPEG <img>, list of {'type', 'srcset'} <source>s for
+        the extra formats); ('', []) if the image has no local file.
+    """
+    path = resolve_image_path(website_dir, src)
+    if not path or not path.is_file():
+        return '', []
+    try:
+        width, ladder = ensure_variants(path, formats)
+    except Exception as e:
+        print(f"Error creating image variants for {src}: {e}")
+        return '', []
+
+    # Variant URLs follow the form of src (relative path or absolute URL)
+    base = src.rsplit('/', 1)[0] if '/' in src else '.'
+
+    def candidates(ext):
+        return [f"{base}/variants/{path.name} {w}w" for w, e, path in ladder if e == ext]
+
+    jpeg = candidates('jpg')
+    srcset = ', '.join(jpeg + [f"{src} {width}w"]) if jpeg else ''
+    sources = [{'type': FORMAT_TYPES[fmt], 'srcset': ', '.join(candidates(fmt))}
+               for fmt in formats]
+    return srcset, sources
+
+
+def format_report(gallery_dir, formats=MODERN_FORMATS):
+    """Compare each image in gallery_dir as JPEG against `formats`.
+
+    Every image is decoded and re-encoded in memory with the settings used
+    for card copies. Quality is the PSNR (dB) of the re-encoded image against
+    the decoded original; higher is closer, above ~40 dB is hard to tell apart.
+
+    Returns:
+        List of dicts with 'name', 'size' (width, height), 'jpg' (bytes of
+        the file) and, per format, (bytes, psnr).
+    """
+    import math
+    from PIL import Image, ImageChops, ImageStat
+
+    formats = available_image_formats(formats)
+    rows = []
+    for path in sorted(Path(gallery_dir).iterdir()):
+        if not path.is_file() or path.suffix.lower() not in ('.jpg', '.jpeg', '.png'):
+            continue
+        with Image.open(path) as img:
+            original = img.convert('RGB')
+        row = {'name': path.name, 'size': original.size, 'jpg': path.stat().st_size}
+        for fmt in formats:
+            buffer = io.BytesIO()
+            original.save(buffer, fmt.upper(), **FORMAT_OPTIONS[fmt])
+            buffer.seek(0)
+            with Image.open(buffer) as encoded:
+                diff = ImageChops.difference(original, encoded.convert('RGB'))
+            mse = sum(rms ** 2 for rms in ImageStat.Stat(diff).rms) / 3
+            psnr = 10 * math.log10(255 ** 2 / mse) if mse else float('inf')
+            row[fmt] = (buffer.getbuffer().nbytes, psnr)
+        rows.append(row)
+    return rows
+
+
+def image_srcset(website_dir, src):
+    """Return the srcset for a card image's JPEG copies, or ''."""
+    return image_sources(website_dir, src)[0]
+
+
+def remove_gallery_image(path):
+    """Delete a gallery image together with its srcset copies."""
+    path = Path(path)
+    for variant in (path.parent / "variants").glob(f"{path.stem}-*w.*"):
+        variant.unlink()
+    path.unlink(missing_ok=True)
+
+
+def _strings(value):
+    """Yield every string in a JSON value (a journal entry, staged card data)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def gallery_references(card_index, website_dir, staged=None):
+    """Return the gallery file names referred to anywhere but the gallery grid.
+
+    Covers the site's text files (every page outside the grid, scripts,
+    styles, the API's data), the card history undo can bring back, the
+    index.html backups a restore can bring back, and staged edits not
+    written yet.
+    """
+    website_dir = Path(website_dir)
+    gallery_dir = website_dir / "assets" / "gallery"
+    referenced = set()
+    for root, dirs, files in os.walk(website_dir):
+        dirs[:] = [name for name in dirs
+                   if name not in GC_SKIP_DIRS and Path(root) / name != gallery_dir]
+        for name in files:
+            path = Path(root) / name
+            if path.suffix.lower() not in TEXT_ASSET_SUFFIXES:
+                continue
+            if path.resolve() == card_index.html_file.resolve():
+                start, end = card_index.grid_span
+                raw = card_index.raw[:start] + card_index.raw[end:]
+            else:
+                try:
+                    raw = path.read_bytes()
+                except OSError as e:
+                    print(f"Error reading {path}: {e}")
+                    continue
+            referenced.update(GALLERY_REF_RE.findall(raw.decode('utf-8', errors='ignore')))
+
+    values = []
+    if card_index.journal is not None:
+        card_index.journal.refresh()
+        values.extend(card_index.journal.entries)
+    if staged is not None:
+        values.extend(data for data in staged.changes.values() if data)
+    for value in values:
+        for text in _strings(value):
+            referenced.update(GALLERY_REF_RE.findall(text))
+
+    store = BackupStore(website_dir / "backups")
+    for snapshot in store.snapshots():
+        try:
+            raw = store.read(snapshot['id'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading backup {snapshot.get('id')}: {e}")
+            continue
+        referenced.update(GALLERY_REF_RE.findall(raw.decode('utf-8', errors='ignore')))
+    return referenced
+
+
+def collect_garbage(card_index, website_dir, dry_run=False, min_age=GC_MIN_AGE, staged=None):
+    """Deduplicate the gallery images and delete the ones nothing uses.
+
+    First every card image in assets/gallery/ that isn't stored under its
+    content hash yet is moved into the store (identical files collapse into
+    one), then files nothing refers to (see gallery_references; staged is
+    the GUI's StagedEdits) are removed with their srcset copies. Card edits
+    are written once.
+
+    Returns:
+        (moved, removed): moved is a list of (computer id, old src, new src);
+        removed a list of deleted paths (what would be deleted if dry_run).
+    """
+    website_dir = Path(website_dir)
+    gallery_dir = website_dir / "assets" / "gallery"
+    if not gallery_dir.is_dir():
+        return [], []
+
+    moved = []
+    names = {}  # old file name -> content-addressed name
+    for computer in card_index.computers():
+        src = computer['image']
+        path = resolve_image_path(website_dir, src)
+        if not path or path.parent != gallery_dir or not path.is_file():
+            continue
+        if path.name not in names:
+            names[path.name] = file_content_name(path)
+        if names[path.name] != path.name:
+            new_src = src.rsplit('/', 1)[0] + '/' + names[path.name]
+            moved.append((computer['id'], src, new_src))
+
+    if moved and not dry_run:
+        for old_name, new_name in names.items():
+            if old_name != new_name and not (gallery_dir / new_name).exists():
+                shutil.copy2(gallery_dir / old_name, gallery_dir / new_name)
+        with card_index.batch():
+            for computer_id, _, new_src in moved:
+                card_index.set_image_src(computer_id, new_src)
+
+    # Keep the card images (as they are after the move) and gallery files
+    # named anywhere else
+    card_refs = set(card_index.image_refcounts())
+    if dry_run:
+        card_refs = {names.get(name, name) for name in card_refs}
+    referenced = card_refs | gallery_references(card_index, website_dir, staged)
+    referenced_stems = {Path(name).stem for name in referenced}
+
+    removed = []
+    now = time.time()
+    for path in sorted(gallery_dir.iterdir()):
+        if not path.is_file() or path.name in referenced or path.name.startswith('.'):
+            continue
+        if now - path.stat().st_mtime < min_age and path.name not in names:
+            continue
+        removed.append(path)
+        if not dry_run:
+            remove_gallery_image(path)
+
+    # srcset copies whose image is gone
+    variants_dir = gallery_dir / "variants"
+    if variants_dir.is_dir():
+        for path in sorted(variants_dir.iterdir()):
+            if path.is_file() and path.stem.rsplit('-', 1)[0] not in referenced_stems:
+                removed.append(path)
+                if not dry_run:
+                    path.unlink()
+
+    return moved, removed
@@ -0,0 +1,773 @@
+"""
+Gallery card index for Computer Store Kansas Website
+CardIndex, through which every card edit goes, and StagedEdits, which hold
+edits back until they are applied in one write.
+"""
+
+from bs4 import BeautifulSoup
+import copy
+import html
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from gallery_backups import page_lock, write_bytes_atomic
+from gallery_cards import (
+    CardFilterIndex, create_card_element, is_custom_card, next_computer_id, parse_card,
+    scan_card_spans, set_card_image, update_card_element,
+)
+from gallery_images import available_image_formats, image_sources, resolve_image_path
+from gallery_inventory import InventoryDatabase, same_card_fields
+
+
+class CardIndex:
+    """In-memory index of the gallery cards in index.html.
+
+    Each card is tracked by its data-computer-id together with its data, its
+    tag in the page's BeautifulSoup tree and its byte range inside
+    #gallery-grid. Adding, updating and deleting cards edits the tree in
+    place and updates the index entry, so no edit ever re-reads or re-parses
+    the whole page.
+
+    With an InventoryStore (or InventoryDatabase) attached, the card data is
+    read from the store instead of being scraped from the page, and the
+    store is rewritten with every page write. The tree is then only parsed once something needs it
+    (the prettify writer); splice edits work on card byte ranges alone.
+
+    Write modes:
+        splice   - render only the changed card and splice it into the
+                   original file bytes; everything else stays byte-identical.
+        prettify - re-serialize the whole page with soup.prettify().
+
+    Edits made inside `with card_index.batch():` are written once, when the
+    block ends. With a CardJournal attached, every card change is appended
+    to it once written, a batch as one undo step. With responsive_images on,
+    every card written gets a srcset of its image's smaller copies, plus a
+    <picture> with a <source> for each of image_formats (e.g. ('avif',
+    'webp')) the installed Pillow can encode.
+    """
+
+    WRITE_MODES = ('splice', 'prettify')
+
+    def __init__(self, html_file, write_mode='splice', responsive_images=True, image_formats=(),
+                 journal=None, inventory=None):
+        if write_mode not in self.WRITE_MODES:
+            raise ValueError(f"Unknown write mode: {write_mode}")
+        self.html_file = Path(html_file)
+        self.write_mode = write_mode
+        self.responsive_images = responsive_images
+        self.image_formats = available_image_formats(image_formats) if image_formats else ()
+        self.journal = journal
+        self.inventory = inventory
+        self.lock = page_lock(self.html_file)
+        self._soup = None
+        self._grid = None
+        self._loaded = False
+        self.inventory_state = None  # What load found, see InventoryStore.state
+        self.raw = b''
+        self.grid_span = None
+        # computer id -> {'data', 'tag', 'span', 'custom'}; 'tag' is None until
+        # the tree is parsed, 'custom' marks markup create_card_element can't make
+        self.cards = {}
+        self.filters = CardFilterIndex()
+        self.file_stat = None
+        self.parse_count = 0
+        self.write_count = 0
+        self._batch_depth = 0
+        self._pending_write = None  # None, 'raw' or 'tree' while batching
+        self._pending_changes = []  # Journal entries waiting for the write
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def soup(self):
+        """The page's BeautifulSoup tree, parsed on first use."""
+        if self._soup is None:
+            self._parse_tree()
+        return self._soup
+
+    @property
+    def grid(self):
+        if self._soup is None:
+            self._parse_tree()
+        return self._grid
+
+    def is_stale(self):
+        """Return True if index.html changed on disk since it was indexed."""
+        if not self.loaded:
+            return True
+        try:
+            stat = self.html_file.stat()
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != self.file_stat
+
+    def load(self, prefer=None):
+        """Read index.html, building the card index from scratch.
+
+        The card data comes from the inventory store when it matches the
+        page. If only the store was changed (by hand, or a merge), the grid
+        is first regenerated from it; if the page was changed, the page is
+        parsed and the store rewritten from it. Without a store the page is
+        simply parsed: only 'inventory migrate' creates one, so read-only
+        commands never leave a new file behind.
+
+        If both were changed, or the store can't be read, nothing is written
+        and RuntimeError is raised (inventory_state tells which), unless
+        prefer says which side to keep: 'page' rebuilds the store from the
+        page, 'inventory' regenerates the grid from the store.
+
+        Returns:
+            False if the page has no #gallery-grid, True otherwise.
+        """
+        raw = self.html_file.read_bytes()
+        records = None
+        if self.inventory is not None:
+            grid_span, spans = scan_card_spans(raw)
+            if grid_span is None:
+                return False
+            state, records = self.inventory.state(raw[grid_span[0]:grid_span[1]])
+            self.inventory_state = state
+            state = self._resolve_inventory_state(state, prefer)
+            if state == 'store-changed':
+                raw = self._generate_grid(raw, grid_span, records)
+            elif state != 'in-sync':
+                records = None
+            elif [record['id'] for record in records] != [span[0] for span in spans]:
+                records = None  # Same bytes but not the same cards; don't trust it
+
+        self._soup = self._grid = None
+        self.cards = {}
+        self.filters.clear()
+        self._pending_changes = []
+        if records is not None:
+            for record in records:
+                data = {k: v for k, v in record.items() if k != 'markup'}
+                self.cards[data['id']] = {'data': data, 'tag': None, 'span': None,
+                                          'custom': 'markup' in record}
+                self.filters.add(data)
+            self._set_raw(raw)
+            self._loaded = True
+            if state == 'store-changed':
+                self.save_inventory()
+            return True
+
+        soup = BeautifulSoup(raw.decode('utf-8'), 'html.parser')
+        self.parse_count += 1
+        grid = soup.find('div', {'id': 'gallery-grid'})
+        if not grid:
+            return False
+
+        self._soup, self._grid = soup, grid
+        for card in grid.find_all('div', {'class': 'gallery-card'}, recursive=False):
+            data = parse_card(card)
+            if data:
+                self.cards[data['id']] = {'data': data, 'tag': card, 'span': None,
+                                          'custom': is_custom_card(card, data)}
+                self.filters.add(data)
+        self._set_raw(raw)
+        self._loaded = True
+        if self.inventory is not None and self.inventory.exists:
+            self.save_inventory()
+        return True
+
+    def _resolve_inventory_state(self, state, prefer):
+        """Turn 'conflict' and 'damaged' into what load should do, or refuse."""
+        name = self.inventory.path.name
+        if state == 'conflict':
+            if prefer is None:
+                raise RuntimeError(f"index.html and {name} were both changed since they "
+                                   f"were last in sync; choose which one to keep")
+            return 'store-changed' if prefer == 'inventory' else 'page-changed'
+        if state == 'damaged':
+            if prefer != 'page':
+                raise RuntimeError(f"{name} can't be read; fix it, or rebuild it from "
+                                   f"index.html")
+            return 'page-changed'
+        return state
+
+    def _parse_tree(self):
+        """Parse the current page bytes and attach each card's tag."""
+        soup = BeautifulSoup(self.raw.decode('utf-8'), 'html.parser')
+        self.parse_count += 1
+        self._soup = soup
+        self._grid = soup.find('div', {'id': 'gallery-grid'})
+        for card in self._grid.find_all('div', {'class': 'gallery-card'}, recursive=False):
+            entry = self.cards.get(card.get('data-computer-id'))
+            if entry:
+                entry['tag'] = card
+
+    def _card_tag(self, entry):
+        """Return a card's tag; without a tree, parse just the card's own bytes."""
+        if entry['tag'] is None:
+            start, end = entry['span']
+            markup = self.raw[start:end].decode('utf-8')
+            entry['tag'] = BeautifulSoup(markup, 'html.parser').find('div')
+        return entry['tag']
+
+    def _tag_factory(self):
+        """Return a soup to create new tags with, without parsing the page for it."""
+        return self._soup if self._soup is not None else BeautifulSoup('', 'html.parser')
+
+    def _prepare_edit(self):
+        """Parse the tree before an edit the splice writer can't do."""
+        if self._soup is None and not self._can_splice():
+            self._parse_tree()
+
+    def _generate_grid(self, raw, grid_span, records):
+        """Write index.html with #gallery-grid rebuilt from inventory records.
+
+        Records whose hand-made markup no longer matches their fields lose it.
+        """
+        start, end = grid_span
+        open_tag = raw.rfind(b'<', 0, start)
+        line_start = raw.rfind(b'\n', 0, open_tag) + 1
+        grid_indent = raw[line_start:open_tag] if not raw[line_start:open_tag].strip() else b''
+        indent = grid_indent + b' '
+        newline = b'\r\n' if b'\r\n' in raw[:1024] else b'\n'
+
+        factory = BeautifulSoup('', 'html.parser')
+        parts = []
+        for record in records:
+            tag = None
+            if record.get('markup'):
+                tag = BeautifulSoup(record['markup'], 'html.parser').find('div')
+                # Hand-made markup only while it still shows the record's fields
+                if tag is None or not same_card_fields(parse_card(tag), record):
+                    tag = None
+                    del record['markup']
+            if tag is None:
+                tag = create_card_element(factory, record)
+            lines = tag.prettify().encode('utf-8').rstrip(b'\n').split(b'\n')
+            parts.append(newline + indent + (newline + indent).join(
+                line.rstrip(b'\r') for line in lines))
+
+        raw = raw[:start] + b''.join(parts) + newline + grid_indent + raw[end:]
+        with self.lock:
+            write_bytes_atomic(self.html_file, raw)
+        return raw
+
+    @contextmanager
+    def batch(self):
+        """Group edits so index.html is written once at the end of the block."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush()
+
+    def computers(self):
+        """Return the indexed computers in page order."""
+        return [entry['data'] for entry in self.cards.values()]
+
+    def get(self, computer_id):
+        entry = self.cards.get(computer_id)
+        return entry['data'] if entry else None
+
+    def next_id(self, taken=()):
+        """Return the next free computer ID, past any ID in taken as well.
+
+        An InventoryDatabase hands it out from its sequence; otherwise the
+        cards on the page are scanned.
+        """
+        if not isinstance(self.inventory, InventoryDatabase):
+            return next_computer_id(self.computers() + [{'id': i} for i in taken])
+        ids = [int(self.inventory.next_id())] + [int(i) + 1 for i in taken if i.isdigit()]
+        return str(max(ids))
+
+    def query(self, filters=None, text=''):
+        """Return the computers matching filters and search text, in page order.
+
+        See CardFilterIndex.query for the arguments.
+        """
+        return [self.cards[computer_id]['data']
+                for computer_id in self.filters.query(filters, text)]
+
+    def add(self, data):
+        """Append a new card to the gallery."""
+        if data['id'] in self.cards:
+            raise ValueError(f"Computer ID {data['id']} already exists")
+        data['srcset'], data['sources'] = self._image_sources(data['image'])
+        self._prepare_edit()
+        with self.batch():
+            self._insert_card(create_card_element(self._tag_factory(), data), data)
+            self._record(data['id'], None)
+
+    def _insert_card(self, tag, data, position=None, custom=False):
+        """Put a card tag into the grid before the card at `position` (default: last)."""
+        order = list(self.cards)
+        entry = {'data': data, 'tag': tag, 'span': None, 'custom': custom}
+        if position is not None and position < len(order):
+            self._insert_card_before(entry, order, position)
+            return
+
+        if self._soup is not None:
+            self._grid.append(tag)
+        self.filters.add(data)
+
+        if not self._can_splice():
+            self.cards[data['id']] = entry
+            self._write()
+            return
+
+        # Insert after the last card, or at the top of an empty grid
+        spans = [e['span'] for e in self.cards.values()]
+        if spans:
+            last_start, pos = max(spans, key=lambda span: span[1])
+            indent = self._line_indent(last_start)
+        else:
+            pos = self.grid_span[0]
+            grid_open = self.raw.rfind(b'<', 0, pos)
+            indent = self._line_indent(grid_open) + b' '
+
+        markup = self.render_card(tag, indent)
+        prefix = b'\n' + indent
+        self._splice(pos, pos, prefix + markup)
+        entry['span'] = (pos + len(prefix), pos + len(prefix) + len(markup))
+        self.cards[data['id']] = entry
+
+    def _insert_card_before(self, entry, order, position):
+        tag, data = entry['tag'], entry['data']
+        next_entry = self.cards[order[position]]
+        if self._soup is not None:
+            next_entry['tag'].insert_before(tag)
+
+        if self._can_splice():
+            # The new card takes the next card's place, on a line of its own
+            start = next_entry['span'][0]
+            indent = self._line_indent(start)
+            markup = self.render_card(tag, indent)
+            self._splice(start, start, markup + self._newline() + indent)
+            entry['span'] = (start, start + len(markup))
+
+        order.insert(position, data['id'])
+        self.cards = {computer_id: self.cards.get(computer_id, entry) for computer_id in order}
+        self.filters.add(data)
+        self.filters.reorder(order)
+        if not entry['span']:
+            self._write()
+
+    def update(self, data):
+        """Replace an existing card with new data.
+
+        A card with hand-made markup keeps it; see update_card_element.
+        """
+        entry = self.cards.get(data['id'])
+        if not entry:
+            raise KeyError(data['id'])
+        before = self._card_state(data['id'])
+        data['srcset'], data['sources'] = self._image_sources(data['image'])
+        self._prepare_edit()
+        custom = False
+        if entry['custom']:
+            # Hand-made markup (sale prices, extra spec rows) is edited in
+            # place, not re-rendered away
+            tag = copy.copy(self._card_tag(entry))
+            update_card_element(self._tag_factory(), tag, entry['data'], data)
+            data = parse_card(tag)
+            custom = is_custom_card(tag, data)
+        else:
+            tag = create_card_element(self._tag_factory(), data)
+        with self.batch():
+            self._replace_card(entry, tag, data, custom)
+            self._record(data['id'], before)
+
+    def _replace_card(self, entry, tag, data, custom=False):
+        if self._soup is not None:
+            entry['tag'].replace_with(tag)
+        entry['tag'] = tag
+        entry['custom'] = custom
+        self.filters.remove(entry['data'], keep_position=True)
+        self.filters.add(data)
+        entry['data'] = data
+
+        if not self._can_splice():
+            self._write()
+            return
+
+        start, end = entry['span']
+        markup = self.render_card(tag, self._line_indent(start))
+        self._splice(start, end, markup)
+        entry['span'] = (start, start + len(markup))
+
+    def delete(self, computer_id):
+        """Remove a card from the gallery."""
+        if computer_id not in self.cards:
+            raise KeyError(computer_id)
+        before = self._card_state(computer_id)
+        self._prepare_edit()
+        with self.batch():
+            self._remove_card(computer_id)
+            self._record(computer_id, before)
+
+    def _remove_card(self, computer_id):
+        entry = self.cards.pop(computer_id)
+        if entry['tag'] is not None:
+            entry['tag'].decompose()
+        self.filters.remove(entry['data'])
+
+        if not self._can_splice() or not entry['span']:
+            self._write()
+            return
+
+        # Remove the card together with the line break and indent before it
+        start, end = entry['span']
+        indent = self._line_indent(start)
+        if indent or self.raw[start - 1:start] == b'\n':
+            start -= len(indent)
+            if self.raw[start - 1:start] == b'\n':
+                start -= 1
+            if self.raw[start - 1:start] == b'\r':
+                start -= 1
+        self._splice(start, end, b'')
+
+    def set_image_src(self, computer_id, src):
+        """Point a card's <img> at a new src, leaving the rest of the card as is."""
+        entry = self.cards.get(computer_id)
+        if not entry:
+            raise KeyError(computer_id)
+        before = self._card_state(computer_id)
+        self._prepare_edit()
+        with self.batch():
+            self._set_image_src(entry, src)
+            self._record(computer_id, before)
+
+    def _set_image_src(self, entry, src):
+        computer_id = entry['data']['id']
+        old_src = entry['data']['image']
+        img = self._card_tag(entry).find('img')
+        if img is None:
+            raise ValueError(f"Card {computer_id} has no image")
+        data = entry['data']
+        srcset, sources = self._image_sources(src)
+        rerender = bool(srcset or sources or data.get('srcset') or data.get('sources'))
+        set_card_image(self._tag_factory(), img, src, srcset, sources)
+        data['image'], data['srcset'], data['sources'] = src, srcset, sources
+
+        if not self._can_splice():
+            self._write()
+            return
+
+        # Replace just the attribute value inside the card's byte range
+        start, end = entry['span']
+        for candidate in (() if rerender else (old_src, html.escape(old_src))):
+            old_bytes = f'src="{candidate}"'.encode('utf-8')
+            pos = self.raw.find(old_bytes, start, end)
+            if pos != -1:
+                new_bytes = f'src="{html.escape(src)}"'.encode('utf-8')
+                self._splice(pos, pos + len(old_bytes), new_bytes)
+                entry['span'] = (start, end + len(new_bytes) - len(old_bytes))
+                return
+
+        # srcset changed too, or src is written in an unexpected form
+        markup = self.render_card(self._card_tag(entry), self._line_indent(start))
+        self._splice(start, end, markup)
+        entry['span'] = (start, start + len(markup))
+
+    def restore_card(self, computer_id, state):
+        """Put a card back the way a journal entry recorded it.
+
+        `state` is a before/after value from CardJournal; None removes the
+        card. The card's own markup is restored, not re-rendered from its
+        data, so hand-made details such as sale prices come back too.
+        """
+        before = self._card_state(computer_id)
+        self._prepare_edit()
+        with self.batch():
+            if state is None:
+                if computer_id in self.cards:
+                    self._remove_card(computer_id)
+            else:
+                tag = BeautifulSoup(state['markup'], 'html.parser').find(
+                    'div', class_='gallery-card')
+                data = parse_card(tag)
+                custom = is_custom_card(tag, data)
+                if computer_id in self.cards:
+                    self._replace_card(self.cards[computer_id], tag, data, custom)
+                else:
+                    self._insert_card(tag, data, state['index'], custom)
+            self._record(computer_id, before)
+
+    def card_state(self, computer_id):
+        """Return a card's data, markup and grid position, or None if it doesn't exist."""
+        entry = self.cards.get(computer_id)
+        if not entry:
+            return None
+        return {
+            'data': dict(entry['data']),
+            'markup': self.render_card(self._card_tag(entry)).decode('utf-8'),
+            'index': list(self.cards).index(computer_id),
+        }
+
+    def _card_state(self, computer_id):
+        return self.card_state(computer_id) if self.journal is not None else None
+
+    def _record(self, computer_id, before):
+        """Queue a journal entry for a changed card; it is written with the page."""
+        if self.journal is None:
+            return
+        after = self.card_state(computer_id)
+        if before == after:
+            return
+        self._pending_changes.append({'id': computer_id, 'before': before, 'after': after})
+        if not self._batch_depth:
+            with self.lock:
+                self._flush_changes()
+
+    def _flush_changes(self):
+        changes, self._pending_changes = self._pending_changes, []
+        if changes and self.journal is not None:
+            self.journal.append(changes)
+
+    def _image_sources(self, src):
+        if not self.responsive_images:
+            return '', []
+        return image_sources(self.html_file.parent, src, self.image_formats)
+
+    def render_card(self, tag, indent=b''):
+        """Render a card tag as prettified bytes whose lines sit at `indent`.
+
+        The first line is not indented; it is placed where the old card began.
+        """
+        lines = tag.prettify().encode('utf-8').rstrip(b'\n').split(b'\n')
+        return (self._newline() + indent).join(line.rstrip(b'\r') for line in lines)
+
+    def _newline(self):
+        return b'\r\n' if b'\r\n' in self.raw[:1024] else b'\n'
+
+    def _can_splice(self):
+        """Return True if the splice writer has byte ranges to work with."""
+        return (self.write_mode == 'splice' and self.grid_span is not None
+                and self._pending_write != 'tree'
+                and all(e['span'] for e in self.cards.values()))
+
+    def _line_indent(self, pos):
+        """Return the whitespace between the previous line break and `pos`."""
+        line_start = self.raw.rfind(b'\n', 0, pos) + 1
+        prefix = self.raw[line_start:pos]
+        return prefix if not prefix.strip() else b''
+
+    def _splice(self, start, end, markup):
+        """Replace raw[start:end] with `markup` and write the result.
+
+        Byte ranges of the cards after the splice point are shifted instead of
+        rescanned, so the cost grows with the card, not the page. The edit
+        methods splice inside batch(), so the page and the inventory are only
+        written once the card's entry, byte range and place are recorded.
+        """
+        raw = self.raw[:start] + markup + self.raw[end:]
+        delta = len(markup) - (end - start)
+        if delta:
+            for entry in self.cards.values():
+                span = entry['span']
+                if span and span[0] >= end:
+                    entry['span'] = (span[0] + delta, span[1] + delta)
+            self.grid_span = (self.grid_span[0], self.grid_span[1] + delta)
+        self.raw = raw
+
+        if self._batch_depth:
+            self._pending_write = self._pending_write or 'raw'
+            return
+        self._write_raw()
+
+    def _write(self):
+        """Serialize the tree to index.html and refresh the byte ranges."""
+        if self._batch_depth:
+            self._pending_write = 'tree'
+            return
+        raw = self.soup.prettify().encode('utf-8')
+        with self.lock:
+            self._save(raw)
+            self._set_raw(raw)
+            self._save_inventory()
+
+    def _write_raw(self):
+        with self.lock:
+            self._save(self.raw)
+            self._update_file_stat()
+            self._save_inventory()
+
+    def save_inventory(self):
+        """Write the inventory store from the loaded cards (e.g. to migrate a page)."""
+        with self.lock:
+            self._save_inventory(create=True)
+
+    def _save_inventory(self, create=False):
+        """Rewrite the inventory store from the index, after the page it matches.
+
+        A site without a store stays page-only unless create is set.
+        """
+        if self.inventory is None or not (create or self.inventory.exists):
+            return
+        records = []
+        for computer_id, entry in self.cards.items():
+            record = dict(entry['data'])
+            if entry.get('custom'):
+                record['markup'] = self.card_bytes(computer_id).decode('utf-8')
+            records.append(record)
+        start, end = self.grid_span
+        self.inventory.write(records, self.raw[start:end])
+
+    def _save(self, raw):
+        """Atomically replace index.html, unless another program changed it since it was read.
+
+        Writing over someone else's change would lose it, so the edit is
+        refused; the index is then stale and the next edit reloads it.
+        """
+        if self.is_stale():
+            raise RuntimeError("index.html was changed by another program; "
+                               "reload and make the change again")
+        write_bytes_atomic(self.html_file, raw)
+        self.write_count += 1
+
+    def _flush(self):
+        """Write the edits a batch held back."""
+        pending, self._pending_write = self._pending_write, None
+        with self.lock:
+            if pending == 'tree':
+                self._write()
+            elif pending == 'raw':
+                self._write_raw()
+            self._flush_changes()
+
+    def _set_raw(self, raw):
+        """Record the page bytes, card byte ranges and file signature."""
+        self.raw = raw
+        self.grid_span, spans = scan_card_spans(raw)
+        for card_id, start, end in spans:
+            if card_id in self.cards:
+                self.cards[card_id]['span'] = (start, end)
+        self._update_file_stat()
+
+    def _update_file_stat(self):
+        stat = self.html_file.stat()
+        self.file_stat = (stat.st_mtime_ns, stat.st_size)
+
+    def image_refcounts(self):
+        """Return a Counter of assets/gallery/ file name -> cards using it."""
+        gallery_dir = self.html_file.parent / "assets" / "gallery"
+        counts = Counter()
+        for entry in self.cards.values():
+            path = resolve_image_path(self.html_file.parent, entry['data']['image'])
+            if path and path.parent == gallery_dir:
+                counts[path.name] += 1
+        return counts
+
+    def card_bytes(self, computer_id):
+        """Return the raw markup of a card as it appears in the file."""
+        start, end = self.cards[computer_id]['span']
+        return self.raw[start:end]
+
+
+class StagedEdits:
+    """Card edits held in memory until they are applied in one write.
+
+    Each card keeps only its latest staged state (its data, or None to
+    delete it), so editing one card ten times still writes it once. apply()
+    runs everything in one CardIndex.batch(): one page write and one
+    journal group, undone as a single step.
+    """
+
+    def __init__(self):
+        self.changes = {}  # computer id -> staged data, None to delete
+        self.new_ids = set()  # Staged cards that aren't on the page yet
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __contains__(self, computer_id):
+        return computer_id in self.changes
+
+    def stage(self, card_index, data):
+        """Stage a new card or new data for an existing one."""
+        if data['id'] not in card_index.cards:
+            self.new_ids.add(data['id'])
+        self.changes[data['id']] = data
+
+    def stage_delete(self, card_index, computer_id):
+        """Stage removing a card; a staged card that was never written just goes away."""
+        if computer_id in self.new_ids:
+            self.discard(computer_id)
+        else:
+            self.changes[computer_id] = None
+
+    def discard(self, computer_id=None):
+        """Drop the staged change to one card, or all of them."""
+        if computer_id is None:
+            self.changes.clear()
+            self.new_ids.clear()
+        else:
+            self.changes.pop(computer_id, None)
+            self.new_ids.discard(computer_id)
+
+    def get(self, card_index, computer_id):
+        """Return a card's data as it will be once applied (None if deleted)."""
+        if computer_id in self.changes:
+            return self.changes[computer_id]
+        return card_index.get(computer_id)
+
+    def view(self, card_index):
+        """Return the computers as they will be once applied, in page order."""
+        computers = []
+        for data in card_index.computers():
+            data = self.changes.get(data['id'], data)
+            if data is not None:
+                computers.append(data)
+        computers.extend(self.changes[computer_id] for computer_id in self.changes
+                         if computer_id in self.new_ids)
+        return computers
+
+    def query(self, card_index, filters=None, text=''):
+        """Like CardIndex.query, over the computers as they will be once applied."""
+        if not self.changes:
+            return card_index.query(filters, text)
+        staged = CardFilterIndex()
+        for data in self.changes.values():
+            if data is not None:
+                staged.add(data)
+        hits = set(card_index.filters.query(filters, text)) - self.changes.keys()
+        hits.update(staged.query(filters, text))
+        return [data for data in self.view(card_index) if data['id'] in hits]
+
+    def summary(self):
+        """Return a short description such as "2 added, 5 updated, 1 deleted"."""
+        deleted = sum(1 for data in self.changes.values() if data is None)
+        added = len(self.new_ids)
+        updated = len(self.changes) - added - deleted
+        parts = [f"{count} {verb}" for count, verb in
+                 ((added, "added"), (updated, "updated"), (deleted, "deleted")) if count]
+        return ", ".join(parts) or "no changes"
+
+    def apply(self, card_index):
+        """Write every staged edit to the page in one pass.
+
+        Edits that fail (e.g. a card deleted meanwhile) stay staged; the rest
+        are cleared once the page is written.
+
+        Returns:
+            (list of applied ids, list of (id, error message))
+        """
+        applied, errors = [], []
+        with card_index.batch():
+            for computer_id, data in self.changes.items():
+                try:
+                    if data is None:
+                        if computer_id in card_index.cards:
+                            card_index.delete(computer_id)
+                    elif computer_id in self.new_ids:
+                        card_index.add(data)
+                    else:
+                        card_index.update(data)
+                    applied.append(computer_id)
+                except KeyError:
+                    errors.append((computer_id, f"Computer {computer_id} no longer exists"))
+                except ValueError as e:
+                    errors.append((computer_id, str(e)))
+
+        for computer_id in applied:
+            self.discard(computer_id)
+        return applied, errors
@@ -0,0 +1,378 @@
+"""
+Gallery inventory for Computer Store Kansas Website
+The card data behind the gallery grid, kept in inventory.jsonl or, with
+price and history queries, in the SQLite database inventory.db.
+"""
+
+import re
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from gallery_backups import write_bytes_atomic
+from gallery_cards import badge_text_for, normalize_specs
+
+INVENTORY_FIELDS = ('id', 'type', 'category', 'title', 'price', 'image', 'badge_text',
+                    'specs', 'alt', 'srcset', 'sources')
+INVENTORY_VERSION = 1
+INVENTORY_FILE = "inventory.jsonl"
+
+INVENTORY_DB_FILE = "inventory.db"
+
+# Page cards, plus every card removed from the page (position NULL) as history.
+# record holds the card as in inventory.jsonl; the other columns are copies
+# of it to query on (search: lowercased title and spec values). Triggers
+# count every change so hand edits can be detected.
+INVENTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    title TEXT NOT NULL,
+    badge TEXT NOT NULL,
+    search TEXT NOT NULL,
+    price_cents INTEGER,
+    position INTEGER,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    removed TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS listings_page ON listings(position) WHERE position IS NOT NULL;
+CREATE INDEX IF NOT EXISTS listings_stale ON listings(updated) WHERE position IS NOT NULL;
+CREATE INDEX IF NOT EXISTS listings_type ON listings(type, price_cents);
+CREATE INDEX IF NOT EXISTS listings_category ON listings(category, price_cents);
+CREATE INDEX IF NOT EXISTS listings_price ON listings(price_cents);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+INSERT OR IGNORE INTO meta VALUES ('version', '1'), ('next_id', '1'),
+    ('data_version', '0'), ('synced_version', '0'), ('grid_sha256', '');
+CREATE TRIGGER IF NOT EXISTS listings_insert AFTER INSERT ON listings BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'data_version';
+END;
+CREATE TRIGGER IF NOT EXISTS listings_update AFTER UPDATE ON listings BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'data_version';
+END;
+CREATE TRIGGER IF NOT EXISTS listings_delete AFTER DELETE ON listings BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'data_version';
+END;
+"""
+
+PRICE_RE = re.compile(r'\$\s*(\d[\d,]*)(?:\.(\d{1,2}))?')
+
+LISTING_SORTS = {
+    'page': 'position, removed DESC',
+    'price': 'price_cents, position',
+    'price-desc': 'price_cents DESC, position',
+    'updated': 'updated, position',
+}
+
+
+def same_card_fields(parsed, record):
+    """Return True if card data parsed from markup matches an inventory record."""
+    return parsed is not None and all(
+        parsed.get(field) == record.get(field) for field in INVENTORY_FIELDS)
+
+
+def price_cents(price):
+    """Return a "$1,299.99" price as cents, or None if it has no dollar amount.
+
+    Sale cards read as "$750.00$675.00Save 10%"; the last amount (the sale
+    price) is the one a customer pays.
+    """
+    amounts = PRICE_RE.findall(price or '')
+    if not amounts:
+        return None
+    dollars, cents = amounts[-1]
+    return int(dollars.replace(',', '')) * 100 + int(cents.ljust(2, '0') or 0)
+
+
+def sort_by_price(computers, price_min=None, price_max=None, sort='page'):
+    """Filter computers to a price range in cents and order them by price.
+
+    The in-memory twin of InventoryDatabase.query, for the JSON Lines store
+    and for staged edits. Cards without a price sort last.
+    """
+    if price_min is not None or price_max is not None:
+        def in_range(computer):
+            cents = price_cents(computer['price'])
+            return (cents is not None and (price_min is None or cents >= price_min)
+                    and (price_max is None or cents <= price_max))
+        computers = [computer for computer in computers if in_range(computer)]
+    if sort in ('price', 'price-desc'):
+        priced = [c for c in computers if price_cents(c['price']) is not None]
+        unpriced = [c for c in computers if price_cents(c['price']) is None]
+        priced.sort(key=lambda c: price_cents(c['price']), reverse=sort == 'price-desc')
+        computers = priced + unpriced
+    return computers
+
+
+class InventoryStore:
+    """The gallery's cards as JSON Lines, the source the grid is written from.
+
+    The first line is a header holding the SHA-256 of the #gallery-grid bytes
+    the records were written with and of the record lines themselves, so a
+    load can tell which side changed since: the page (the web admin, a hand
+    edit) or the store (a hand edit, a git merge). Each further line is one
+    card in page order; cards with hand-made markup keep it under 'markup'.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @property
+    def exists(self):
+        return self.path.exists()
+
+    def read(self):
+        """Return (header, records, records_sha256), or None if there is no usable store."""
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        head, _, body = raw.partition(b'\n')
+        try:
+            header = json.loads(head)
+            records = [self._complete(json.loads(line)) for line in body.splitlines() if line.strip()]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Error reading {self.path.name}: {e}")
+            return None
+        if header.get('version') != INVENTORY_VERSION:
+            print(f"Error reading {self.path.name}: unknown version {header.get('version')}")
+            return None
+        return header, records, hashlib.sha256(body).hexdigest()
+
+    def state(self, grid_bytes):
+        """Compare the store with the page's grid.
+
+        Returns:
+            (state, records): state is 'in-sync', 'store-changed' (regenerate
+            the grid from records), 'page-changed' (rebuild the store from
+            the page; records is then None), 'missing' (no store, the page
+            is used alone until one is migrated), 'conflict' when both
+            were changed and either way would lose an edit, or 'damaged'
+            when the store can't be read (e.g. left with merge markers).
+        """
+        if not self.exists:
+            return 'missing', None
+        stored = self.read()
+        if stored is None:
+            return 'damaged', None
+        header, records, records_sha = stored
+        store_changed = header.get('records_sha256') != records_sha
+        page_changed = header.get('grid_sha256') != hashlib.sha256(grid_bytes).hexdigest()
+        if store_changed and page_changed:
+            return 'conflict', records
+        if store_changed:
+            return 'store-changed', records
+        if page_changed:
+            return 'page-changed', None
+        return 'in-sync', records
+
+    def write(self, records, grid_bytes):
+        """Write records as the inventory of a grid whose bytes are grid_bytes."""
+        lines = [json.dumps(self._ordered(record), ensure_ascii=False) for record in records]
+        body = ''.join(line + '\n' for line in lines).encode('utf-8')
+        header = {
+            'version': INVENTORY_VERSION,
+            'count': len(lines),
+            'grid_sha256': hashlib.sha256(grid_bytes).hexdigest(),
+            'records_sha256': hashlib.sha256(body).hexdigest(),
+        }
+        write_bytes_atomic(self.path, json.dumps(header).encode('utf-8') + b'\n' + body)
+
+    @staticmethod
+    def _ordered(record):
+        ordered = {field: record[field] for field in INVENTORY_FIELDS if field in record}
+        ordered.update((k, v) for k, v in record.items() if k not in ordered)
+        return ordered
+
+    @staticmethod
+    def _complete(record):
+        """Fill in what a hand-written record may leave out."""
+        record['id'] = str(record['id'])
+        for field in ('type', 'category', 'title', 'price', 'image', 'alt', 'srcset'):
+            record.setdefault(field, '')
+        record.setdefault('badge_text', badge_text_for(record['category']))
+        record['specs'] = normalize_specs(record.get('specs'))
+        record.setdefault('sources', [])
+        return record
+
+
+class InventoryDatabase:
+    """The card inventory in SQLite, a drop-in for InventoryStore.
+
+    Holds the page's cards and, as history, every card ever removed from
+    the page, with indexed type, category, price (in cents) and times, so
+    price, sort and stale-listing queries run in the database instead of
+    over cards loaded into Python. IDs come from a sequence that never
+    hands out the ID of a removed listing again.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._db = None
+
+    @property
+    def exists(self):
+        return self.path.exists()
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path)
+            self._db.row_factory = sqlite3.Row
+            self._db.executescript(INVENTORY_SCHEMA)
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _meta(self, key):
+        return self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def state(self, grid_bytes):
+        """Compare the database with the page's grid; see InventoryStore.state."""
+        if not self.exists:
+            return 'missing', None
+        try:
+            store_changed = self._meta('data_version') != self._meta('synced_version')
+            if not self._meta('grid_sha256'):
+                return ('store-changed', self.records()) if store_changed else ('missing', None)
+            page_changed = self._meta('grid_sha256') != hashlib.sha256(grid_bytes).hexdigest()
+            if store_changed and page_changed:
+                return 'conflict', self.records()
+            if store_changed:
+                return 'store-changed', self.records()
+            if page_changed:
+                return 'page-changed', None
+            return 'in-sync', self.records()
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Error reading {self.path.name}: {e}")
+            return 'damaged', None
+
+    def records(self):
+        """Return the cards on the page, in page order."""
+        rows = self.db.execute("SELECT record FROM listings WHERE position IS NOT NULL "
+                               "ORDER BY position")
+        return [InventoryStore._complete(json.loads(row[0])) for row in rows]
+
+    def write(self, records, grid_bytes, now=None):
+        """Make the listings on the page match records.
+
+        Only changed cards are written. Cards no longer in records stay as
+        removed listings.
+        """
+        now = (now or datetime.now()).isoformat(timespec='seconds')
+        db = self.db
+        with db:
+            current = {row['id']: (row['record'], row['position']) for row in db.execute(
+                "SELECT id, record, position FROM listings WHERE position IS NOT NULL")}
+            next_id = int(self._meta('next_id'))
+            for position, record in enumerate(records):
+                record = InventoryStore._ordered(record)
+                text = json.dumps(record, ensure_ascii=False)
+                old = current.pop(record['id'], None)
+                if old == (text, position):
+                    continue
+                if old and old[0] == text:
+                    db.execute("UPDATE listings SET position = ? WHERE id = ?",
+                               (position, record['id']))
+                    continue
+                search = ' '.join([record['title']] + [spec['value'] for spec in record['specs']])
+                db.execute(
+                    "INSERT INTO listings (id, type, category, title, badge, search, price_cents,"
+                    " position, created, updated, removed, record)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET type = excluded.type,"
+                    " category = excluded.category, title = excluded.title,"
+                    " badge = excluded.badge, search = excluded.search,"
+                    " price_cents = excluded.price_cents, position = excluded.position,"
+                    " updated = excluded.updated, removed = NULL, record = excluded.record",
+                    (record['id'], record['type'].lower(), record['category'].lower(),
+                     record['title'], record['badge_text'].lower(), search.lower(),
+                     price_cents(record['price']), position, now, now, text))
+                if record['id'].isdigit():
+                    next_id = max(next_id, int(record['id']) + 1)
+            if current:
+                db.executemany("UPDATE listings SET position = NULL, removed = ? WHERE id = ?",
+                               [(now, computer_id) for computer_id in current])
+            db.executemany("UPDATE meta SET value = ? WHERE key = ?", [
+                (str(next_id), 'next_id'),
+                (hashlib.sha256(grid_bytes).hexdigest(), 'grid_sha256'),
+                (self._meta('data_version'), 'synced_version'),
+            ])
+
+    def next_id(self):
+        """Return the next computer ID from the sequence."""
+        return self._meta('next_id')
+
+    def _where(self, type=None, category=None, badge=None, price_min=None, price_max=None,
+               text='', removed=False):
+        clauses = ["position IS NULL" if removed else "position IS NOT NULL"]
+        params = []
+        for column, value in (('type', type), ('category', category), ('badge', badge)):
+            if value not in (None, '', 'all'):
+                clauses.append(f"{column} = ?")
+                params.append(value.lower())
+        if price_min is not None:
+            clauses.append("price_cents >= ?")
+            params.append(price_min)
+        if price_max is not None:
+            clauses.append("price_cents <= ?")
+            params.append(price_max)
+        for word in (text or '').split():
+            clauses.append("search LIKE ? ESCAPE '\\'")
+            escaped = word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        return " AND ".join(clauses), params
+
+    def query(self, sort='page', limit=None, offset=0, **filters):
+        """Return listings matching filters as card dicts with their listing times.
+
+        Args:
+            sort: 'page', 'price', 'price-desc' or 'updated' (oldest change first).
+            limit, offset: Page through large results.
+            filters: type, category, badge, price_min/price_max (cents), text
+                (words in the title or specs) and removed (True for past
+                listings instead of the ones on the page).
+        """
+        where, params = self._where(**filters)
+        sql = (f"SELECT record, created, updated, removed FROM listings WHERE {where} "
+               f"ORDER BY {LISTING_SORTS[sort]} LIMIT ? OFFSET ?")
+        rows = self.db.execute(sql, params + [-1 if limit is None else limit, offset])
+        return self._listings(rows)
+
+    @staticmethod
+    def _listings(rows):
+        listings = []
+        for row in rows:
+            listing = json.loads(row['record'])
+            listing.pop('markup', None)
+            listing.update(created=row['created'], updated=row['updated'], removed=row['removed'])
+            listings.append(listing)
+        return listings
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.db.execute(f"SELECT COUNT(*) FROM listings WHERE {where}", params).fetchone()[0]
+
+    def stale(self, days, now=None, limit=None):
+        """Return the listings on the page not changed for `days` days, oldest first."""
+        cutoff = ((now or datetime.now()) - timedelta(days=days)).isoformat(timespec='seconds')
+        rows = self.db.execute(
+            "SELECT record, created, updated, removed FROM listings "
+            "WHERE position IS NOT NULL AND updated < ? ORDER BY updated LIMIT ?",
+            (cutoff, -1 if limit is None else limit))
+        return self._listings(rows)
+
+
+def open_inventory(website_dir):
+    """Return the site's inventory: inventory.db if it has one, else inventory.jsonl."""
+    website_dir = Path(website_dir)
+    if (website_dir / INVENTORY_DB_FILE).exists():
+        return InventoryDatabase(website_dir / INVENTORY_DB_FILE)
+    return InventoryStore(website_dir / INVENTORY_FILE)
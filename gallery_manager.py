@@ -13,1131 +13,855 @@ Features:
 - Live preview of changes
 - Git integration for publishing
 - Automatic backup before changes
+
+Command line:
+    python -m gallery_manager                      Launch the app
+    python -m gallery_manager list [--json]        List the gallery cards
+    python -m gallery_manager stale --days 90      List cards unchanged for 90 days
+    python -m gallery_manager add --title ...      Add a card
+    python -m gallery_manager update ID ...        Change fields of a card
+    python -m gallery_manager delete ID            Remove a card
+    python -m gallery_manager import stock.csv     Add many cards in one write
+    python -m gallery_manager publish              Commit and push the changes
+    python -m gallery_manager status               Show what is not yet published
+    python -m gallery_manager extract-images       Move inline images to files
+    python -m gallery_manager update-srcset        Add responsive srcsets to old cards
+    python -m gallery_manager image-report         Compare JPEG, WebP and AVIF sizes
+    python -m gallery_manager gc [--dry-run]       Merge duplicate and delete unused images
+    python -m gallery_manager history              List recent card changes
+    python -m gallery_manager undo / redo          Step back or forward through them
+    python -m gallery_manager backup list          List the index.html backups
+    python -m gallery_manager backup restore ID    Put a backup back as index.html
+    python -m gallery_manager inventory migrate    Build inventory.jsonl from the page
+                                     [--sqlite]    ... or inventory.db, which keeps history
+
+Pass --image-formats webp,avif before the command to also publish card
+images as WebP/AVIF in a <picture>, with the JPEG as fallback.
+
+The commands only need BeautifulSoup (and Pillow when an image is added), so
+they run on machines without a display, e.g. from scripts or CI.
 """
 
-import customtkinter as ctk
-from tkinter import filedialog, messagebox
-from bs4 import BeautifulSoup
-from PIL import Image, ImageTk
+import argparse
+import json
 import subprocess
-import os
-import shutil
-import re
-from datetime import datetime
 from pathlib import Path
-import threading
-
-
-class GalleryManager(ctk.CTk):
-    def __init__(self):
-        super().__init__()
 
-        # Configure window
-        self.title("Computer Store Kansas - Gallery Manager")
-        self.geometry("1400x900")
-
-        # Set color theme
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("blue")
-
-        # File paths
-        self.website_dir = Path(r"C:\Users\Matthew\Documents\GitHub\Computer_Store_KS")
-        self.html_file = self.website_dir / "index.html"
-        self.gallery_dir = self.website_dir / "assets" / "gallery"
-        self.backup_dir = self.website_dir / "backups"
-
-        # Ensure directories exist
-        self.gallery_dir.mkdir(parents=True, exist_ok=True)
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
-
-        # Data storage
-        self.computers = []
-        self.current_selection = None
-        self.current_image_path = None
-
-        # Create UI
-        self.create_ui()
-
-        # Load data
-        self.load_computers()
-
-    def create_ui(self):
-        """Create the main user interface."""
-        # Create main layout - 3 columns
-        self.grid_columnconfigure(1, weight=1)
-        self.grid_rowconfigure(0, weight=1)
-
-        # Left panel - Computer list
-        self.create_left_panel()
-
-        # Middle panel - Preview
-        self.create_middle_panel()
-
-        # Right panel - Edit controls
-        self.create_right_panel()
-
-        # Bottom status bar
-        self.create_status_bar()
-
-    def create_left_panel(self):
-        """Create the left panel with computer list."""
-        left_frame = ctk.CTkFrame(self, width=300)
-        left_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-        left_frame.grid_propagate(False)
-
-        # Title
-        title = ctk.CTkLabel(left_frame, text="Gallery Computers",
-                            font=ctk.CTkFont(size=20, weight="bold"))
-        title.pack(pady=10, padx=10)
-
-        # Filter buttons
-        filter_frame = ctk.CTkFrame(left_frame)
-        filter_frame.pack(fill="x", padx=10, pady=5)
-
-        self.filter_var = ctk.StringVar(value="all")
-
-        filters = [
-            ("All", "all"),
-            ("Desktop", "desktop"),
-            ("Laptop", "laptop"),
-            ("Custom", "custom"),
-            ("Refurb", "refurbished")
-        ]
-
-        for i, (label, value) in enumerate(filters):
-            btn = ctk.CTkRadioButton(filter_frame, text=label,
-                                    variable=self.filter_var, value=value,
-                                    command=self.apply_filter)
-            btn.grid(row=i//3, column=i%3, padx=5, pady=2, sticky="w")
-
-        # Scrollable list
-        self.list_frame = ctk.CTkScrollableFrame(left_frame)
-        self.list_frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Action buttons
-        action_frame = ctk.CTkFrame(left_frame)
-        action_frame.pack(fill="x", padx=10, pady=10)
-
-        btn_add = ctk.CTkButton(action_frame, text="Add New",
-                               command=self.add_computer,
-                               fg_color="green", hover_color="darkgreen")
-        btn_add.pack(fill="x", pady=2)
-
-        btn_edit = ctk.CTkButton(action_frame, text="Edit Selected",
-                                command=self.edit_computer)
-        btn_edit.pack(fill="x", pady=2)
-
-        btn_delete = ctk.CTkButton(action_frame, text="Delete Selected",
-                                  command=self.delete_computer,
-                                  fg_color="red", hover_color="darkred")
-        btn_delete.pack(fill="x", pady=2)
-
-    def create_middle_panel(self):
-        """Create the middle panel with preview."""
-        middle_frame = ctk.CTkFrame(self)
-        middle_frame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
-
-        # Title
-        title = ctk.CTkLabel(middle_frame, text="Preview",
-                           font=ctk.CTkFont(size=20, weight="bold"))
-        title.pack(pady=10)
-
-        # Preview card frame
-        self.preview_frame = ctk.CTkFrame(middle_frame, fg_color="transparent")
-        self.preview_frame.pack(fill="both", expand=True, padx=20, pady=10)
-
-        # Preview content
-        self.preview_content = ctk.CTkLabel(self.preview_frame,
-                                           text="Select a computer to preview",
-                                           font=ctk.CTkFont(size=16))
-        self.preview_content.pack(expand=True)
-
-    def create_right_panel(self):
-        """Create the right panel with edit controls."""
-        right_frame = ctk.CTkFrame(self, width=350)
-        right_frame.grid(row=0, column=2, sticky="nsew", padx=10, pady=10)
-        right_frame.grid_propagate(False)
-
-        # Title
-        title = ctk.CTkLabel(right_frame, text="Git Actions",
-                           font=ctk.CTkFont(size=20, weight="bold"))
-        title.pack(pady=10)
-
-        # Git status
-        self.git_status_label = ctk.CTkLabel(right_frame, text="Git Status: Unknown",
-                                            font=ctk.CTkFont(size=12))
-        self.git_status_label.pack(pady=5)
-
-        # Git actions
-        git_frame = ctk.CTkFrame(right_frame)
-        git_frame.pack(fill="x", padx=10, pady=10)
-
-        btn_status = ctk.CTkButton(git_frame, text="Check Git Status",
-                                  command=self.check_git_status)
-        btn_status.pack(fill="x", pady=5)
-
-        btn_publish = ctk.CTkButton(git_frame, text="Publish Changes",
-                                   command=self.publish_changes,
-                                   fg_color="green", hover_color="darkgreen")
-        btn_publish.pack(fill="x", pady=5)
-
-        # Separator
-        separator = ctk.CTkLabel(right_frame, text="─" * 40)
-        separator.pack(pady=20)
-
-        # Help section
-        help_title = ctk.CTkLabel(right_frame, text="Quick Help",
-                                 font=ctk.CTkFont(size=16, weight="bold"))
-        help_title.pack(pady=5)
-
-        help_text = """
-How to use:
-
-1. Select a computer from the list
-2. Click Edit to modify details
-3. Use Add New to create cards
-4. Delete removes selected card
-5. Publish commits to Git
-
-Images are automatically:
-• Copied to gallery folder
-• Renamed to match type
-• Optimized for web
-• Backed up before changes
-        """
-
-        help_label = ctk.CTkLabel(right_frame, text=help_text,
-                                 font=ctk.CTkFont(size=12),
-                                 justify="left")
-        help_label.pack(pady=10, padx=10)
-
-    def create_status_bar(self):
-        """Create the bottom status bar."""
-        status_frame = ctk.CTkFrame(self, height=40)
-        status_frame.grid(row=1, column=0, columnspan=3, sticky="ew", padx=10, pady=5)
-
-        self.status_label = ctk.CTkLabel(status_frame,
-                                        text="Ready | No computers loaded",
-                                        font=ctk.CTkFont(size=12))
-        self.status_label.pack(side="left", padx=10)
-
-    def load_computers(self):
-        """Load computers from index.html."""
+from gallery_core import (
+    BACKUP_KEEP_DAILY, BACKUP_KEEP_LAST, CATEGORIES, COMPUTER_TYPES, DEFAULT_WEBSITE_DIR,
+    GC_MIN_AGE, GIT_GALLERY_PATHS, INVENTORY_DB_FILE, PUBLISH_STATE_FILE, INVENTORY_FILE, LISTING_SORTS, MODERN_FORMATS, BackupStore,
+    CardIndex, CardJournal, GitService, InventoryDatabase, InventoryStore, PublishPlan,
+    available_image_formats, backup_html, badge_text_for, collect_garbage, format_report,
+    describe_change, remove_gallery_image,
+    extract_inline_images, image_sources, image_src_for, import_computers, is_data_uri,
+    normalize_specs, open_inventory, price_cents, publish_changes, read_manifest,
+    resolve_image_path, scan_card_spans, sort_by_price, validate_computer,
+)
+
+
+def open_card_index(args):
+    """Load index.html for a command, or print why it can't be loaded."""
+    website_dir = Path(args.website_dir)
+    card_index = CardIndex(website_dir / "index.html", image_formats=args.image_formats,
+                           journal=CardJournal(website_dir / "backups" / "journal.jsonl"),
+                           inventory=open_inventory(website_dir))
+    try:
+        if card_index.load():
+            return card_index
+        print("Error: Gallery grid not found in HTML")
+    except OSError as e:
+        print(f"Error loading HTML: {e}")
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        print("Run 'inventory resolve --keep page' or '--keep inventory' to choose")
+    return None
+
+
+def parse_price(text):
+    """argparse type for --min-price/--max-price "499" or "$1,299.99", in cents."""
+    cents = price_cents(text if text.lstrip().startswith('$') else f"${text}")
+    if cents is None:
+        raise argparse.ArgumentTypeError(f"expected a price, got {text!r}")
+    return cents
+
+
+def parse_spec(text):
+    """argparse type for --spec "Label=Value"."""
+    label, sep, value = text.partition('=')
+    if not sep or not label.strip() or not value.strip():
+        raise argparse.ArgumentTypeError(f"expected LABEL=VALUE, got {text!r}")
+    return {'label': label.strip(), 'value': value.strip()}
+
+
+def print_errors(errors, prefix="Error"):
+    for error in errors:
+        print(f"{prefix}: {error}")
+
+
+def cmd_list(args):
+    """CLI: print the gallery cards (or with --removed, past listings)."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    filters = {'type': args.type, 'category': args.category, 'badge': args.badge}
+    if isinstance(card_index.inventory, InventoryDatabase):
+        # Filtered, sorted and paged by SQLite; history never leaves the database
+        database = card_index.inventory
+        filters.update(price_min=args.min_price, price_max=args.max_price,
+                       text=args.search, removed=args.removed)
+        computers = database.query(sort=args.sort, limit=args.limit, **filters)
+        total = database.count(removed=args.removed)
+    elif args.removed or args.sort == 'updated':
+        print(f"Error: past listings and change times are kept in {INVENTORY_DB_FILE}; "
+              "create it with 'inventory migrate --sqlite'")
+        return 1
+    else:
+        computers = sort_by_price(card_index.query(filters, args.search or ''),
+                                  args.min_price, args.max_price, args.sort)
+        computers = computers[:args.limit] if args.limit else computers
+        total = len(card_index.cards)
+
+    print_computers(computers, total, args.json)
+    return 0
+
+
+def print_computers(computers, total, as_json=False):
+    if as_json:
+        print(json.dumps(computers, indent=2))
+        return
+
+    for computer in computers:
+        image = "(inline image)" if is_data_uri(computer['image']) else computer['image']
+        when = f"  [{computer['removed'] or computer['updated']}]" if 'updated' in computer else ""
+        print(f"{computer['id']:>4}  {computer['type']:<8} {computer['category']:<12} "
+              f"{computer['price']:>10}  {computer['title']}  {image}{when}")
+    print(f"{len(computers)} of {total} computers")
+
+
+def cmd_stale(args):
+    """CLI: list the cards on the page that haven't changed in --days days."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+    if not isinstance(card_index.inventory, InventoryDatabase):
+        print(f"Error: listing times are kept in {INVENTORY_DB_FILE}; "
+              "create it with 'inventory migrate --sqlite'")
+        return 1
+
+    database = card_index.inventory
+    print_computers(database.stale(args.days, limit=args.limit), database.count(), args.json)
+    return 0
+
+
+def cmd_add(args):
+    """CLI: add a computer card."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    website_dir = Path(args.website_dir)
+    computer_id = args.id or card_index.next_id()
+    if card_index.get(computer_id):
+        print(f"Error: Computer ID {computer_id} already exists")
+        return 1
+
+    data = {
+        'id': computer_id,
+        'type': args.type,
+        'category': args.category,
+        'title': args.title.strip(),
+        'price': args.price.strip(),
+        'image': args.image,
+        'badge_text': badge_text_for(args.category),
+        'specs': normalize_specs(args.spec),
+    }
+    errors = validate_computer(data, require_image=True)
+    if errors:
+        print_errors(errors)
+        return 1
+
+    try:
+        data['image'] = image_src_for(website_dir, args.image, card_index.image_formats)
+    except Exception as e:
+        print(f"Error processing image: {e}")
+        return 1
+
+    backup_html(card_index.html_file, website_dir / "backups")
+    card_index.add(data)
+    print(f"Added computer {computer_id}: {data['title']}")
+    return 0
+
+
+def cmd_update(args):
+    """CLI: change fields of an existing computer card."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    current = card_index.get(args.id)
+    if not current:
+        print(f"Error: Computer {args.id} not found")
+        return 1
+
+    website_dir = Path(args.website_dir)
+    data = dict(current)
+    for field in ('type', 'category', 'title', 'price'):
+        value = getattr(args, field)
+        if value is not None:
+            data[field] = value.strip()
+    if args.category is not None:
+        data['badge_text'] = badge_text_for(args.category)
+    if args.spec:
+        data['specs'] = normalize_specs(args.spec)
+
+    errors = validate_computer(data)
+    if errors:
+        print_errors(errors)
+        return 1
+
+    if args.image:
         try:
-            if not self.html_file.exists():
-                self.update_status(f"Error: index.html not found at {self.html_file}")
-                return
-
-            with open(self.html_file, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'html.parser')
-
-            # Find gallery grid
-            gallery_grid = soup.find('div', {'id': 'gallery-grid'})
-            if not gallery_grid:
-                self.update_status("Error: Gallery grid not found in HTML")
-                return
-
-            # Parse all gallery cards
-            self.computers = []
-            cards = gallery_grid.find_all('div', {'class': 'gallery-card'})
-
-            for card in cards:
-                computer = self.parse_card(card)
-                if computer:
-                    self.computers.append(computer)
-
-            # Update UI
-            self.refresh_list()
-            self.update_status(f"Loaded {len(self.computers)} computers successfully")
-
+            data['image'] = image_src_for(website_dir, args.image, card_index.image_formats)
         except Exception as e:
-            self.update_status(f"Error loading computers: {str(e)}")
-            messagebox.showerror("Load Error", f"Failed to load computers:\n{str(e)}")
-
-    def parse_card(self, card):
-        """Parse a single gallery card element."""
-        try:
-            data = {
-                'id': card.get('data-computer-id'),
-                'type': card.get('data-type'),
-                'category': card.get('data-category')
-            }
-
-            # Parse badge
-            badge = card.find('div', class_=lambda x: x and 'gallery-card-badge' in x)
-            data['badge_text'] = badge.get_text(strip=True) if badge else ''
-
-            # Parse image
-            img = card.find('img')
-            data['image'] = img.get('src', '') if img else ''
-            data['alt'] = img.get('alt', '') if img else ''
-
-            # Parse back content
-            title = card.find('h3', {'class': 'gallery-card-title'})
-            data['title'] = title.get_text(strip=True) if title else ''
-
-            price = card.find('div', {'class': 'gallery-card-price'})
-            data['price'] = price.get_text(strip=True) if price else ''
-
-            # Parse specs
-            specs = card.find_all('div', {'class': 'spec-item'})
-            data['specs'] = []
-            for spec in specs[:4]:  # Max 4 specs
-                text = spec.get_text(strip=True)
-                if ':' in text:
-                    label, value = text.split(':', 1)
-                    data['specs'].append({
-                        'label': label.strip(),
-                        'value': value.strip()
-                    })
-
-            # Ensure we have exactly 4 specs
-            while len(data['specs']) < 4:
-                data['specs'].append({'label': '', 'value': ''})
-
-            return data
-
-        except Exception as e:
-            print(f"Error parsing card: {e}")
-            return None
-
-    def refresh_list(self):
-        """Refresh the computer list display."""
-        # Clear existing items
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-
-        # Apply filter
-        filter_value = self.filter_var.get()
-        filtered = self.computers
-
-        if filter_value != "all":
-            filtered = [c for c in self.computers
-                       if c['type'] == filter_value or c['category'] == filter_value]
-
-        # Create list items
-        for computer in filtered:
-            self.create_list_item(computer)
-
-        if not filtered:
-            label = ctk.CTkLabel(self.list_frame, text="No computers match filter",
-                               font=ctk.CTkFont(size=12, slant="italic"))
-            label.pack(pady=20)
-
-    def create_list_item(self, computer):
-        """Create a single list item for a computer."""
-        frame = ctk.CTkFrame(self.list_frame)
-        frame.pack(fill="x", padx=5, pady=5)
-
-        # Load thumbnail if exists
-        img_path = self.website_dir / computer['image'].replace('./', '')
-        if img_path.exists():
+            print(f"Error processing image: {e}")
+            return 1
+
+    if data == current:
+        print(f"Computer {args.id} is unchanged")
+        return 0
+
+    backup_html(card_index.html_file, website_dir / "backups")
+    card_index.update(data)
+    print(f"Updated computer {args.id}: {data['title']}")
+    return 0
+
+
+def cmd_delete(args):
+    """CLI: remove a computer card."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    computer = card_index.get(args.id)
+    if not computer:
+        print(f"Error: Computer {args.id} not found")
+        return 1
+
+    website_dir = Path(args.website_dir)
+    backup_html(card_index.html_file, website_dir / "backups")
+    card_index.delete(args.id)
+    print(f"Deleted computer {args.id}: {computer['title']}")
+
+    if args.delete_image:
+        img_path = resolve_image_path(website_dir, computer['image'])
+        users = card_index.image_refcounts()[img_path.name] if img_path else 0
+        if users:
+            print(f"Kept image {img_path.name}: still used by {users} other computer(s)")
+        elif img_path and img_path.exists():
             try:
-                img = Image.open(img_path)
-                img.thumbnail((60, 60))
-                photo = ctk.CTkImage(light_image=img, dark_image=img, size=(60, 60))
-                img_label = ctk.CTkLabel(frame, image=photo, text="")
-                img_label.image = photo  # Keep reference
-                img_label.pack(side="left", padx=5, pady=5)
-            except:
-                pass
-
-        # Text info
-        text_frame = ctk.CTkFrame(frame, fg_color="transparent")
-        text_frame.pack(side="left", fill="both", expand=True, padx=5)
-
-        title = ctk.CTkLabel(text_frame, text=computer['title'],
-                           font=ctk.CTkFont(size=13, weight="bold"),
-                           anchor="w")
-        title.pack(fill="x")
-
-        info = f"{computer['price']} | {computer['type'].title()} | {computer['category'].title()}"
-        details = ctk.CTkLabel(text_frame, text=info,
-                             font=ctk.CTkFont(size=10),
-                             anchor="w", text_color="gray")
-        details.pack(fill="x")
-
-        # Make clickable
-        frame.bind("<Button-1>", lambda e, c=computer: self.select_computer(c))
-        for child in frame.winfo_children():
-            child.bind("<Button-1>", lambda e, c=computer: self.select_computer(c))
-            for subchild in child.winfo_children():
-                subchild.bind("<Button-1>", lambda e, c=computer: self.select_computer(c))
-
-    def select_computer(self, computer):
-        """Select a computer and show preview."""
-        self.current_selection = computer
-        self.show_preview(computer)
-        self.update_status(f"Selected: {computer['title']}")
-
-    def show_preview(self, computer):
-        """Display preview of computer card."""
-        # Clear previous preview
-        for widget in self.preview_frame.winfo_children():
-            widget.destroy()
-
-        # Create card preview
-        card_frame = ctk.CTkFrame(self.preview_frame, corner_radius=15,
-                                 border_width=2, border_color="gray")
-        card_frame.pack(expand=True, padx=20, pady=20)
-
-        # Image
-        img_path = self.website_dir / computer['image'].replace('./', '')
-        if img_path.exists():
-            try:
-                img = Image.open(img_path)
-                img.thumbnail((400, 400))
-                photo = ctk.CTkImage(light_image=img, dark_image=img,
-                                   size=(min(img.width, 400), min(img.height, 400)))
-                img_label = ctk.CTkLabel(card_frame, image=photo, text="")
-                img_label.image = photo
-                img_label.pack(pady=10)
+                remove_gallery_image(img_path)
+                print(f"Deleted image {img_path}")
             except Exception as e:
-                print(f"Error loading image: {e}")
-
-        # Badge
-        badge_color = "green" if computer['category'] == "custom" else "orange"
-        badge = ctk.CTkLabel(card_frame, text=computer['badge_text'],
-                           font=ctk.CTkFont(size=12, weight="bold"),
-                           fg_color=badge_color, corner_radius=5,
-                           padx=10, pady=5)
-        badge.pack(pady=5)
-
-        # Title
-        title = ctk.CTkLabel(card_frame, text=computer['title'],
-                           font=ctk.CTkFont(size=20, weight="bold"))
-        title.pack(pady=5)
-
-        # Price
-        price = ctk.CTkLabel(card_frame, text=computer['price'],
-                           font=ctk.CTkFont(size=24, weight="bold"),
-                           text_color="lightblue")
-        price.pack(pady=5)
-
-        # Specs
-        specs_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
-        specs_frame.pack(pady=10, padx=20, fill="both")
-
-        for spec in computer['specs']:
-            if spec['label'] and spec['value']:
-                spec_text = f"{spec['label']}: {spec['value']}"
-                spec_label = ctk.CTkLabel(specs_frame, text=spec_text,
-                                         font=ctk.CTkFont(size=12),
-                                         anchor="w")
-                spec_label.pack(fill="x", pady=2)
-
-    def apply_filter(self):
-        """Apply the selected filter."""
-        self.refresh_list()
-
-    def add_computer(self):
-        """Open dialog to add a new computer."""
-        dialog = ComputerEditDialog(self, None, self.get_next_id())
-        self.wait_window(dialog)
-
-        if dialog.result:
-            # Create backup
-            self.create_backup()
-
-            # Add to HTML
-            if self.add_card_to_html(dialog.result):
-                # Reload computers
-                self.load_computers()
-                messagebox.showinfo("Success", "Computer added successfully!")
-            else:
-                messagebox.showerror("Error", "Failed to add computer to HTML")
-
-    def edit_computer(self):
-        """Open dialog to edit selected computer."""
-        if not self.current_selection:
-            messagebox.showwarning("No Selection", "Please select a computer to edit")
-            return
-
-        dialog = ComputerEditDialog(self, self.current_selection)
-        self.wait_window(dialog)
-
-        if dialog.result:
-            # Create backup
-            self.create_backup()
-
-            # Update HTML
-            if self.update_card_in_html(dialog.result):
-                # Reload computers
-                self.load_computers()
-                messagebox.showinfo("Success", "Computer updated successfully!")
-            else:
-                messagebox.showerror("Error", "Failed to update computer in HTML")
-
-    def delete_computer(self):
-        """Delete the selected computer."""
-        if not self.current_selection:
-            messagebox.showwarning("No Selection", "Please select a computer to delete")
-            return
-
-        # Confirm deletion
-        result = messagebox.askyesno("Confirm Delete",
-                                    f"Are you sure you want to delete '{self.current_selection['title']}'?\n\n"
-                                    "This will remove it from the website.")
-
-        if result:
-            # Ask about image
-            delete_image = messagebox.askyesno("Delete Image?",
-                                               "Do you also want to delete the image file?")
-
-            # Create backup
-            self.create_backup()
-
-            # Delete from HTML
-            if self.delete_card_from_html(self.current_selection['id']):
-                # Delete image if requested
-                if delete_image:
-                    img_path = self.website_dir / self.current_selection['image'].replace('./', '')
-                    if img_path.exists():
-                        try:
-                            img_path.unlink()
-                        except Exception as e:
-                            print(f"Error deleting image: {e}")
-
-                # Reload computers
-                self.current_selection = None
-                self.load_computers()
-
-                # Clear preview
-                for widget in self.preview_frame.winfo_children():
-                    widget.destroy()
-                label = ctk.CTkLabel(self.preview_frame,
-                                   text="Computer deleted successfully",
-                                   font=ctk.CTkFont(size=16))
-                label.pack(expand=True)
-
-                messagebox.showinfo("Success", "Computer deleted successfully!")
-            else:
-                messagebox.showerror("Error", "Failed to delete computer from HTML")
-
-    def get_next_id(self):
-        """Get the next available computer ID."""
-        if not self.computers:
-            return "1"
-
-        ids = [int(c['id']) for c in self.computers if c['id'].isdigit()]
-        return str(max(ids) + 1) if ids else "1"
-
-    def add_card_to_html(self, computer_data):
-        """Add a new card to the HTML file."""
-        try:
-            with open(self.html_file, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'html.parser')
-
-            # Find gallery grid
-            gallery_grid = soup.find('div', {'id': 'gallery-grid'})
-            if not gallery_grid:
-                return False
-
-            # Create new card
-            new_card = self.create_card_element(soup, computer_data)
-
-            # Append to gallery
-            gallery_grid.append(new_card)
-
-            # Save HTML
-            with open(self.html_file, 'w', encoding='utf-8') as f:
-                f.write(str(soup.prettify()))
-
-            return True
-
-        except Exception as e:
-            print(f"Error adding card: {e}")
-            return False
-
-    def update_card_in_html(self, computer_data):
-        """Update an existing card in the HTML file."""
+                print(f"Error deleting image: {e}")
+    return 0
+
+
+def cmd_import(args):
+    """CLI: add every computer in a CSV or JSON manifest in one write."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    manifest = Path(args.file)
+    try:
+        rows = read_manifest(manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error reading {manifest}: {e}")
+        return 1
+
+    website_dir = Path(args.website_dir)
+    def progress(done, total):
+        print(f"Processing images {done}/{total}", end='\n' if done == total else '\r',
+              flush=True)
+
+    added, errors = import_computers(card_index, rows, website_dir,
+                                     base_dir=manifest.parent,
+                                     backup_dir=website_dir / "backups",
+                                     progress=progress)
+    for computer in added:
+        print(f"Added computer {computer['id']}: {computer['title']}")
+    for number, error in errors:
+        print(f"Row {number}: {error}")
+
+    failed = len({number for number, _ in errors})
+    print(f"Imported {len(added)} computers, {failed} rows failed")
+    return 1 if errors else 0
+
+
+def cmd_publish(args):
+    """CLI: commit and push what changed since the last publish."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+    website_dir = Path(args.website_dir)
+    plan = PublishPlan(card_index, website_dir / "backups" / PUBLISH_STATE_FILE)
+    if not plan.changed:
+        print("Nothing changed since the last publish")
+        return 0
+
+    git = None
+    try:
+        git = GitService(website_dir)
+        publish_changes(website_dir, plan.message(args.message), paths=plan.paths, git=git)
+        plan.save()
+    except subprocess.TimeoutExpired:
+        print("Error: Git command timed out")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        if git:
+            git.close()
+    print("Changes pushed - website will update shortly")
+    return 0
+
+
+def cmd_status(args):
+    """CLI: show the branch, uncommitted gallery files and unpublished cards."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+    website_dir = Path(args.website_dir)
+    git = None
+    try:
+        git = GitService(website_dir)
+        status = git.status()
+        pending = git.pending(GIT_GALLERY_PATHS)
+        head = git.object_info('HEAD')
+        subject = git.last_commit()
+        pushed = git.is_pushed()
+    except subprocess.TimeoutExpired:
+        print("Error: Git command timed out")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        if git:
+            git.close()
+
+    branch = status['branch'] or "(detached)"
+    if status['upstream']:
+        branch += f" -> {status['upstream']} (ahead {status['ahead']}, behind {status['behind']})"
+    print(f"Branch: {branch}")
+    if head:
+        print(f"Last commit: {head[0][:10]} {subject}")
+    if not pushed:
+        print("Committed changes have not been pushed")
+    for code, path in pending:
+        print(f"  {code:<2} {path}")
+
+    plan = PublishPlan(card_index, website_dir / "backups" / PUBLISH_STATE_FILE)
+    print(plan.summary() if plan.changed else "Nothing changed since the last publish")
+    return 0
+
+
+def cmd_extract_images(args):
+    """CLI: move inline base64 images out of index.html."""
+    website_dir = Path(args.website_dir)
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    inline = [c for c in card_index.computers() if is_data_uri(c['image'])]
+    if not inline:
+        print("No inline images found in index.html")
+        return 0
+
+    if args.dry_run:
+        for computer in inline:
+            print(f"Card {computer['id']}: {len(computer['image']):,} bytes inline")
+        return 0
+
+    backup_html(card_index.html_file, website_dir / "backups")
+
+    before = card_index.html_file.stat().st_size
+    extracted, errors = extract_inline_images(card_index, website_dir / "assets" / "gallery",
+                                              website_dir)
+    for computer_id, src, size in extracted:
+        print(f"Card {computer_id}: {src} ({size:,} bytes)")
+    for computer_id, error in errors:
+        print(f"Card {computer_id}: error: {error}")
+
+    after = card_index.html_file.stat().st_size
+    print(f"index.html: {before:,} -> {after:,} bytes")
+    return 1 if errors else 0
+
+
+def cmd_update_srcset(args):
+    """CLI: give every card a srcset of its image's smaller copies."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    website_dir = Path(args.website_dir)
+    formats = card_index.image_formats
+    outdated = [c for c in card_index.computers()
+                if image_sources(website_dir, c['image'], formats) != (c['srcset'], c['sources'])]
+    if not outdated:
+        print("All cards are up to date")
+        return 0
+
+    backup_html(card_index.html_file, website_dir / "backups")
+    with card_index.batch():
+        for computer in outdated:
+            # Only the <img> changes, so sale prices and other markup stay intact
+            card_index.set_image_src(computer['id'], computer['image'])
+            print(f"Card {computer['id']}: {computer['srcset'] or '(no srcset)'}")
+    return 0
+
+
+def cmd_gc(args):
+    """CLI: merge duplicate gallery images and delete unused ones."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    website_dir = Path(args.website_dir)
+    if not args.dry_run:
+        backup_html(card_index.html_file, website_dir / "backups")
+    moved, removed = collect_garbage(card_index, website_dir, dry_run=args.dry_run,
+                                     min_age=args.min_age * 60)
+
+    verb = "Would" if args.dry_run else "Did"
+    for computer_id, old_src, new_src in moved:
+        print(f"Card {computer_id}: {old_src} -> {new_src}")
+    for path in removed:
+        print(f"Unused: {path.relative_to(website_dir).as_posix()}")
+    print(f"{verb} move {len(moved)} card image(s) and delete {len(removed)} file(s)")
+    return 0
+
+
+def cmd_image_report(args):
+    """CLI: compare gallery image sizes as JPEG, WebP and AVIF."""
+    formats = available_image_formats(MODERN_FORMATS)
+    missing = set(MODERN_FORMATS) - set(formats)
+    if missing:
+        print(f"Note: this Pillow can't encode {', '.join(sorted(missing))}")
+
+    rows = format_report(Path(args.website_dir) / "assets" / "gallery", formats)
+    if not rows:
+        print("No images found in assets/gallery/")
+        return 0
+
+    header = f"{'image':<28}{'size':>11}{'jpg':>10}"
+    for fmt in formats:
+        header += f"{fmt:>10}{'dB':>7}"
+    print(header)
+
+    totals = {fmt: 0 for fmt in ('jpg',) + formats}
+    for row in rows:
+        line = f"{row['name'][:27]:<28}{'%dx%d' % row['size']:>11}{row['jpg']:>10,}"
+        totals['jpg'] += row['jpg']
+        for fmt in formats:
+            size, psnr = row[fmt]
+            totals[fmt] += size
+            line += f"{size:>10,}{psnr:>7.1f}"
+        print(line)
+
+    line = f"{'total':<28}{'':>11}{totals['jpg']:>10,}"
+    for fmt in formats:
+        line += f"{totals[fmt]:>10,}{'':>7}"
+    print(line)
+    for fmt in formats:
+        print(f"{fmt}: {totals[fmt] / totals['jpg']:.0%} of the JPEG bytes")
+    return 0
+
+
+def cmd_history(args):
+    """CLI: list the latest card changes from the journal."""
+    journal = CardJournal(Path(args.website_dir) / "backups" / "journal.jsonl")
+    _, redo = journal.stacks()
+    entries = journal.entries[-args.limit:] if args.limit > 0 else journal.entries
+    for entry in entries:
+        notes = [f"{entry['kind']} of #{entry['target']}"] if entry.get('target') else []
+        if entry['group'] in redo:
+            notes.append("undone")
+        note = f"  ({', '.join(notes)})" if notes else ""
+        print(f"#{entry['seq']:<5} {entry['time'].replace('T', ' ')}  "
+              f"{describe_change(entry)}{note}")
+    if not journal.entries:
+        print("No changes recorded yet")
+    return 0
+
+
+def cmd_undo(args):
+    """CLI: undo (or with --redo, redo) the latest card changes."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    journal = card_index.journal
+    step = journal.redo if args.redo else journal.undo
+    backup_html(card_index.html_file, Path(args.website_dir) / "backups")
+    for _ in range(args.steps):
         try:
-            with open(self.html_file, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'html.parser')
-
-            # Find the card to update
-            card = soup.find('div', {'data-computer-id': computer_data['id']})
-            if not card:
-                return False
-
-            # Create new card
-            new_card = self.create_card_element(soup, computer_data)
-
-            # Replace old card
-            card.replace_with(new_card)
-
-            # Save HTML
-            with open(self.html_file, 'w', encoding='utf-8') as f:
-                f.write(str(soup.prettify()))
-
-            return True
-
-        except Exception as e:
-            print(f"Error updating card: {e}")
-            return False
-
-    def delete_card_from_html(self, computer_id):
-        """Delete a card from the HTML file."""
-        try:
-            with open(self.html_file, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'html.parser')
-
-            # Find and remove the card
-            card = soup.find('div', {'data-computer-id': computer_id})
-            if not card:
-                return False
-
-            card.decompose()
-
-            # Save HTML
-            with open(self.html_file, 'w', encoding='utf-8') as f:
-                f.write(str(soup.prettify()))
-
-            return True
-
-        except Exception as e:
-            print(f"Error deleting card: {e}")
-            return False
-
-    def create_card_element(self, soup, data):
-        """Create a BeautifulSoup card element from computer data."""
-        # Main card div
-        card = soup.new_tag('div', attrs={
-            'class': 'gallery-card',
-            'data-type': data['type'],
-            'data-category': data['category'],
-            'data-computer-id': data['id']
-        })
-
-        # Inner container
-        inner = soup.new_tag('div', attrs={'class': 'gallery-card-inner'})
-        card.append(inner)
-
-        # Front of card
-        front = soup.new_tag('div', attrs={'class': 'gallery-card-front'})
-        inner.append(front)
-
-        # Badge
-        badge_class = f"gallery-card-badge badge-{data['category']}"
-        badge = soup.new_tag('div', attrs={'class': badge_class})
-        badge.string = data['badge_text']
-        front.append(badge)
-
-        # Image container
-        img_container = soup.new_tag('div', attrs={'class': 'gallery-card-image'})
-        front.append(img_container)
-
-        # Image
-        img = soup.new_tag('img', attrs={
-            'src': data['image'],
-            'alt': data['title'],
-            'onerror': "this.src='./assets/logo.png'"
-        })
-        img_container.append(img)
-
-        # Back of card
-        back = soup.new_tag('div', attrs={'class': 'gallery-card-back'})
-        inner.append(back)
-
-        # Title
-        title = soup.new_tag('h3', attrs={'class': 'gallery-card-title'})
-        title.string = data['title']
-        back.append(title)
-
-        # Price
-        price = soup.new_tag('div', attrs={'class': 'gallery-card-price'})
-        price.string = data['price']
-        back.append(price)
-
-        # Specs container
-        specs_container = soup.new_tag('div', attrs={'class': 'gallery-card-specs'})
-        back.append(specs_container)
-
-        # Individual specs
-        for spec in data['specs']:
-            if spec['label'] and spec['value']:
-                spec_item = soup.new_tag('div', attrs={'class': 'spec-item'})
-
-                label_tag = soup.new_tag('strong')
-                label_tag.string = f"{spec['label']}:"
-                spec_item.append(label_tag)
-                spec_item.append(f" {spec['value']}")
-
-                specs_container.append(spec_item)
-
-        return card
-
-    def create_backup(self):
-        """Create a backup of index.html."""
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = self.backup_dir / f"index_backup_{timestamp}.html"
-            shutil.copy2(self.html_file, backup_file)
-            self.update_status(f"Backup created: {backup_file.name}")
-        except Exception as e:
-            print(f"Error creating backup: {e}")
-
-    def check_git_status(self):
-        """Check Git status of the repository."""
-        try:
-            os.chdir(self.website_dir)
-            result = subprocess.run(['git', 'status', '--short'],
-                                  capture_output=True, text=True, timeout=10)
-
-            if result.returncode == 0:
-                status = result.stdout.strip()
-                if status:
-                    self.git_status_label.configure(text=f"Git Status: Changes detected\n{status[:100]}")
-                else:
-                    self.git_status_label.configure(text="Git Status: Clean (no changes)")
-            else:
-                self.git_status_label.configure(text="Git Status: Error checking status")
-
-        except subprocess.TimeoutExpired:
-            messagebox.showerror("Timeout", "Git command timed out")
-        except FileNotFoundError:
-            messagebox.showerror("Git Not Found", "Git is not installed or not in PATH")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error checking Git status:\n{str(e)}")
-
-    def publish_changes(self):
-        """Commit and push changes to Git."""
-        # Confirm action
-        result = messagebox.askyesno("Confirm Publish",
-                                    "This will:\n"
-                                    "1. Add index.html and gallery images to Git\n"
-                                    "2. Commit with automated message\n"
-                                    "3. Push to remote repository\n\n"
-                                    "Continue?")
-
-        if not result:
-            return
-
-        # Create progress window
-        progress_window = ctk.CTkToplevel(self)
-        progress_window.title("Publishing Changes")
-        progress_window.geometry("600x400")
-        progress_window.transient(self)
-        progress_window.grab_set()
-
-        label = ctk.CTkLabel(progress_window, text="Publishing changes to Git...",
-                           font=ctk.CTkFont(size=16, weight="bold"))
-        label.pack(pady=10)
-
-        output_text = ctk.CTkTextbox(progress_window, width=560, height=300)
-        output_text.pack(padx=20, pady=10)
-
-        def run_git_commands():
-            try:
-                os.chdir(self.website_dir)
-
-                # Get current branch
-                result = subprocess.run(['git', 'branch', '--show-current'],
-                                      capture_output=True, text=True, timeout=10)
-                current_branch = result.stdout.strip()
-                output_text.insert("end", f"Current branch: {current_branch}\n")
-                output_text.see("end")
-                progress_window.update()
-
-                commands = [
-                    (['git', 'add', 'index.html'], "Adding index.html..."),
-                    (['git', 'add', 'assets/gallery/'], "Adding gallery images..."),
-                    (['git', 'commit', '-m', 'Update gallery via Gallery Manager'], "Creating commit..."),
-                    (['git', 'push', 'origin', current_branch], f"Pushing to {current_branch}..."),
-                ]
-
-                for cmd, description in commands:
-                    output_text.insert("end", f"\n{description}\n")
-                    output_text.see("end")
-                    progress_window.update()
-
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-                    output_text.insert("end", f"Command: {' '.join(cmd)}\n")
-                    if result.stdout:
-                        output_text.insert("end", f"Output: {result.stdout}\n")
-                    if result.stderr:
-                        output_text.insert("end", f"Info: {result.stderr}\n")
-                    output_text.see("end")
-                    progress_window.update()
-
-                    # Check if command failed (ignore "nothing to commit" and "already up to date")
-                    if result.returncode != 0:
-                        if 'nothing to commit' in result.stdout.lower() or 'already up to date' in result.stdout.lower():
-                            output_text.insert("end", "→ No changes to commit\n")
-                        else:
-                            raise Exception(f"Git command failed: {result.stderr}")
-
-                output_text.insert("end", "\n✓ Publishing completed successfully!\n")
-                output_text.insert("end", "✓ Changes pushed - website will update shortly!\n")
-                output_text.see("end")
-
-                close_btn = ctk.CTkButton(progress_window, text="Close",
-                                         command=progress_window.destroy)
-                close_btn.pack(pady=10)
-
-                self.update_status("Changes published to Git successfully")
-
-            except subprocess.TimeoutExpired:
-                output_text.insert("end", "\n✗ Error: Git command timed out\n")
-                output_text.see("end")
-            except Exception as e:
-                output_text.insert("end", f"\n✗ Error: {str(e)}\n")
-                output_text.see("end")
-
-        # Run in thread to prevent UI freeze
-        thread = threading.Thread(target=run_git_commands, daemon=True)
-        thread.start()
-
-    def update_status(self, message):
-        """Update the status bar message."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.status_label.configure(text=f"{timestamp} | {message}")
-
-
-class ComputerEditDialog(ctk.CTkToplevel):
-    """Dialog window for adding/editing computer details."""
-
-    def __init__(self, parent, computer_data=None, new_id=None):
-        super().__init__(parent)
-
-        self.parent = parent
-        self.computer_data = computer_data
-        self.result = None
-        self.new_image_path = None
-
-        # Configure window
-        title = "Edit Computer" if computer_data else "Add New Computer"
-        self.title(title)
-        self.geometry("700x800")
-
-        # Make modal
-        self.transient(parent)
-        self.grab_set()
-
-        # Create UI
-        self.create_form(new_id)
-
-        # Center window
-        self.update_idletasks()
-        x = (self.winfo_screenwidth() // 2) - (self.winfo_width() // 2)
-        y = (self.winfo_screenheight() // 2) - (self.winfo_height() // 2)
-        self.geometry(f"+{x}+{y}")
-
-    def create_form(self, new_id):
-        """Create the edit form."""
-        # Scrollable frame
-        scroll_frame = ctk.CTkScrollableFrame(self)
-        scroll_frame.pack(fill="both", expand=True, padx=20, pady=20)
-
-        # Computer ID (hidden or auto-generated)
-        self.id_var = ctk.StringVar(value=self.computer_data['id'] if self.computer_data else new_id)
-
-        # Computer Name
-        ctk.CTkLabel(scroll_frame, text="Computer Name:",
-                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
-        self.name_entry = ctk.CTkEntry(scroll_frame, width=600, height=35)
-        self.name_entry.pack(pady=(0, 15))
-        if self.computer_data:
-            self.name_entry.insert(0, self.computer_data['title'])
-
-        # Type (Desktop/Laptop)
-        ctk.CTkLabel(scroll_frame, text="Type:",
-                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
-        self.type_var = ctk.StringVar(value=self.computer_data['type'] if self.computer_data else "desktop")
-        type_frame = ctk.CTkFrame(scroll_frame)
-        type_frame.pack(fill="x", pady=(0, 15))
-
-        desktop_radio = ctk.CTkRadioButton(type_frame, text="Desktop", variable=self.type_var,
-                          value="desktop", command=self.update_category_options)
-        desktop_radio.pack(side="left", padx=10)
-
-        laptop_radio = ctk.CTkRadioButton(type_frame, text="Laptop", variable=self.type_var,
-                          value="laptop", command=self.update_category_options)
-        laptop_radio.pack(side="left", padx=10)
-
-        # Category (Custom/Refurbished for Desktop, New/Refurbished for Laptop)
-        self.category_label = ctk.CTkLabel(scroll_frame, text="Category:",
-                    font=ctk.CTkFont(size=13, weight="bold"))
-        self.category_label.pack(anchor="w", pady=(0, 5))
-        self.category_var = ctk.StringVar(value=self.computer_data['category'] if self.computer_data else "custom")
-        self.cat_frame = ctk.CTkFrame(scroll_frame)
-        self.cat_frame.pack(fill="x", pady=(0, 15))
-
-        # We'll populate this dynamically based on type
-        self.category_radio_1 = None
-        self.category_radio_2 = None
-        self.update_category_options()
-
-        # Price
-        ctk.CTkLabel(scroll_frame, text="Price:",
-                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
-        self.price_entry = ctk.CTkEntry(scroll_frame, width=200, height=35,
-                                       placeholder_text="$999")
-        self.price_entry.pack(anchor="w", pady=(0, 15))
-        if self.computer_data:
-            self.price_entry.insert(0, self.computer_data['price'])
-
-        # Image
-        ctk.CTkLabel(scroll_frame, text="Image:",
-                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(0, 5))
-
-        image_frame = ctk.CTkFrame(scroll_frame)
-        image_frame.pack(fill="x", pady=(0, 15))
-
-        btn_upload = ctk.CTkButton(image_frame, text="Upload Image",
-                                   command=self.upload_image)
-        btn_upload.pack(side="left", padx=5)
-
-        self.image_label = ctk.CTkLabel(image_frame, text="No image selected")
-        self.image_label.pack(side="left", padx=10)
-
-        # Image preview
-        self.image_preview_label = ctk.CTkLabel(scroll_frame, text="")
-        self.image_preview_label.pack(pady=10)
-
-        # If editing, show current image
-        if self.computer_data and self.computer_data['image']:
-            img_path = self.parent.website_dir / self.computer_data['image'].replace('./', '')
-            if img_path.exists():
-                self.show_image_preview(img_path)
-
-        # Specs (4 fields)
-        ctk.CTkLabel(scroll_frame, text="Specifications:",
-                    font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", pady=(10, 5))
-
-        self.spec_entries = []
-        specs = self.computer_data['specs'] if self.computer_data else [{'label': '', 'value': ''} for _ in range(4)]
-
-        for i in range(4):
-            spec_frame = ctk.CTkFrame(scroll_frame)
-            spec_frame.pack(fill="x", pady=5)
-
-            ctk.CTkLabel(spec_frame, text=f"Spec {i+1}:", width=60).pack(side="left", padx=5)
-
-            label_entry = ctk.CTkEntry(spec_frame, width=150, placeholder_text="CPU")
-            label_entry.pack(side="left", padx=5)
-
-            value_entry = ctk.CTkEntry(spec_frame, width=350, placeholder_text="Intel Core i7-12700K")
-            value_entry.pack(side="left", padx=5)
-
-            if i < len(specs):
-                label_entry.insert(0, specs[i]['label'])
-                value_entry.insert(0, specs[i]['value'])
-
-            self.spec_entries.append((label_entry, value_entry))
-
-        # Buttons
-        button_frame = ctk.CTkFrame(self)
-        button_frame.pack(fill="x", padx=20, pady=10)
-
-        btn_save = ctk.CTkButton(button_frame, text="Save",
-                                command=self.save,
-                                fg_color="green", hover_color="darkgreen",
-                                width=150, height=40)
-        btn_save.pack(side="left", padx=10)
-
-        btn_cancel = ctk.CTkButton(button_frame, text="Cancel",
-                                   command=self.cancel,
-                                   width=150, height=40)
-        btn_cancel.pack(side="left", padx=10)
-
-    def update_category_options(self):
-        """Update category options based on selected type."""
-        # Clear existing radio buttons
-        if self.category_radio_1:
-            self.category_radio_1.destroy()
-        if self.category_radio_2:
-            self.category_radio_2.destroy()
-
-        computer_type = self.type_var.get()
-
-        if computer_type == "desktop":
-            # Desktop options: Custom Build / Refurbished
-            self.category_radio_1 = ctk.CTkRadioButton(
-                self.cat_frame, text="Custom Build",
-                variable=self.category_var, value="custom"
-            )
-            self.category_radio_1.pack(side="left", padx=10)
-
-            self.category_radio_2 = ctk.CTkRadioButton(
-                self.cat_frame, text="Refurbished",
-                variable=self.category_var, value="refurbished"
-            )
-            self.category_radio_2.pack(side="left", padx=10)
-
-            # Set default for desktop if current value is invalid
-            if self.category_var.get() not in ["custom", "refurbished"]:
-                self.category_var.set("custom")
-
-        else:  # laptop
-            # Laptop options: New / Refurbished
-            self.category_radio_1 = ctk.CTkRadioButton(
-                self.cat_frame, text="New",
-                variable=self.category_var, value="new"
-            )
-            self.category_radio_1.pack(side="left", padx=10)
-
-            self.category_radio_2 = ctk.CTkRadioButton(
-                self.cat_frame, text="Refurbished",
-                variable=self.category_var, value="refurbished"
-            )
-            self.category_radio_2.pack(side="left", padx=10)
-
-            # Set default for laptop if current value is invalid
-            if self.category_var.get() not in ["new", "refurbished"]:
-                self.category_var.set("refurbished")
-
-    def upload_image(self):
-        """Handle image upload."""
-        file_path = filedialog.askopenfilename(
-            title="Select Image",
-            filetypes=[
-                ("Image files", "*.jpg *.jpeg *.png *.gif *.bmp"),
-                ("All files", "*.*")
-            ]
-        )
-
-        if file_path:
-            self.new_image_path = file_path
-            self.image_label.configure(text=os.path.basename(file_path))
-            self.show_image_preview(file_path)
-
-    def show_image_preview(self, image_path):
-        """Show preview of selected image."""
-        try:
-            img = Image.open(image_path)
-            img.thumbnail((300, 300))
-            photo = ctk.CTkImage(light_image=img, dark_image=img,
-                               size=(min(img.width, 300), min(img.height, 300)))
-            self.image_preview_label.configure(image=photo, text="")
-            self.image_preview_label.image = photo
-        except Exception as e:
-            print(f"Error showing preview: {e}")
-
-    def validate_fields(self):
-        """Validate all form fields."""
-        errors = []
-
-        if not self.name_entry.get().strip():
-            errors.append("Computer name is required")
-
-        if not self.price_entry.get().strip():
-            errors.append("Price is required")
-
-        # Check if price has $ symbol
-        price = self.price_entry.get().strip()
-        if not price.startswith('$'):
-            errors.append("Price must start with $")
-
-        # Check if at least one spec is filled
-        has_spec = False
-        for label_entry, value_entry in self.spec_entries:
-            if label_entry.get().strip() and value_entry.get().strip():
-                has_spec = True
-                break
-
-        if not has_spec:
-            errors.append("At least one specification is required")
-
-        # Check image
-        if not self.computer_data and not self.new_image_path:
-            errors.append("Image is required for new computers")
-
-        if errors:
-            messagebox.showerror("Validation Error", "\n".join(errors))
-            return False
-
-        return True
-
-    def save(self):
-        """Save the computer data."""
-        if not self.validate_fields():
-            return
-
-        # Prepare data
-        computer_type = self.type_var.get()
-        category = self.category_var.get()
-        computer_id = self.id_var.get()
-
-        # Handle image
-        if self.new_image_path:
-            # Process and save image
-            image_filename = f"{computer_type}-{computer_id}.jpg"
-            image_dest = self.parent.gallery_dir / image_filename
-
-            try:
-                # Open and optimize image
-                img = Image.open(self.new_image_path)
-
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-
-                # Resize if too large (max 1200px on longest side)
-                max_size = 1200
-                if max(img.size) > max_size:
-                    ratio = max_size / max(img.size)
-                    new_size = tuple(int(dim * ratio) for dim in img.size)
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                # Save with optimization
-                img.save(image_dest, 'JPEG', quality=85, optimize=True)
-
-                image_path = f"./assets/gallery/{image_filename}"
-
-            except Exception as e:
-                messagebox.showerror("Image Error", f"Failed to process image:\n{str(e)}")
-                return
+            entries = step(card_index)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if entries is None:
+            print(f"Nothing to {'redo' if args.redo else 'undo'}")
+            break
+        verb = "Redid" if args.redo else "Undid"
+        for entry in entries:
+            print(f"{verb} #{entry['seq']}: {describe_change(entry)}")
+    return 0
+
+
+def cmd_revert(args):
+    """CLI: put every card back as it was after a journal entry."""
+    card_index = open_card_index(args)
+    if not card_index:
+        return 1
+
+    backup_html(card_index.html_file, Path(args.website_dir) / "backups")
+    try:
+        changed = card_index.journal.revert(card_index, args.seq)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Reverted {len(changed)} card(s) to how they were after #{args.seq}")
+    return 0
+
+
+def cmd_backup_list(args):
+    """CLI: list the backup snapshots, oldest first."""
+    store = BackupStore(Path(args.website_dir) / "backups")
+    snapshots = store.snapshots()
+    for snapshot in snapshots:
+        created = snapshot['created'][:19].replace('T', ' ')
+        print(f"{snapshot['id']}  {created}  {snapshot['size']:>9,}  {snapshot['label']}")
+    logical = sum(snapshot['size'] for snapshot in snapshots)
+    print(f"{len(snapshots)} backups of {logical:,} bytes stored in {store.disk_usage():,} bytes")
+    return 0
+
+
+def cmd_backup_create(args):
+    """CLI: snapshot index.html now."""
+    store = BackupStore(Path(args.website_dir) / "backups")
+    snapshot, created = store.snapshot(Path(args.website_dir) / "index.html", label=args.label)
+    print(f"{'Created' if created else 'Unchanged since'} backup {snapshot['id']}")
+    return 0
+
+
+def cmd_backup_restore(args):
+    """CLI: write a backup snapshot back to index.html (or --output)."""
+    website_dir = Path(args.website_dir)
+    store = BackupStore(website_dir / "backups")
+    try:
+        if args.output:
+            Path(args.output).write_bytes(store.read(args.id))
+            print(f"Wrote backup {store.find(args.id)['id']} to {args.output}")
         else:
-            # Keep existing image
-            image_path = self.computer_data['image'] if self.computer_data else ""
-
-        # Collect specs
-        specs = []
-        for label_entry, value_entry in self.spec_entries:
-            label = label_entry.get().strip()
-            value = value_entry.get().strip()
-            if label and value:
-                specs.append({'label': label, 'value': value})
-
-        # Ensure we have exactly 4 specs (pad with empty if needed)
-        while len(specs) < 4:
-            specs.append({'label': '', 'value': ''})
-
-        # Badge text based on category
-        if category == "custom":
-            badge_text = "Custom Build"
-        elif category == "new":
-            badge_text = "New"
-        else:  # refurbished
-            badge_text = "Refurbished"
-
-        # Create result
-        self.result = {
-            'id': computer_id,
-            'type': computer_type,
-            'category': category,
-            'title': self.name_entry.get().strip(),
-            'price': self.price_entry.get().strip(),
-            'image': image_path,
-            'badge_text': badge_text,
-            'specs': specs
-        }
-
-        self.destroy()
-
-    def cancel(self):
-        """Cancel the dialog."""
-        self.result = None
-        self.destroy()
-
-
-def main():
+            snapshot = store.restore(args.id, website_dir / "index.html")
+            print(f"Restored backup {snapshot['id']} to index.html")
+    except (KeyError, ValueError, OSError) as e:
+        print(f"Error: {e.args[0] if isinstance(e, KeyError) else e}")
+        return 1
+    return 0
+
+
+def cmd_backup_prune(args):
+    """CLI: delete backups outside the retention policy."""
+    store = BackupStore(Path(args.website_dir) / "backups")
+    removed, freed = store.prune(keep_last=args.keep_last, keep_daily=args.keep_daily)
+    for snapshot_id in removed:
+        print(f"Removed {snapshot_id}")
+    print(f"Removed {len(removed)} backup(s), freed {freed:,} bytes")
+    return 0
+
+
+def cmd_backup_import_legacy(args):
+    """CLI: move old index_backup_*.html copies into the backup store."""
+    store = BackupStore(Path(args.website_dir) / "backups")
+    before = store.disk_usage()
+    imported = store.import_legacy(delete=args.delete)
+    for name, snapshot_id in imported:
+        print(f"{name} -> {snapshot_id}")
+    print(f"Imported {len(imported)} file(s) into {store.disk_usage() - before:,} bytes")
+    return 0
+
+
+def cmd_inventory_status(args):
+    """CLI: show whether the inventory and the gallery grid agree."""
+    website_dir = Path(args.website_dir)
+    store = open_inventory(website_dir)
+    raw = (website_dir / "index.html").read_bytes()
+    grid_span, spans = scan_card_spans(raw)
+    if grid_span is None:
+        print("Error: Gallery grid not found in HTML")
+        return 1
+    state, records = store.state(raw[grid_span[0]:grid_span[1]])
+    messages = {
+        'in-sync': "in sync with index.html",
+        'store-changed': "edited; the gallery grid is regenerated from it on the next load",
+        'page-changed': "older than index.html; it is rebuilt from the page on the next load",
+        'missing': "missing; run 'inventory migrate' to build it",
+        'conflict': "edited, and so was index.html; run 'inventory resolve' to keep one",
+        'damaged': "can't be read; fix it, or run 'inventory resolve --keep page'",
+    }
+    print(f"{store.path.name}: {messages[state]}")
+    print(f"{len(spans)} cards on the page"
+          + (f", {len(records)} in the inventory" if records is not None else ""))
+    if isinstance(store, InventoryDatabase) and store.exists:
+        print(f"{store.count(removed=True)} past listings; next ID {store.next_id()}")
+    return 0
+
+
+def cmd_inventory_migrate(args):
+    """CLI: build inventory.jsonl (or with --sqlite, inventory.db) from index.html."""
+    website_dir = Path(args.website_dir)
+    if args.sqlite:
+        store = InventoryDatabase(website_dir / INVENTORY_DB_FILE)
+    else:
+        store = InventoryStore(website_dir / INVENTORY_FILE)
+    if store.exists and not args.force:
+        print(f"Error: {store.path.name} already exists; pass --force to rebuild it from the page")
+        return 1
+
+    # Loaded without the store, so the cards are read from the page itself
+    card_index = CardIndex(website_dir / "index.html")
+    try:
+        if not card_index.load():
+            print("Error: Gallery grid not found in HTML")
+            return 1
+    except OSError as e:
+        print(f"Error loading HTML: {e}")
+        return 1
+    card_index.inventory = store
+    card_index.save_inventory()
+    custom = sum(1 for entry in card_index.cards.values() if entry['custom'])
+    print(f"Wrote {len(card_index.cards)} cards to {store.path.name} "
+          f"({custom} with hand-made markup kept as is)")
+    if args.sqlite and (website_dir / INVENTORY_FILE).exists():
+        print(f"{store.path.name} is used from now on; {INVENTORY_FILE} is no longer updated")
+    return 0
+
+
+def cmd_inventory_resolve(args):
+    """CLI: settle a page and inventory that were both edited, keeping one side."""
+    website_dir = Path(args.website_dir)
+    card_index = CardIndex(website_dir / "index.html", image_formats=args.image_formats,
+                           inventory=open_inventory(website_dir))
+    if args.keep == 'inventory':
+        # The page's own edits are lost, so keep a copy of it first
+        backup_html(website_dir / "index.html", website_dir / "backups",
+                    label="before resolving from the inventory")
+    try:
+        if not card_index.load(prefer=args.keep):
+            print("Error: Gallery grid not found in HTML")
+            return 1
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+    if card_index.inventory_state not in ('conflict', 'damaged'):
+        print(f"Nothing to resolve; {card_index.inventory.path.name} was {card_index.inventory_state}")
+        return 0
+    kept = "index.html" if args.keep == 'page' else card_index.inventory.path.name
+    print(f"Kept {kept}; {len(card_index.cards)} cards in sync")
+    return 0
+
+
+def parse_formats(text):
+    """argparse type for --image-formats "webp,avif"."""
+    formats = tuple(fmt.strip().lower() for fmt in text.split(',') if fmt.strip())
+    unknown = [fmt for fmt in formats if fmt not in MODERN_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format(s): {', '.join(unknown)}")
+    # Keep the best format first, the order browsers try <source>s in
+    return tuple(fmt for fmt in MODERN_FORMATS if fmt in formats)
+
+
+def add_card_arguments(parser, required):
+    """Add the card field options shared by add and update."""
+    parser.add_argument('--type', choices=COMPUTER_TYPES,
+                        default='desktop' if required else None)
+    parser.add_argument('--category', choices=CATEGORIES,
+                        default='refurbished' if required else None)
+    parser.add_argument('--title', required=required, help="Computer name")
+    parser.add_argument('--price', required=required, help='Price, e.g. "$499"')
+    parser.add_argument('--image', required=required,
+                        help="Photo to optimize into assets/gallery/, or an existing image src")
+    parser.add_argument('--spec', action='append', type=parse_spec, default=[],
+                        metavar='LABEL=VALUE', help="Specification; repeat for up to four")
+
+
+def main(argv=None):
     """Main entry point."""
-    app = GalleryManager()
+    parser = argparse.ArgumentParser(description="Computer Store Kansas Gallery Manager")
+    parser.add_argument('--website-dir', default=str(DEFAULT_WEBSITE_DIR),
+                        help="Path to the website repository")
+    parser.add_argument('--image-formats', type=parse_formats, default=(),
+                        metavar='webp,avif',
+                        help="Also publish card images in these formats inside a <picture>")
+    subparsers = parser.add_subparsers(dest='command')
+
+    list_parser = subparsers.add_parser('list', help="List the gallery cards")
+    list_parser.add_argument('--type', choices=COMPUTER_TYPES)
+    list_parser.add_argument('--category', choices=CATEGORIES)
+    list_parser.add_argument('--badge', help='Badge text, e.g. "Custom Build"')
+    list_parser.add_argument('--search', help="Words to find in titles and specs")
+    list_parser.add_argument('--min-price', type=parse_price, metavar='PRICE')
+    list_parser.add_argument('--max-price', type=parse_price, metavar='PRICE')
+    list_parser.add_argument('--sort', choices=LISTING_SORTS, default='page',
+                             help="Order by page position, price (lowest or highest first) "
+                                  "or last change")
+    list_parser.add_argument('--removed', action='store_true',
+                             help="List past listings instead (needs inventory.db)")
+    list_parser.add_argument('--limit', type=int, help="Show at most this many")
+    list_parser.add_argument('--json', action='store_true', help="Print the cards as JSON")
+    list_parser.set_defaults(func=cmd_list)
+
+    stale_parser = subparsers.add_parser('stale',
+                                         help="List cards unchanged for a while (needs inventory.db)")
+    stale_parser.add_argument('--days', type=int, default=90)
+    stale_parser.add_argument('--limit', type=int, help="Show at most this many")
+    stale_parser.add_argument('--json', action='store_true', help="Print the cards as JSON")
+    stale_parser.set_defaults(func=cmd_stale)
+
+    add_parser = subparsers.add_parser('add', help="Add a computer card")
+    add_parser.add_argument('--id', help="Computer ID (default: next free ID)")
+    add_card_arguments(add_parser, required=True)
+    add_parser.set_defaults(func=cmd_add)
+
+    update_parser = subparsers.add_parser('update', help="Change fields of a computer card")
+    update_parser.add_argument('id')
+    add_card_arguments(update_parser, required=False)
+    update_parser.set_defaults(func=cmd_update)
+
+    delete_parser = subparsers.add_parser('delete', help="Remove a computer card")
+    delete_parser.add_argument('id')
+    delete_parser.add_argument('--delete-image', action='store_true',
+                               help="Also delete the card's image file")
+    delete_parser.set_defaults(func=cmd_delete)
+
+    import_parser = subparsers.add_parser('import',
+                                          help="Add the computers in a CSV or JSON manifest")
+    import_parser.add_argument('file', help="Manifest; image paths are relative to it")
+    import_parser.set_defaults(func=cmd_import)
+
+    publish_parser = subparsers.add_parser('publish', help="Commit and push gallery changes")
+    publish_parser.add_argument('--message', '-m',
+                                help="Commit subject (default: names the changed cards)")
+    publish_parser.set_defaults(func=cmd_publish)
+
+    status_parser = subparsers.add_parser('status', help="Show what is not yet published")
+    status_parser.set_defaults(func=cmd_status)
+
+    extract_parser = subparsers.add_parser('extract-images',
+                                           help="Move inline base64 images into assets/gallery/")
+    extract_parser.add_argument('--dry-run', action='store_true',
+                                help="List inline images without changing anything")
+    extract_parser.set_defaults(func=cmd_extract_images)
+
+    srcset_parser = subparsers.add_parser('update-srcset',
+                                          help="Add srcset attributes and image variants to cards")
+    srcset_parser.set_defaults(func=cmd_update_srcset)
+
+    gc_parser = subparsers.add_parser('gc', help="Merge duplicate images and delete unused ones")
+    gc_parser.add_argument('--dry-run', action='store_true',
+                           help="List what would change without changing anything")
+    gc_parser.add_argument('--min-age', type=int, default=GC_MIN_AGE // 60, metavar='MINUTES',
+                           help="Keep unused files younger than this (uploads in progress)")
+    gc_parser.set_defaults(func=cmd_gc)
+
+    report_parser = subparsers.add_parser('image-report',
+                                          help="Compare gallery image sizes across formats")
+    report_parser.set_defaults(func=cmd_image_report)
+
+    history_parser = subparsers.add_parser('history', help="List recent card changes")
+    history_parser.add_argument('--limit', type=int, default=20,
+                                help="Number of changes to show (0 for all)")
+    history_parser.set_defaults(func=cmd_history)
+
+    undo_parser = subparsers.add_parser('undo', help="Undo the latest card changes")
+    undo_parser.add_argument('--steps', type=int, default=1, help="Number of edits to undo")
+    undo_parser.set_defaults(func=cmd_undo, redo=False)
+
+    redo_parser = subparsers.add_parser('redo', help="Redo changes that were undone")
+    redo_parser.add_argument('--steps', type=int, default=1, help="Number of edits to redo")
+    redo_parser.set_defaults(func=cmd_undo, redo=True)
+
+    revert_parser = subparsers.add_parser('revert',
+                                          help="Put the cards back as they were after a change")
+    revert_parser.add_argument('seq', type=int, help="Change number from history (0: the start)")
+    revert_parser.set_defaults(func=cmd_revert)
+
+    backup_parser = subparsers.add_parser('backup', help="List, create and restore backups")
+    backup_commands = backup_parser.add_subparsers(dest='backup_command', required=True)
+
+    backup_list = backup_commands.add_parser('list', help="List the backups")
+    backup_list.set_defaults(func=cmd_backup_list)
+
+    backup_create = backup_commands.add_parser('create', help="Back up index.html now")
+    backup_create.add_argument('--label', default="", help="Note shown in the list")
+    backup_create.set_defaults(func=cmd_backup_create)
+
+    backup_restore = backup_commands.add_parser('restore', help="Put a backup back")
+    backup_restore.add_argument('id', help='Backup ID (a unique prefix or "latest")')
+    backup_restore.add_argument('--output', '-o',
+                                help="Write the page here instead of over index.html")
+    backup_restore.set_defaults(func=cmd_backup_restore)
+
+    backup_prune = backup_commands.add_parser('prune', help="Delete old backups")
+    backup_prune.add_argument('--keep-last', type=int, default=BACKUP_KEEP_LAST, metavar='N',
+                              help="Keep the newest N backups")
+    backup_prune.add_argument('--keep-daily', type=int, default=BACKUP_KEEP_DAILY, metavar='DAYS',
+                              help="Also keep the last backup of each of the past DAYS days")
+    backup_prune.set_defaults(func=cmd_backup_prune)
+
+    backup_legacy = backup_commands.add_parser('import-legacy',
+                                               help="Move index_backup_*.html copies into the store")
+    backup_legacy.add_argument('--delete', action='store_true',
+                               help="Delete each copy once it is stored")
+    backup_legacy.set_defaults(func=cmd_backup_import_legacy)
+
+    inventory_parser = subparsers.add_parser('inventory',
+                                             help="Manage inventory.jsonl, the card data store")
+    inventory_commands = inventory_parser.add_subparsers(dest='inventory_command', required=True)
+
+    inventory_status = inventory_commands.add_parser('status',
+                                                     help="Compare the store with index.html")
+    inventory_status.set_defaults(func=cmd_inventory_status)
+
+    inventory_migrate = inventory_commands.add_parser('migrate',
+                                                      help="Build the store from index.html")
+    inventory_migrate.add_argument('--force', action='store_true',
+                                   help="Replace an existing store")
+    inventory_migrate.add_argument('--sqlite', action='store_true',
+                                   help="Build inventory.db, with indexed queries and history")
+    inventory_migrate.set_defaults(func=cmd_inventory_migrate)
+
+    inventory_resolve = inventory_commands.add_parser(
+        'resolve', help="Keep the page or the store when both were edited")
+    inventory_resolve.add_argument('--keep', choices=['page', 'inventory'], required=True,
+                                   help="Which side's edits to keep")
+    inventory_resolve.set_defaults(func=cmd_inventory_resolve)
+
+    args = parser.parse_args(argv)
+    if args.command:
+        return args.func(args)
+
+    # Imported here so the commands above work without a display
+    from gallery_gui import GalleryManager
+
+    app = GalleryManager(args.website_dir, image_formats=args.image_formats)
     app.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
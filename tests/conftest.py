@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import gallery_core as gm  # noqa: E402
+
+PAGE = """<!DOCTYPE html>
+<html>
+ <head>
+  <title>Computer Store Kansas</title>
+ </head>
+ <body>
+  <section class="gallery-section">
+   <div class="container">
+    <div class="gallery-grid" id="gallery-grid">
+{cards}
+    </div>
+   </div>
+  </section>
+  <script src="./script.js"></script>
+ </body>
+</html>
+"""
+
+# A hand-made card like the sale cards on the real page: a ribbon, a sale
+# price and markup create_card_element doesn't write
+SALE_CARD = """<div class="gallery-card" data-category="refurbished" data-computer-id="3" data-type="laptop">
+ <div class="gallery-card-inner">
+  <div class="gallery-card-front">
+   <div class="bf-ribbon-corner">
+   </div>
+   <div class="gallery-card-badge badge-black-friday">
+    Black Friday Sale
+   </div>
+   <div class="gallery-card-image">
+    <img alt="Hp Victus" onerror="this.src='./assets/logo.png'" src="./assets/gallery/laptop-3.jpg"/>
+   </div>
+  </div>
+  <div class="gallery-card-back">
+   <h3 class="gallery-card-title">
+    Hp Victus
+   </h3>
+   <div class="gallery-card-price">
+    <span class="original-price">
+     $700.00
+    </span>
+    <span class="sale-price">
+     $630.00
+    </span>
+   </div>
+   <div class="gallery-card-specs">
+    <div class="spec-item">
+     <strong>
+      Processor:
+     </strong>
+     Ryzen 7
+    </div>
+   </div>
+  </div>
+ </div>
+</div>"""
+
+
+def computer(computer_id, title=None, price="$299", **fields):
+    """Return card data as the edit dialog and the CLI make it."""
+    data = {
+        'id': str(computer_id),
+        'type': 'desktop',
+        'category': 'refurbished',
+        'title': title or f"Computer {computer_id}",
+        'price': price,
+        'image': f"./assets/gallery/desktop-{computer_id}.jpg",
+        'badge_text': "Refurbished",
+        'specs': gm.normalize_specs([{'label': 'Processor', 'value': 'i5-8500'},
+                                     {'label': 'Memory', 'value': '16 GB'}]),
+    }
+    data.update(fields)
+    return data
+
+
+def indented(markup, indent="     "):
+    return "\n".join(indent + line for line in markup.strip().split("\n"))
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A website folder whose index.html holds cards 1 and 2 and the sale card 3."""
+    soup = BeautifulSoup('', 'html.parser')
+    cards = [gm.create_card_element(soup, computer(i)).prettify() for i in (1, 2)]
+    cards.append(SALE_CARD)
+    page = PAGE.format(cards="\n".join(indented(card) for card in cards))
+    (tmp_path / "index.html").write_text(page, encoding='utf-8')
+    (tmp_path / "assets" / "gallery").mkdir(parents=True)
+    (tmp_path / "backups").mkdir()
+    return tmp_path
+
+
+@pytest.fixture
+def load_index(site):
+    """Return a function that loads the site's page into a fresh CardIndex."""
+    def load(**options):
+        card_index = gm.CardIndex(site / "index.html", **options)
+        assert card_index.load()
+        return card_index
+    return load
@@ -0,0 +1,89 @@
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+import gallery_core as gm
+from conftest import computer
+
+
+@pytest.fixture
+def store(site):
+    return gm.BackupStore(site / "backups")
+
+
+def test_snapshot_reads_back_the_page(site, store):
+    page = site / "index.html"
+    snapshot, created = store.snapshot(page)
+    assert created
+    assert store.read(snapshot['id']) == page.read_bytes()
+
+    # An unchanged page isn't stored again
+    assert store.snapshot(page) == (snapshot, False)
+
+
+def test_an_edit_only_stores_the_chunks_it_touched(site, load_index, store):
+    page = site / "index.html"
+    filler = "".join(f"<!-- line {i} of the rest of the page -->\n" for i in range(3000))
+    page.write_text(page.read_text(encoding='utf-8').replace("</html>", filler + "</html>"),
+                    encoding='utf-8')
+    first, _ = store.snapshot(page)
+    load_index().update(computer(1, "Edited"))
+    second, _ = store.snapshot(page)
+
+    assert len(second['chunks']) > 20
+    assert len(set(second['chunks']) - set(first['chunks'])) <= 2
+
+
+def test_restore_writes_the_snapshot_and_keeps_the_page_it_replaces(site, load_index, store):
+    page = site / "index.html"
+    original, _ = store.snapshot(page)
+    load_index().update(computer(1, "Edited"))
+    edited = page.read_bytes()
+
+    store.restore(original['id'][:8], page)
+    assert page.read_bytes() == store.read(original['id'])
+    latest = store.latest()
+    assert latest['label'] == f"before restoring {original['id']}"
+    assert store.read(latest['id']) == edited
+
+
+def test_find_rejects_unknown_and_ambiguous_ids(site, store):
+    page = site / "index.html"
+    first, _ = store.snapshot(page, created=datetime(2026, 1, 1))
+    page.write_text(page.read_text(encoding='utf-8') + "<!-- edit -->\n", encoding='utf-8')
+    store.snapshot(page, created=datetime(2026, 1, 2))
+
+    assert store.find("20260101")['id'] == first['id']
+    with pytest.raises(KeyError):
+        store.find("nope")
+    with pytest.raises(KeyError):
+        store.find("2026")
+
+
+def test_damaged_snapshot_is_detected(site, store):
+    snapshot, _ = store.snapshot(site / "index.html")
+    store._object_path(snapshot['chunks'][0]).write_bytes(zlib.compress(b"garbage"))
+    with pytest.raises(ValueError):
+        store.read(snapshot['id'])
+
+
+def test_prune_keeps_the_newest_and_one_per_recent_day(site, store):
+    page = site / "index.html"
+    now = datetime(2026, 3, 20, 12, 0)
+    created = []
+    for i in range(10):
+        # Two snapshots a day over five days, the second one later in the day
+        page.write_text(page.read_text(encoding='utf-8') + f"<!-- {i} -->\n", encoding='utf-8')
+        when = now - timedelta(days=4 - i // 2, hours=2) + timedelta(hours=i % 2)
+        created.append(store.snapshot(page, created=when)[0]['id'])
+
+    removed, freed = store.prune(keep_last=2, keep_daily=3, now=now)
+
+    # The last two, plus the latest of each of the last three days
+    kept = [created[i] for i in (5, 7, 8, 9)]
+    assert [s['id'] for s in store.snapshots()] == kept
+    assert sorted(removed) == sorted(set(created) - set(kept))
+    assert freed > 0
+    for snapshot_id in kept:
+        store.read(snapshot_id)  # Every chunk a kept snapshot uses is still there
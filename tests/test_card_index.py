@@ -0,0 +1,139 @@
+import shutil
+
+import pytest
+
+import gallery_core as gm
+from conftest import ROOT, computer
+
+
+def outside(raw, span):
+    """Return the page bytes before and after a byte range."""
+    return raw[:span[0]], raw[span[1]:]
+
+
+def test_load_reads_cards_in_page_order(load_index):
+    card_index = load_index()
+    assert [c['id'] for c in card_index.computers()] == ['1', '2', '3']
+    assert card_index.get('2')['title'] == "Computer 2"
+    assert card_index.get('3')['price'] == "$700.00$630.00"
+    assert not card_index.cards['1']['custom']
+    assert card_index.cards['3']['custom']
+
+
+def test_update_splices_only_the_changed_card(site, load_index):
+    card_index = load_index()
+    before = (site / "index.html").read_bytes()
+    head, tail = outside(before, card_index.cards['2']['span'])
+
+    card_index.update(computer(2, "Renamed", "$350"))
+
+    after = (site / "index.html").read_bytes()
+    assert after.startswith(head) and after.endswith(tail)
+    assert card_index.parse_count == 1  # No re-parse for the edit
+    reloaded = load_index()
+    assert reloaded.get('2')['title'] == "Renamed"
+    assert reloaded.get('2')['price'] == "$350"
+    assert reloaded.card_bytes('3') == card_index.card_bytes('3')
+
+
+def test_add_and_delete_round_trip(site, load_index):
+    card_index = load_index()
+    original = (site / "index.html").read_bytes()
+
+    card_index.add(computer(4, "Added"))
+    assert [c['id'] for c in load_index().computers()] == ['1', '2', '3', '4']
+    assert load_index().get('4')['title'] == "Added"
+
+    card_index.delete('4')
+    assert (site / "index.html").read_bytes() == original
+
+
+def test_splice_and_prettify_write_the_same_cards(site, tmp_path_factory):
+    results = []
+    for write_mode in gm.CardIndex.WRITE_MODES:
+        copy = tmp_path_factory.mktemp(write_mode) / "index.html"
+        shutil.copyfile(site / "index.html", copy)
+        card_index = gm.CardIndex(copy, write_mode=write_mode)
+        card_index.load()
+        with card_index.batch():
+            card_index.update(computer(1, "Same", "$1"))
+            card_index.add(computer(4))
+            card_index.delete('2')
+        reloaded = gm.CardIndex(copy)
+        reloaded.load()
+        results.append(reloaded.computers())
+    assert results[0] == results[1]
+
+
+def test_batch_writes_the_page_once(load_index):
+    card_index = load_index()
+    with card_index.batch():
+        card_index.update(computer(1, "One"))
+        card_index.add(computer(4))
+        card_index.delete('2')
+    assert card_index.write_count == 1
+    assert [c['id'] for c in load_index().computers()] == ['1', '3', '4']
+
+
+def test_hand_made_card_keeps_its_markup_when_its_image_changes(load_index):
+    card_index = load_index()
+    card_index.set_image_src('3', "./assets/gallery/other.jpg")
+    markup = load_index().card_bytes('3')
+    assert b'sale-price' in markup and b'bf-ribbon-corner' in markup
+    assert b'src="./assets/gallery/other.jpg"' in markup
+
+
+def test_edit_refused_when_page_changed_on_disk(site, load_index):
+    card_index = load_index()
+    page = site / "index.html"
+    page.write_bytes(page.read_bytes().replace(b"Computer 1", b"Edited elsewhere"))
+    with pytest.raises(RuntimeError):
+        card_index.update(computer(2, "Mine"))
+    assert b"Edited elsewhere" in page.read_bytes()
+
+
+def test_real_page_is_unchanged_outside_the_edited_card(tmp_path):
+    shutil.copyfile(ROOT / "index.html", tmp_path / "index.html")
+    card_index = gm.CardIndex(tmp_path / "index.html", responsive_images=False)
+    assert card_index.load()
+    before = card_index.raw
+    head, tail = outside(before, card_index.cards['2']['span'])
+    data = dict(card_index.get('2'), price="$999.99")
+
+    card_index.update(data)
+
+    after = (tmp_path / "index.html").read_bytes()
+    assert after.startswith(head) and after.endswith(tail)
+    reloaded = gm.CardIndex(tmp_path / "index.html")
+    reloaded.load()
+    assert reloaded.get('2')['price'] == "$999.99"
+    assert len(reloaded.cards) == len(card_index.cards)
+
+
+def test_field_update_keeps_hand_made_markup(load_index):
+    card_index = load_index()
+    card_index.update(dict(card_index.get('3'), title="Hp Victus 16"))
+
+    markup = load_index().card_bytes('3')
+    assert b'sale-price' in markup and b'bf-ribbon-corner' in markup
+    assert b'Black Friday Sale' in markup
+    assert load_index().get('3')['title'] == "Hp Victus 16"
+
+
+def test_price_and_spec_update_keeps_extra_spec_rows(site, load_index):
+    page = site / "index.html"
+    warranty = '<div class="spec-item"><strong>1 Year</strong><strong>Warranty</strong></div>'
+    text = page.read_text(encoding='utf-8')
+    end = text.index('</div>', text.index('Ryzen 7')) + len('</div>')
+    page.write_text(text[:end] + warranty + text[end:], encoding='utf-8')
+    card_index = load_index()
+    specs = gm.normalize_specs([{'label': 'Processor', 'value': 'Ryzen 9'},
+                                {'label': 'Memory', 'value': '32 GB'}])
+    card_index.update(dict(card_index.get('3'), price="$599", specs=specs))
+
+    reloaded = load_index()
+    assert reloaded.get('3')['price'] == "$599"
+    assert reloaded.get('3')['specs'] == specs
+    markup = reloaded.card_bytes('3')
+    assert b'Warranty' in markup and b'bf-ribbon-corner' in markup
+    assert b'sale-price' not in markup  # The new price replaces the sale prices
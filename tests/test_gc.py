@@ -0,0 +1,70 @@
+import pytest
+
+import gallery_core as gm
+from conftest import computer
+
+
+@pytest.fixture
+def gallery(site):
+    gallery = site / "assets" / "gallery"
+    for name in ("desktop-1.jpg", "desktop-2.jpg", "laptop-3.jpg", "unused.jpg"):
+        (gallery / name).write_bytes(name.encode())
+    return gallery
+
+
+def removed_names(card_index, site, **options):
+    _, removed = gm.collect_garbage(card_index, site, dry_run=True, min_age=0, **options)
+    return {path.name for path in removed}
+
+
+def test_unused_images_are_removed(site, gallery, load_index):
+    card_index = load_index()
+    assert "unused.jpg" in removed_names(card_index, site)
+
+    gm.collect_garbage(card_index, site, min_age=0)
+    assert not (gallery / "unused.jpg").exists()
+    for computer_id in ('1', '2', '3'):
+        assert gm.resolve_image_path(site, card_index.get(computer_id)['image']).is_file()
+
+
+def test_images_named_by_scripts_styles_and_other_pages_are_kept(site, gallery, load_index):
+    files = {"script.js": "computer-data.jpg", "style.css": "hero.jpg", "promo.html": "promo.jpg",
+             "api/data.json": "api.jpg", "checklists/sale.html": "sale.jpg"}
+    for name, image in files.items():
+        (gallery / image).write_bytes(image.encode())
+        path = site / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"image: './assets/gallery/{image}',\n", encoding='utf-8')
+
+    removed = removed_names(load_index(), site)
+    assert "unused.jpg" in removed
+    assert not removed & set(files.values())
+
+
+def test_backups_and_generated_folders_are_not_read_as_pages(site, gallery, load_index):
+    (site / "node_modules").mkdir()
+    (site / "node_modules" / "x.js").write_text("'assets/gallery/unused.jpg'", encoding='utf-8')
+    assert "unused.jpg" in removed_names(load_index(), site)
+
+
+def test_images_undo_can_bring_back_are_kept(site, gallery, load_index):
+    journal = gm.CardJournal(site / "backups" / "journal.jsonl")
+    card_index = load_index(journal=journal)
+    card_index.delete('3')
+    assert "laptop-3.jpg" not in removed_names(card_index, site)
+    assert "laptop-3.jpg" in removed_names(load_index(), site)  # Without the history
+
+
+def test_images_in_backups_are_kept(site, gallery, load_index):
+    gm.BackupStore(site / "backups").snapshot(site / "index.html")
+    card_index = load_index()
+    card_index.delete('3')
+    assert "laptop-3.jpg" not in removed_names(card_index, site)
+
+
+def test_images_of_staged_edits_are_kept(site, gallery, load_index):
+    card_index = load_index()
+    staged = gm.StagedEdits()
+    staged.stage(card_index, computer(4, image="./assets/gallery/unused.jpg"))
+    assert "unused.jpg" not in removed_names(card_index, site, staged=staged)
+    assert "unused.jpg" in removed_names(card_index, site)
@@ -0,0 +1,127 @@
+import subprocess
+
+import pytest
+
+import gallery_core as gm
+from conftest import computer
+
+
+def git(*args, cwd):
+    return subprocess.run(['git'] + list(args), cwd=cwd, check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+@pytest.fixture
+def remote(site, tmp_path_factory):
+    """Make the site a git repository pushed to a bare remote; return the remote."""
+    remote = tmp_path_factory.mktemp("remote") / "site.git"
+    (site / "assets" / "gallery" / "desktop-1.jpg").write_bytes(b"photo 1")
+    git('init', '-q', '--bare', '-b', 'main', str(remote), cwd=site)
+    git('init', '-q', '-b', 'main', cwd=site)
+    git('config', 'user.name', 'Test', cwd=site)
+    git('config', 'user.email', 'test@example.com', cwd=site)
+    git('add', '-A', cwd=site)
+    git('commit', '-q', '-m', 'Initial', cwd=site)
+    git('remote', 'add', 'origin', str(remote), cwd=site)
+    git('push', '-q', '-u', 'origin', 'main', cwd=site)
+    return remote
+
+
+@pytest.fixture
+def service(site, remote):
+    service = gm.GitService(site)
+    yield service
+    service.close()
+
+
+def publish(site, service):
+    gm.publish_changes(site, "Test publish", log=lambda line: None, git=service)
+
+
+def assert_pushed(site, remote):
+    assert git('rev-parse', 'main', cwd=remote) == git('rev-parse', 'HEAD', cwd=site)
+
+
+def test_a_file_rewritten_in_place_is_still_published(site, remote, service):
+    assert service.pending(gm.GIT_GALLERY_PATHS) == []
+    # Same file, same folder: nothing the cached status watches changes
+    with open(site / "assets" / "gallery" / "desktop-1.jpg", 'r+b') as f:
+        f.write(b"PHOTO")
+
+    publish(site, service)
+    assert_pushed(site, remote)
+    assert git('show', 'HEAD:assets/gallery/desktop-1.jpg', cwd=site) == "PHOTO 1"
+    assert service.status(refresh=True)['changes'] == []
+
+
+def test_status_reports_the_branch_and_changes(site, remote, service):
+    status = service.status()
+    assert (status['branch'], status['upstream'], status['ahead']) == ('main', 'origin/main', 0)
+    assert service.is_pushed()
+
+    (site / "assets" / "gallery" / "new.jpg").write_bytes(b"new")
+    (site / "notes.txt").write_text("not part of the gallery", encoding='utf-8')
+    assert service.pending(gm.GIT_GALLERY_PATHS) == [('??', 'assets/gallery/new.jpg')]
+
+
+def test_status_is_cached_until_something_changes(site, remote, service):
+    # The first status also tells which branch refs to watch, so the next
+    # one runs git again; from then on nothing changed means no git
+    service.status()
+    service.status()
+    count = service.process_count
+    service.status()
+    service.pending(gm.GIT_GALLERY_PATHS)
+    assert service.process_count == count
+
+    card_index = gm.CardIndex(site / "index.html")
+    card_index.load()
+    card_index.update(computer(1, "Edited"))
+    assert service.pending(gm.GIT_GALLERY_PATHS) == [('.M', 'index.html')]
+
+
+def test_status_leaves_the_index_alone(site, remote, service):
+    # A touched file makes git refresh the index, unless optional locks are off
+    index = site / ".git" / "index"
+    page = site / "index.html"
+    page.write_bytes(page.read_bytes())
+    before = index.stat().st_mtime_ns
+    service.status(refresh=True)
+    assert index.stat().st_mtime_ns == before
+    assert not (site / ".git" / "index.lock").exists()
+
+
+def test_publish_pushes_the_edit_and_a_second_publish_does_nothing(site, remote, service):
+    card_index = gm.CardIndex(site / "index.html")
+    card_index.load()
+    card_index.update(computer(2, "Published"))
+
+    publish(site, service)
+    assert_pushed(site, remote)
+    assert git('log', '-1', '--format=%s', cwd=remote) == "Test publish"
+    assert service.status(refresh=True)['changes'] == []
+    assert service.is_pushed()
+
+    head = git('rev-parse', 'HEAD', cwd=site)
+    publish(site, service)
+    assert git('rev-parse', 'HEAD', cwd=site) == head
+    assert_pushed(site, remote)
+
+
+def test_files_in_a_new_folder_are_published_one_by_one(site, remote, service):
+    state_file = site / "backups" / gm.PUBLISH_STATE_FILE
+    card_index = gm.CardIndex(site / "index.html")
+    card_index.load()
+    gm.PublishPlan(card_index, state_file).save()
+    variants = site / "assets" / "gallery" / "variants"
+    variants.mkdir()
+    (variants / "desktop-1-320w.jpg").write_bytes(b"small")
+
+    plan = gm.PublishPlan(card_index, state_file)
+    assert plan.paths == ['assets/gallery/variants/desktop-1-320w.jpg']
+    assert service.pending(plan.paths) == [('??', 'assets/gallery/variants/desktop-1-320w.jpg')]
+
+    gm.publish_changes(site, plan.message(), log=lambda line: None, paths=plan.paths,
+                       git=service)
+    assert git('show', 'HEAD:assets/gallery/variants/desktop-1-320w.jpg', cwd=site) == "small"
+    assert_pushed(site, remote)
@@ -0,0 +1,50 @@
+import pytest
+
+import gallery_core as gm
+import gallery_manager
+from conftest import computer
+
+
+@pytest.fixture
+def photo(tmp_path_factory):
+    """A photo outside the website folder, as a user picks one."""
+    path = tmp_path_factory.mktemp("photos") / "photo.jpg"
+    path.write_bytes(b"not decoded here")
+    return path
+
+
+def test_urls_and_site_files_are_used_as_given(site):
+    (site / "assets" / "logo.png").write_bytes(b"logo")
+    (site / "assets" / "gallery" / "desktop-1.jpg").write_bytes(b"photo")
+    for image in ("https://example.com/pc.jpg", "HTTP://example.com/pc.jpg",
+                  "data:image/png;base64,iVBORw0KGgo=", "./assets/logo.png",
+                  "./assets/gallery/desktop-1.jpg"):
+        assert gm.image_job_for(site, image) == (image, None)
+
+
+def test_local_photos_are_processed(site, photo):
+    assert gm.image_job_for(site, str(photo)) == (None, (photo, site / "assets" / "gallery"))
+
+
+@pytest.mark.parametrize('image', ["./assets/gallery/missing.jpg", "C:/Users/me/pc.jpg",
+                                   "/no/such/photo.jpg", "ftp://example.com/pc.jpg"])
+def test_anything_else_is_an_error(site, image):
+    with pytest.raises(ValueError):
+        gm.image_job_for(site, image)
+
+
+def test_import_reports_a_missing_image_as_a_row_error(site, load_index, photo):
+    rows = [dict(computer(None, "Good"), id='', image=str(photo)),
+            dict(computer(None, "Typo"), id='', image="photos/typo.jpg")]
+    pending, errors = gm.plan_import(load_index(), rows, site, base_dir=photo.parent)
+    assert [data['title'] for _, data, _ in pending] == ["Good"]
+    assert errors == [(2, "Image not found: photos/typo.jpg")]
+
+
+def test_add_refuses_a_missing_image(site, capsys):
+    args = ['--website-dir', str(site), 'add', '--type', 'desktop', '--title', "New",
+            '--price', "$100", '--spec', "Processor=i5", '--image', str(site / "nowhere.jpg")]
+    page = (site / "index.html").read_bytes()
+    assert gallery_manager.main(args) == 1
+    assert "Image not found" in capsys.readouterr().out
+    assert (site / "index.html").read_bytes() == page
@@ -0,0 +1,184 @@
+import json
+
+import pytest
+
+import gallery_core as gm
+import gallery_manager
+from conftest import computer
+
+
+@pytest.fixture(params=['jsonl', 'sqlite'])
+def store(request, site, load_index):
+    """An inventory store built from the site's page, as 'inventory migrate' does."""
+    if request.param == 'sqlite':
+        store = gm.InventoryDatabase(site / gm.INVENTORY_DB_FILE)
+    else:
+        store = gm.InventoryStore(site / gm.INVENTORY_FILE)
+    card_index = load_index()
+    card_index.inventory = store
+    card_index.save_inventory()
+    yield store
+    if request.param == 'sqlite':
+        store.close()
+
+
+def edit_store(store, computer_id, title):
+    """Change a card's title in the store by hand, as a text edit or a merge would."""
+    if isinstance(store, gm.InventoryDatabase):
+        with store.db:
+            row = store.db.execute("SELECT record FROM listings WHERE id = ?",
+                                   (computer_id,)).fetchone()
+            record = dict(json.loads(row[0]), title=title)
+            store.db.execute("UPDATE listings SET record = ? WHERE id = ?",
+                             (json.dumps(record), computer_id))
+        return
+    lines = store.path.read_text(encoding='utf-8').splitlines()
+    for i, line in enumerate(lines[1:], 1):
+        record = json.loads(line)
+        if record['id'] == computer_id:
+            lines[i] = json.dumps(dict(record, title=title))
+    store.path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+
+def edit_page(load_index, computer_id, title):
+    """Change a card on the page without the store, as the web admin would."""
+    load_index().update(computer(computer_id, title))
+
+
+def test_in_sync_store_is_read_instead_of_the_page(load_index, store):
+    card_index = load_index(inventory=store)
+    assert card_index.inventory_state == 'in-sync'
+    assert card_index.get('3')['price'] == "$700.00$630.00"
+
+
+def test_store_edit_regenerates_the_grid(load_index, store):
+    edit_store(store, '2', "From the store")
+    assert load_index(inventory=store).inventory_state == 'store-changed'
+    assert load_index().get('2')['title'] == "From the store"
+
+
+def test_page_edit_rebuilds_the_store(load_index, store):
+    edit_page(load_index, '1', "From the page")
+    assert load_index(inventory=store).inventory_state == 'page-changed'
+    card_index = load_index(inventory=store)
+    assert card_index.inventory_state == 'in-sync'
+    assert card_index.get('1')['title'] == "From the page"
+
+
+def test_both_edited_is_a_conflict_and_nothing_is_written(site, load_index, store):
+    edit_page(load_index, '1', "From the page")
+    edit_store(store, '2', "From the store")
+    page = (site / "index.html").read_bytes()
+    card_index = gm.CardIndex(site / "index.html", inventory=store)
+
+    with pytest.raises(RuntimeError):
+        card_index.load()
+    assert card_index.inventory_state == 'conflict'
+    assert (site / "index.html").read_bytes() == page
+    assert store.state(page[slice(*gm.scan_card_spans(page)[0])])[0] == 'conflict'
+
+
+def test_conflict_resolved_by_keeping_the_page(site, load_index, store):
+    edit_page(load_index, '1', "From the page")
+    edit_store(store, '2', "From the store")
+    page = (site / "index.html").read_bytes()
+
+    card_index = gm.CardIndex(site / "index.html", inventory=store)
+    assert card_index.load(prefer='page')
+    assert (site / "index.html").read_bytes() == page
+    assert card_index.get('2')['title'] == "Computer 2"
+    assert load_index(inventory=store).inventory_state == 'in-sync'
+
+
+def test_conflict_resolved_by_keeping_the_inventory(site, load_index, store):
+    edit_page(load_index, '1', "From the page")
+    edit_store(store, '2', "From the store")
+
+    card_index = gm.CardIndex(site / "index.html", inventory=store)
+    assert card_index.load(prefer='inventory')
+    reloaded = load_index()
+    assert reloaded.get('1')['title'] == "Computer 1"
+    assert reloaded.get('2')['title'] == "From the store"
+    assert load_index(inventory=store).inventory_state == 'in-sync'
+
+
+def test_store_left_with_merge_markers_is_damaged(site, load_index):
+    store = gm.InventoryStore(site / gm.INVENTORY_FILE)
+    card_index = load_index()
+    card_index.inventory = store
+    card_index.save_inventory()
+    lines = store.path.read_text(encoding='utf-8').splitlines()
+    store.path.write_text("\n".join(lines[:2] + ["<<<<<<< HEAD"] + lines[2:]) + "\n",
+                          encoding='utf-8')
+    page = (site / "index.html").read_bytes()
+
+    card_index = gm.CardIndex(site / "index.html", inventory=store)
+    with pytest.raises(RuntimeError):
+        card_index.load()
+    assert card_index.inventory_state == 'damaged'
+    assert (site / "index.html").read_bytes() == page
+
+    assert card_index.load(prefer='page')
+    assert load_index(inventory=store).inventory_state == 'in-sync'
+
+
+@pytest.mark.parametrize('command', [['list'], ['history'], ['inventory', 'status']])
+def test_read_only_commands_leave_no_store_behind(site, command):
+    assert gallery_manager.main(['--website-dir', str(site)] + command) == 0
+    assert not (site / gm.INVENTORY_FILE).exists()
+    assert not (site / gm.INVENTORY_DB_FILE).exists()
+
+
+def test_without_a_store_the_page_is_used_alone(site, load_index):
+    card_index = load_index(inventory=gm.open_inventory(site))
+    assert card_index.inventory_state == 'missing'
+    card_index.update(computer(1, "Page only"))
+    assert load_index().get('1')['title'] == "Page only"
+    assert not (site / gm.INVENTORY_FILE).exists()
+
+
+def test_migrate_creates_the_store(site):
+    assert gallery_manager.main(['--website-dir', str(site), 'inventory', 'migrate']) == 0
+    store = gm.InventoryStore(site / gm.INVENTORY_FILE)
+    assert [r['id'] for r in store.read()[1]] == ['1', '2', '3']
+
+
+
+def stored_records(store):
+    """Return the records the store holds, read straight from it."""
+    if isinstance(store, gm.InventoryDatabase):
+        return store.records()
+    return store.read()[1]
+
+
+def test_a_single_add_is_saved_to_the_store(load_index, store):
+    card_index = load_index(inventory=store)
+    card_index.add(computer(4, "Added"))
+
+    assert [r['id'] for r in stored_records(store)] == ['1', '2', '3', '4']
+    assert stored_records(store)[3]['title'] == "Added"
+    assert load_index(inventory=store).inventory_state == 'in-sync'
+
+
+def test_single_edits_store_the_hand_made_markup_as_written(load_index, store):
+    card_index = load_index(inventory=store)
+    card_index.update(computer(1, "Longer title than before"))
+    card_index.set_image_src('3', "./assets/gallery/other.jpg")
+
+    sale_card = next(r for r in stored_records(store) if r['id'] == '3')
+    assert sale_card['markup'].encode('utf-8') == load_index().card_bytes('3')
+
+
+def test_database_ids_advance_with_each_add(site, load_index):
+    database = gm.InventoryDatabase(site / gm.INVENTORY_DB_FILE)
+    card_index = load_index()
+    card_index.inventory = database
+    card_index.save_inventory()
+
+    # Two Add New clicks in one session, each taking the next free ID
+    card_index = load_index(inventory=database)
+    for title in ("First", "Second"):
+        card_index.add(computer(card_index.next_id(), title))
+    assert [c['id'] for c in card_index.computers()] == ['1', '2', '3', '4', '5']
+    assert database.next_id() == '6'
+    database.close()
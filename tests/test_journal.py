@@ -0,0 +1,92 @@
+import pytest
+
+import gallery_core as gm
+from conftest import computer
+
+
+@pytest.fixture
+def journal(site):
+    return gm.CardJournal(site / "backups" / "journal.jsonl")
+
+
+def test_undo_restores_the_page_and_redo_reapplies(site, load_index, journal):
+    card_index = load_index(journal=journal)
+    original = (site / "index.html").read_bytes()
+    card_index.update(computer(1, "Changed"))
+    changed = (site / "index.html").read_bytes()
+
+    entries = journal.undo(card_index)
+    assert [e['id'] for e in entries] == ['1']
+    assert (site / "index.html").read_bytes() == original
+
+    journal.redo(card_index)
+    assert (site / "index.html").read_bytes() == changed
+    assert journal.redo(card_index) is None
+
+
+def test_a_batch_is_one_undo_step(site, load_index, journal):
+    card_index = load_index(journal=journal)
+    original = (site / "index.html").read_bytes()
+    with card_index.batch():
+        card_index.update(computer(1, "One"))
+        card_index.delete('3')
+        card_index.add(computer(4))
+
+    journal.undo(card_index)
+    assert (site / "index.html").read_bytes() == original
+    assert journal.undo(card_index) is None
+
+
+def test_undo_brings_back_hand_made_markup(site, load_index, journal):
+    card_index = load_index(journal=journal)
+    sale_card = card_index.card_bytes('3')
+    card_index.delete('3')
+    journal.undo(card_index)
+    assert load_index().card_bytes('3') == sale_card
+
+
+def test_a_new_edit_clears_redo(load_index, journal):
+    card_index = load_index(journal=journal)
+    card_index.update(computer(1, "First"))
+    journal.undo(card_index)
+    card_index.update(computer(2, "Second"))
+    assert journal.stacks()[1] == []
+
+
+def test_undo_refuses_a_card_changed_outside_the_history(load_index, journal):
+    card_index = load_index(journal=journal)
+    card_index.update(computer(1, "Journaled"))
+    untracked = load_index()  # No journal attached
+    untracked.update(computer(1, "Untracked"))
+
+    card_index.load()
+    with pytest.raises(ValueError):
+        journal.undo(card_index)
+    assert card_index.get('1')['title'] == "Untracked"
+
+
+def test_revert_returns_cards_to_an_earlier_entry(site, load_index, journal):
+    card_index = load_index(journal=journal)
+    card_index.update(computer(1, "First"))
+    first = journal.entries[-1]['seq']
+    after_first = (site / "index.html").read_bytes()
+    card_index.update(computer(2, "Second"))
+    card_index.delete('3')
+
+    changed = journal.revert(card_index, first)
+    assert sorted(changed) == ['2', '3']
+    assert (site / "index.html").read_bytes() == after_first
+
+    # The revert is an edit of its own, so it can be undone
+    journal.undo(card_index)
+    assert [c['id'] for c in load_index().computers()] == ['1', '2']
+
+
+def test_journal_is_shared_between_processes(site, load_index):
+    path = site / "backups" / "journal.jsonl"
+    load_index(journal=gm.CardJournal(path)).update(computer(1, "From the CLI"))
+
+    other = gm.CardJournal(path)
+    card_index = load_index(journal=other)
+    assert other.undo(card_index)[0]['id'] == '1'
+    assert card_index.get('1')['title'] == "Computer 1"
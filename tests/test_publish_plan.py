@@ -0,0 +1,87 @@
+import pytest
+
+import gallery_core as gm
+from conftest import computer
+
+
+@pytest.fixture
+def state_file(site):
+    return site / "backups" / gm.PUBLISH_STATE_FILE
+
+
+@pytest.fixture
+def published(site, load_index, state_file):
+    """Record the site as published, as a successful publish does."""
+    (site / "assets" / "gallery" / "desktop-1.jpg").write_bytes(b"photo 1")
+    gm.PublishPlan(load_index(), state_file).save()
+
+
+def test_first_publish_stages_everything(site, load_index, state_file):
+    plan = gm.PublishPlan(load_index(), state_file)
+    assert plan.changed
+    assert plan.paths == ['index.html', 'assets/gallery/']
+    assert plan.message().startswith(gm.DEFAULT_PUBLISH_MESSAGE)
+
+
+@pytest.mark.usefixtures('published')
+def test_nothing_changed_since_the_last_publish(load_index, state_file):
+    plan = gm.PublishPlan(load_index(), state_file)
+    assert not plan.changed
+    assert plan.paths == []
+
+
+@pytest.mark.usefixtures('published')
+def test_card_changes_are_named(load_index, state_file):
+    card_index = load_index()
+    with card_index.batch():
+        card_index.update(computer(1, "Renamed"))
+        card_index.add(computer(4, "Brand New"))
+        card_index.delete('3')
+
+    plan = gm.PublishPlan(card_index, state_file)
+    assert plan.paths == ['index.html']
+    assert plan.added == [('4', "Brand New")]
+    assert plan.updated == [('1', "Renamed")]
+    assert plan.removed == [('3', "Hp Victus")]
+    message = plan.message()
+    assert message.split("\n")[0] == "Gallery: add Brand New; update Renamed; remove Hp Victus"
+    assert "- #4 Brand New" in message
+    assert plan.summary() == "1 added, 1 updated, 1 removed, 1 file(s)"
+    assert plan.message("Weekly update").split("\n")[0] == "Weekly update"
+
+
+@pytest.mark.usefixtures('published')
+def test_only_changed_images_are_staged(site, load_index, state_file):
+    gallery = site / "assets" / "gallery"
+    (gallery / "new.jpg").write_bytes(b"new photo")
+    (gallery / "desktop-1.jpg").unlink()
+
+    plan = gm.PublishPlan(load_index(), state_file)
+    assert plan.paths == ['assets/gallery/desktop-1.jpg', 'assets/gallery/new.jpg']
+    assert plan.message() == "Update gallery images"
+
+
+@pytest.mark.usefixtures('published')
+def test_many_changed_images_stage_the_folder(site, load_index, state_file):
+    gallery = site / "assets" / "gallery"
+    for i in range(gm.PUBLISH_MAX_PATHS + 1):
+        (gallery / f"photo-{i}.jpg").write_bytes(b"photo")
+    assert gm.PublishPlan(load_index(), state_file).paths == ['assets/gallery/']
+
+
+@pytest.mark.usefixtures('published')
+def test_a_save_makes_the_next_plan_empty(load_index, state_file):
+    card_index = load_index()
+    card_index.update(computer(2, "Changed"))
+    gm.PublishPlan(card_index, state_file).save()
+    assert not gm.PublishPlan(card_index, state_file).changed
+
+
+@pytest.mark.usefixtures('published')
+def test_long_subjects_are_counted_instead(load_index, state_file):
+    card_index = load_index()
+    with card_index.batch():
+        for i in range(4, 10):
+            card_index.add(computer(i, f"A computer with a long name {i}"))
+    subject = gm.PublishPlan(card_index, state_file).message().split("\n")[0]
+    assert subject == "Gallery: add 6 cards"